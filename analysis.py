@@ -0,0 +1,367 @@
+import heapq
+
+from cpu import INSTR_CYCLES
+from disassembler import DECODE_TABLE
+
+# Análisis estático de una imagen de memoria: grafo de flujo de control (CFG) por
+# bloques básicos, código alcanzable, bucles, STA que pueden reescribir código y cotas
+# de ciclos sin ejecutar el programa. Los ciclos son los mismos que cuenta la CPU
+# (INSTR_CYCLES: FETCH + micro-ops); un opcode desconocido es un SKIP de 1 byte y 1 ciclo.
+
+OVERFLOW = 256      # Nodo ficticio: PC se sale de la memoria (cuesta 1 ciclo más)
+MAX_ITERATIONS = 256  # Vueltas máximas de un bucle contado con DEX/BEQ sin X conocido
+
+_LDA, _ADD, _STA, _JMP, _SUB, _BEQ = 0x01, 0x02, 0x03, 0x04, 0x05, 0x06
+_AND, _OR, _XOR, _NOT, _LDX, _INX, _DEX, _HALT = 0x07, 0x08, 0x09, 0x0A, 0x0B, 0x0C, 0x0D, 0xFF
+
+# Instrucciones que pueden contar las vueltas de un bucle: opcode -> (registro, paso);
+# paso None = el operando (positivo en ADD, negativo en SUB)
+_COUNTERS = {_DEX: ("X", -1), _INX: ("X", 1), _ADD: ("A", None), _SUB: ("A", None)}
+_WRITERS = {"A": {_LDA, _ADD, _SUB, _AND, _OR, _XOR, _NOT}, "X": {_LDX, _INX, _DEX}}
+
+
+def _known(func):
+    """Aplica func al valor y al operando solo si el valor es conocido."""
+    return lambda v, n: None if v is None else func(v, n) & 0xFF
+
+
+# Propagación de constantes: opcode -> (registro, función(valor, operando) -> valor)
+_CONSTANT_EFFECTS = {
+    _LDA: ("A", lambda v, n: n), _LDX: ("X", lambda v, n: n),
+    _ADD: ("A", _known(lambda v, n: v + n)), _SUB: ("A", _known(lambda v, n: v - n)),
+    _AND: ("A", _known(lambda v, n: v & n)), _OR: ("A", _known(lambda v, n: v | n)),
+    _XOR: ("A", _known(lambda v, n: v ^ n)), _NOT: ("A", _known(lambda v, n: ~v)),
+    _INX: ("X", _known(lambda v, n: v + 1)), _DEX: ("X", _known(lambda v, n: v - 1)),
+}
+
+
+class BasicBlock:
+    """Tramo lineal de instrucciones. succs son inicios de bloque (u OVERFLOW)."""
+
+    def __init__(self, start):
+        self.start = start
+        self.instrs = []      # (dirección, opcode, operando o None)
+        self.cycles = 0
+        self.succs = []
+        self.end = None       # "halt", "fault" (operando fuera de memoria) o None
+
+    def __repr__(self):
+        return f"<Bloque ${self.start:02X} {len(self.instrs)} instr, {self.cycles} ciclos>"
+
+
+class Loop:
+    """Bucle natural: cabecera, bloques del cuerpo y cota de vueltas (None = sin cota)."""
+
+    def __init__(self, header, body):
+        self.header = header
+        self.body = body
+        self.bound = None
+        self.counter = None   # Dirección del DEX que lo cuenta
+
+    def __repr__(self):
+        return f"<Bucle ${self.header:02X} {len(self.body)} bloques, cota {self.bound}>"
+
+
+def decode_at(image, pc):
+    """(opcode, longitud, operando) de la instrucción en pc; operando None si no lleva."""
+    op = image[pc]
+    entry = DECODE_TABLE[op]
+    size = entry[1] if entry is not None else 1
+    if size == 2:
+        return op, 2, image[pc + 1] if pc < 255 else None
+    return op, 1, None
+
+
+class CFG:
+    """
+    Grafo de flujo de un programa cargado en 'image' (256 bytes; si es más corta, el
+    resto se toma como ceros, igual que una memoria recién creada) desde 'entry'.
+    Solo se decodifica lo alcanzable siguiendo los saltos, de modo que los datos
+    intercalados no se confunden con código.
+    """
+
+    def __init__(self, image, entry=0):
+        image = bytes(image)
+        self.image = image + bytes(256 - len(image))
+        self.entry = entry
+        self.instrs = {}         # dirección -> (opcode, longitud, operando)
+        self.blocks = {}         # inicio -> BasicBlock
+        self.loops = []
+        self.irreducible = False
+        self._explore()
+        self._build_blocks()
+        self.preds = {start: [] for start in self.blocks}
+        self.preds[OVERFLOW] = []
+        for block in self.blocks.values():
+            for s in block.succs:
+                self.preds[s].append(block.start)
+        self.dominators = self._dominators()
+        self._find_loops()
+
+    # --- CONSTRUCCIÓN ---
+
+    def _successors(self, pc, op, size, operand):
+        if op == _HALT or (size == 2 and operand is None):
+            return []
+        if op == _JMP:
+            return [operand]
+        nxt = pc + size
+        if op == _BEQ:
+            return [operand, nxt] if operand != nxt else [nxt]
+        return [nxt]
+
+    def _explore(self):
+        pending = [self.entry]
+        while pending:
+            pc = pending.pop()
+            if pc >= 256 or pc in self.instrs:
+                continue
+            instr = self.instrs[pc] = decode_at(self.image, pc)
+            pending.extend(self._successors(pc, *instr))
+
+    def _build_blocks(self):
+        leaders = {self.entry}
+        for pc, (op, size, operand) in self.instrs.items():
+            succs = self._successors(pc, op, size, operand)
+            if op in (_JMP, _BEQ):
+                leaders.update(s for s in succs if s < 256)
+        # Las instrucciones a las que se llega por dos caminos también abren bloque
+        entries = {}
+        for pc, (op, size, operand) in self.instrs.items():
+            for s in self._successors(pc, op, size, operand):
+                entries[s] = entries.get(s, 0) + 1
+        leaders.update(pc for pc, n in entries.items() if n > 1 and pc < 256)
+
+        for start in sorted(leaders):
+            block = self.blocks[start] = BasicBlock(start)
+            pc = start
+            while True:
+                op, size, operand = self.instrs[pc]
+                block.instrs.append((pc, op, operand))
+                block.cycles += INSTR_CYCLES.get(op, 1)
+                succs = self._successors(pc, op, size, operand)
+                if op == _HALT:
+                    block.end = "halt"
+                elif size == 2 and operand is None:
+                    block.end = "fault"
+                if op in (_JMP, _BEQ, _HALT) or not succs or succs[0] in leaders or succs[0] >= 256:
+                    block.succs = [min(s, OVERFLOW) for s in succs]
+                    break
+                pc = succs[0]
+
+    def _dominators(self):
+        """Dominadores de cada bloque (conjuntos), por el algoritmo iterativo clásico."""
+        order = self.reverse_postorder()
+        every = set(order)
+        dom = {b: set(every) for b in order}
+        dom[self.entry] = {self.entry}
+        changed = True
+        while changed:
+            changed = False
+            for b in order[1:]:
+                preds = [dom[p] for p in self.preds[b]]
+                new = set.intersection(*preds) | {b} if preds else {b}
+                if new != dom[b]:
+                    dom[b] = new
+                    changed = True
+        return dom
+
+    def reverse_postorder(self):
+        seen = set()
+        order = []
+        stack = [(self.entry, iter(self.blocks[self.entry].succs))]
+        seen.add(self.entry)
+        while stack:
+            node, succs = stack[-1]
+            for s in succs:
+                if s != OVERFLOW and s not in seen:
+                    seen.add(s)
+                    stack.append((s, iter(self.blocks[s].succs)))
+                    break
+            else:
+                stack.pop()
+                order.append(node)
+        order.reverse()
+        return order
+
+    # --- BUCLES ---
+
+    def back_edges(self):
+        return [(b, s) for b, block in self.blocks.items() for s in block.succs
+                if s != OVERFLOW and s in self.dominators[b]]
+
+    def _find_loops(self):
+        bodies = {}
+        for latch, header in self.back_edges():
+            body = bodies.setdefault(header, {header})
+            pending = [latch]
+            while pending:
+                b = pending.pop()
+                if b not in body:
+                    body.add(b)
+                    pending.extend(self.preds[b])
+        self.loops = [Loop(h, frozenset(body)) for h, body in sorted(bodies.items())]
+        # Un ciclo sin arista de retorno (entrada por varios sitios) no se puede acotar
+        back = set(self.back_edges())
+        indegree = {b: 0 for b in self.blocks}
+        for b, block in self.blocks.items():
+            for s in block.succs:
+                if s != OVERFLOW and (b, s) not in back:
+                    indegree[s] += 1
+        ready = [b for b, n in indegree.items() if n == 0]
+        visited = 0
+        while ready:
+            b = ready.pop()
+            visited += 1
+            for s in self.blocks[b].succs:
+                if s != OVERFLOW and (b, s) not in back:
+                    indegree[s] -= 1
+                    if indegree[s] == 0:
+                        ready.append(s)
+        self.irreducible = visited != len(self.blocks)
+        for loop in self.loops:
+            self._bound_loop(loop)
+
+    def _bound_loop(self, loop):
+        """
+        Un bucle está contado si una de sus salidas es 'contador; BEQ fuera' (DEX/INX
+        sobre X, o ADD/SUB n sobre A) en un bloque que dominan todas las vueltas, y el
+        registro no se modifica en ninguna otra parte del cuerpo. El registro avanza un
+        paso fijo por vuelta hasta valer 0: con el valor de entrada conocido se calcula
+        el número exacto de vueltas; si no, un paso impar llega a 0 en 256 como mucho.
+        """
+        latches = [b for b in loop.body if loop.header in self.blocks[b].succs]
+        for b in loop.body:
+            instrs = self.blocks[b].instrs
+            if len(instrs) < 2 or instrs[-1][1] != _BEQ or instrs[-2][1] not in _COUNTERS:
+                continue
+            if instrs[-1][2] in loop.body or not all(b in self.dominators[l] for l in latches):
+                continue
+            counter, op, operand = instrs[-2]
+            reg, step = _COUNTERS[op]
+            step = step if step is not None else (operand if op == _ADD else -operand)
+            writers = _WRITERS[reg]
+            if any(o in writers and pc != counter
+                   for block in loop.body for pc, o, _ in self.blocks[block].instrs):
+                continue
+            value = self._entry_values(loop)[reg]
+            if value is not None:
+                bound = next((i for i in range(1, MAX_ITERATIONS + 1) if (value + step * i) & 0xFF == 0), None)
+            else:
+                bound = MAX_ITERATIONS if step & 1 else None
+            if bound is not None:
+                loop.counter = counter
+                loop.bound = bound
+                return
+
+    def _entry_values(self, loop):
+        """{"A": v, "X": v} al entrar al bucle por su único bloque de entrada (None = desconocido)."""
+        unknown = {"A": None, "X": None}
+        outside = [p for p in self.preds[loop.header] if p not in loop.body]
+        if len(outside) != 1:
+            return unknown
+        # load_program pone A y X a 0; el bloque inicial empieza así si nadie salta a él
+        values = {"A": 0, "X": 0} if outside[0] == self.entry and not self.preds[self.entry] else unknown
+        for _, op, operand in self.blocks[outside[0]].instrs:
+            effect = _CONSTANT_EFFECTS.get(op)
+            if effect is not None:
+                reg, func = effect
+                values[reg] = func(values[reg], operand)
+        return values
+
+    # --- RESULTADOS ---
+
+    @property
+    def reachable(self):
+        """Direcciones de todos los bytes de código alcanzables (opcodes y operandos)."""
+        return frozenset(a for pc, (_, size, _) in self.instrs.items()
+                         for a in range(pc, min(pc + size, 256)))
+
+    def self_modifying(self):
+        """STA alcanzables cuyo destino es un byte de código: lista de (dirección STA, destino)."""
+        code = self.reachable
+        return [(pc, operand) for pc, (op, _, operand) in sorted(self.instrs.items())
+                if op == _STA and operand in code]
+
+    def _executions(self, start):
+        """Cota de veces que se ejecuta un bloque: producto de las cotas de sus bucles."""
+        n = 1
+        for loop in self.loops:
+            if start in loop.body:
+                n *= loop.bound
+        return n
+
+    def cycle_bounds(self):
+        """
+        (mínimo, máximo) de ciclos hasta que la CPU se detiene. El mínimo es el camino
+        más corto hasta un HALT o la salida de memoria (None si no hay ninguno). El
+        máximo es None si hay bucles sin cota; sin bucles es el camino más largo, y con
+        bucles contados, la suma de cada bloque por su número máximo de ejecuciones.
+        Con código automodificable el grafo no es fiable y ambas cotas son None.
+        """
+        if self.self_modifying():
+            return None, None
+        return self._min_cycles(), self._max_cycles()
+
+    def _min_cycles(self):
+        best = {self.entry: self.blocks[self.entry].cycles}
+        heap = [(best[self.entry], self.entry)]
+        while heap:
+            cost, b = heapq.heappop(heap)
+            if b == OVERFLOW:
+                return cost
+            if cost > best.get(b, cost):
+                continue
+            block = self.blocks[b]
+            if block.end is not None:
+                return cost
+            for s in block.succs:
+                c = cost + (1 if s == OVERFLOW else self.blocks[s].cycles)
+                if c < best.get(s, c + 1):
+                    best[s] = c
+                    heapq.heappush(heap, (c, s))
+        return None
+
+    def _max_cycles(self):
+        if self.irreducible:
+            return None
+        if any(loop.bound is None for loop in self.loops):
+            return None
+        overflow = 1 if self.preds[OVERFLOW] else 0
+        if not self.loops:
+            longest = {}
+            for b in reversed(self.reverse_postorder()):
+                block = self.blocks[b]
+                tail = [1 if s == OVERFLOW else longest[s] for s in block.succs]
+                longest[b] = block.cycles + max(tail, default=0)
+            return longest[self.entry]
+        return sum(block.cycles * self._executions(b) for b, block in self.blocks.items()) + overflow
+
+    def to_dict(self):
+        low, high = self.cycle_bounds()
+        return {
+            "entry": self.entry,
+            "blocks": [{"start": b.start, "instructions": len(b.instrs), "cycles": b.cycles,
+                        "succs": b.succs, "end": b.end} for _, b in sorted(self.blocks.items())],
+            "loops": [{"header": l.header, "blocks": sorted(l.body), "bound": l.bound, "counter": l.counter}
+                      for l in self.loops],
+            "reachable_bytes": len(self.reachable),
+            "self_modifying": self.self_modifying(),
+            "irreducible": self.irreducible,
+            "min_cycles": low,
+            "max_cycles": high,
+        }
+
+
+def analyze(image, entry=0):
+    return CFG(image, entry)
+
+
+def program_image(bytecode, offset=0):
+    """Imagen de memoria de un programa recién cargado en una CPU nueva."""
+    return bytes(offset) + bytes(bytecode)
+
+
+def static_budget(bytecode, offset=0):
+    """Cota superior de ciclos de un programa, o None si no se puede acotar."""
+    return analyze(program_image(bytecode, offset), offset).cycle_bounds()[1]
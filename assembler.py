@@ -1,3 +1,8 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
 
 def parse_value(s):
     """
@@ -19,6 +24,27 @@ def parse_value(s):
         return None
 
 
+def parse_hex(text):
+    """
+    Bytes de un fichero .hex: tokens separados por espacios, en hexadecimal por defecto
+    (también se aceptan los prefijos 0x y %). ';' y '#' inician un comentario.
+    """
+    bytecode = []
+    for n_linea, linea in enumerate(text.splitlines(), 1):
+        for token in linea.split(";")[0].split("#")[0].split():
+            if token.lower().startswith(("0x", "%")):
+                valor = parse_value(token)
+            else:
+                try:
+                    valor = int(token, 16)
+                except ValueError:
+                    valor = None
+            if valor is None or not 0 <= valor <= 255:
+                raise ValueError(f"Línea {n_linea}: '{token}' no es un byte válido")
+            bytecode.append(valor)
+    return bytecode
+
+
 # Mapeo de instrucciones en ensamblador a OpCodes
 ASM_TO_HEX = {
     "LDA": 0x01, "ADD": 0x02, "STA": 0x03, "JMP": 0x04,
@@ -27,64 +53,221 @@ ASM_TO_HEX = {
     "DEX": 0x0D, "HALT": 0xFF
 }
 
-# Lista de instrucciones que NO llevan valor adicional (solo ocupan 1 byte)
-SINGLE_BYTE_INSTR = ["INX", "DEX", "NOT", "HALT"]
+# Instrucciones que NO llevan valor adicional (solo ocupan 1 byte)
+SINGLE_BYTE_INSTR = frozenset({"INX", "DEX", "NOT", "HALT"})
+
+# --- CACHÉ DE COMPILACIÓN ---
+# Clave: SHA-256 del fuente normalizado (líneas sin '\n' final, unidas con '\n').
+# Nivel 1 en memoria (LRU); nivel 2 opcional en disco (un JSON por fuente).
+
+ASM_CACHE_VERSION = "2"
+CACHE_SIZE = 256
+_cache = OrderedDict()
+
+
+def clear_cache():
+    _cache.clear()
+
 
+def _cache_get(key, cache_dir):
+    entry = _cache.get(key)
+    if entry is not None:
+        _cache.move_to_end(key)
+        return entry
+    if cache_dir:
+        try:
+            with open(os.path.join(cache_dir, key + ".json"), "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+        entry = (stored["bytecode"], stored["error"], [tuple(row) for row in stored["listing"]],
+                 stored.get("report"))
+        _cache_put(key, entry, None)
+        return entry
+    return None
 
-def compile_asm(source_code, verbose=True):
+
+def _cache_put(key, entry, cache_dir):
+    _cache[key] = entry
+    _cache.move_to_end(key)
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        bytecode, error, listing, report = entry
+        tmp = os.path.join(cache_dir, f"{key}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"bytecode": bytecode, "error": error, "listing": listing, "report": report}, f)
+        os.replace(tmp, os.path.join(cache_dir, key + ".json"))
+
+
+def _new_hasher(optimize=False):
+    modo = " -O" if optimize else ""
+    return hashlib.sha256(f"LOGICA-8 ASM v{ASM_CACHE_VERSION}{modo}\n".encode())
+
+
+# --- ENSAMBLADO EN UNA PASADA ---
+
+def _tokenize(linea):
+    """Devuelve (etiqueta o None, tokens). 'ETIQ:' puede ir pegada a la instrucción."""
+    cabeza, sep, resto = linea.partition(':')
+    if sep:
+        partes = cabeza.split()
+        if len(partes) == 1:
+            return partes[0].upper(), resto.split()
+        if not partes:
+            return "", resto.split()
+    return None, linea.split()
+
+
+def _assemble(lineas, hasher=None):
     """
-    Motor de compilación: Recibe un string o lista de líneas y devuelve el bytecode.
-    Si verbose=True, imprime la tabla de traducción en consola.
+    Ensambla en una sola pasada. Los argumentos que no son una etiqueta ya definida se
+    anotan como 'fixup' y se resuelven al final (las etiquetas tienen prioridad sobre
+    los números, como en la versión de dos pasadas).
+    Devuelve (bytecode, errores, listado, etiquetas) con todos los errores encontrados.
     """
-    lineas_brutas = source_code.split('\n') if isinstance(source_code, str) else source_code
     labels = {}
-    direccion_actual = 0
-    instrucciones_limpias = []
+    bytecode = []
+    errors = []
+    listing = []       # (dirección, mnemónico, argumento, posición en bytecode)
+    fixups = []        # (posición, argumento, nº de línea)
 
-    # --- PASADA 1: Mapeo de Etiquetas ---
-    for linea in lineas_brutas:
-        tokens = linea.replace(':', ': ').split()
+    for n_linea, linea in enumerate(lineas, 1):
+        linea = linea.rstrip('\n')
+        if hasher is not None:
+            hasher.update(linea.encode() + b'\n')
+        label, tokens = _tokenize(linea)
+        if label is not None:
+            if label in labels:
+                errors.append((n_linea, f"Etiqueta duplicada '{label}'"))
+            else:
+                labels[label] = len(bytecode)
         if not tokens: continue
-        primer_token = tokens[0].upper()
-        
-        if primer_token.endswith(':'):
-            label_name = primer_token[:-1]
-            if label_name in labels:
-                return None, f"ERROR: Etiqueta duplicada '{label_name}'"
-            labels[label_name] = direccion_actual
-            tokens = tokens[1:]
-            if not tokens: continue
-        
-        mnemonico = tokens[0].upper()
-        if mnemonico in ASM_TO_HEX:
-            instrucciones_limpias.append((direccion_actual, tokens))
-            direccion_actual += 1 if mnemonico in SINGLE_BYTE_INSTR else 2
-        else:
-            return None, f"ERROR: Instrucción desconocida '{mnemonico}'"
-
-    # --- PASADA 2: Generación de Bytecode ---
-    bytecode = []
-    if verbose: print(f"\n{'DIR':<5} | {'ASM':<15} | {'HEX'}\n" + "-"*35)
 
-    for addr, tokens in instrucciones_limpias:
         mnemonico = tokens[0].upper()
-        opcode = ASM_TO_HEX[mnemonico]
-        
+        opcode = ASM_TO_HEX.get(mnemonico)
+        if opcode is None:
+            errors.append((n_linea, f"Instrucción desconocida '{mnemonico}'"))
+            continue
+
+        addr = len(bytecode)
         if mnemonico in SINGLE_BYTE_INSTR:
-            if verbose: print(f"${addr:02X} | {mnemonico:<15} | {opcode:02X}")
             bytecode.append(opcode)
+            listing.append((addr, mnemonico, "", addr))
+        elif len(tokens) < 2:
+            errors.append((n_linea, f"'{mnemonico}' requiere argumento"))
         else:
-            if len(tokens) < 2: return None, f"ERROR: '{mnemonico}' requiere argumento"
             arg = tokens[1].upper()
-            valor = labels[arg] if arg in labels else parse_value(arg)
-            
-            if valor is not None and 0 <= valor <= 255:
-                if verbose: print(f"${addr:02X} | {mnemonico} {arg:<11} | {opcode:02X} {valor:02X}")
-                bytecode.extend([opcode, valor])
+            bytecode.extend((opcode, 0))
+            listing.append((addr, mnemonico, arg, addr))
+            valor = labels.get(arg)
+            if valor is None:
+                fixups.append((addr + 1, arg, n_linea))
             else:
-                return None, f"ERROR: Argumento o etiqueta inválida '{arg}'"
-                
-    return bytecode, None
+                bytecode[addr + 1] = valor
+
+    for pos, arg, n_linea in fixups:
+        valor = labels[arg] if arg in labels else parse_value(arg)
+        if valor is not None and 0 <= valor <= 255:
+            bytecode[pos] = valor
+        else:
+            errors.append((n_linea, f"Argumento o etiqueta inválida '{arg}'"))
+
+    errors.sort()
+    return bytecode, [f"ERROR (línea {n}): {msg}" for n, msg in errors], listing, labels
+
+
+def _print_listing(bytecode, listing):
+    filas = [f"\n{'DIR':<5} | {'ASM':<15} | {'HEX'}\n" + "-"*35]
+    for addr, mnemonico, arg, pos in listing:
+        opcode = bytecode[pos]
+        if arg:
+            filas.append(f"${addr:02X} | {mnemonico} {arg:<11} | {opcode:02X} {bytecode[pos + 1]:02X}")
+        else:
+            filas.append(f"${addr:02X} | {mnemonico:<15} | {opcode:02X}")
+    print("\n".join(filas))
+
+
+def _compile(lineas, optimize, hasher=None):
+    """Ensambla (y optimiza) y devuelve la entrada de caché (bytecode, error, listado, informe)."""
+    bytecode, errors, listing, labels = _assemble(lineas, hasher)
+    if errors:
+        return None, "\n".join(errors), listing, None
+    report = None
+    if optimize:
+        from optimizer import optimize_listing
+        bytecode, listing, report = optimize_listing(bytecode, listing, labels)
+    return bytecode, None, listing, report
+
+
+def compile_asm(source_code, verbose=True, cache=True, cache_dir=None, optimize=False):
+    """
+    Motor de compilación: Recibe un string, una lista de líneas o cualquier iterable de
+    líneas (p.ej. un fichero abierto, que se procesa en streaming) y devuelve
+    (bytecode, None) o (None, errores), con todos los errores y su número de línea.
+    Si verbose=True, imprime la tabla de traducción en consola.
+    Con cache=True un fuente ya compilado se devuelve sin ensamblar de nuevo; cache_dir
+    añade una caché persistente en disco.
+    Con optimize=True se aplica el optimizador de mirilla (ver optimizer.py) antes de
+    emitir el bytecode; con verbose se imprime su informe de bytes y ciclos ahorrados.
+    """
+    key = None
+    if isinstance(source_code, str):
+        lineas = source_code.split('\n')
+        if cache:
+            hasher = _new_hasher(optimize)
+            hasher.update(source_code.encode() + b'\n')
+            key = hasher.hexdigest()
+    elif isinstance(source_code, (list, tuple)):
+        lineas = source_code
+        if cache:
+            hasher = _new_hasher(optimize)
+            for linea in lineas:
+                hasher.update(linea.rstrip('\n').encode() + b'\n')
+            key = hasher.hexdigest()
+    else:
+        # Iterador: no se puede consultar la caché antes de leerlo, pero sí guardar el resultado
+        lineas = source_code
+
+    entry = _cache_get(key, cache_dir) if key else None
+    if entry is None:
+        stream_hasher = _new_hasher(optimize) if cache and key is None else None
+        entry = _compile(lineas, optimize, stream_hasher)
+        if cache:
+            _cache_put(key or stream_hasher.hexdigest(), entry, cache_dir)
+
+    bytecode, error, listing, report = entry
+    if error:
+        return None, error
+    if verbose:
+        _print_listing(bytecode, listing)
+        if report is not None:
+            from optimizer import format_report
+            print(format_report(report))
+    return list(bytecode), None
+
+
+def compile_file(path, verbose=False, cache=True, cache_dir=None, optimize=False):
+    """
+    Compila un fichero fuente. Primero calcula su hash leyendo en streaming; si está en
+    caché no se ensambla, y si no, se ensambla leyendo el fichero línea a línea.
+    """
+    if cache:
+        hasher = _new_hasher(optimize)
+        with open(path, "r", encoding="utf-8") as f:
+            for linea in f:
+                hasher.update(linea.rstrip('\n').encode() + b'\n')
+        key = hasher.hexdigest()
+        entry = _cache_get(key, cache_dir)
+        if entry is not None:
+            bytecode, error, listing, _ = entry
+            if error:
+                return None, error
+            if verbose: _print_listing(bytecode, listing)
+            return list(bytecode), None
+    with open(path, "r", encoding="utf-8") as f:
+        return compile_asm(f, verbose=verbose, cache=cache, cache_dir=cache_dir, optimize=optimize)
 
 def assembler():
     """Interfaz de usuario para el ensamblador interactivo."""
@@ -102,4 +285,4 @@ def assembler():
     if error:
         print(error)
         return None
-    return bytecode
\ No newline at end of file
+    return bytecode
\ No newline at end of file
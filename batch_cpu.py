@@ -0,0 +1,189 @@
+import numpy as np
+
+from cpu import INSTRUCTIONS, INSTR_CYCLES
+from microops import fetch_operand
+
+# Estado de cada instancia
+RUNNING = 0
+HALTED = 1        # Ejecutó HALT
+PC_OVERFLOW = 2   # PC llegó a $100 (fin de memoria)
+TIMEOUT = 3       # Agotó max_cycles
+FAULT = 4         # Operando fuera de memoria (en CPU sería IndexError)
+STATUS_NAMES = ["running", "halted", "pc_overflow", "timeout", "fault"]
+
+# Tablas derivadas de la tabla de instrucciones de CPU
+_COST = np.ones(256, dtype=np.int64)
+_TWO_BYTE = np.zeros(256, dtype=bool)
+for _op, _uops in INSTRUCTIONS.items():
+    _COST[_op] = INSTR_CYCLES[_op]
+    _TWO_BYTE[_op] = _uops[0] is fetch_operand
+
+
+class BatchCPU:
+    """
+    N máquinas LOGICA-8 ejecutadas en paralelo (lockstep) con NumPy.
+    Registros, flags y memorias son arrays de N elementos (N x 256 para la RAM); en cada
+    paso todas las instancias activas ejecutan una instrucción completa y la divergencia
+    de PC se resuelve con máscaras por opcode. Los ciclos se cuentan igual que CPU.run().
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self.memory = np.zeros((n, 256), dtype=np.uint8)
+        self.A = np.zeros(n, dtype=np.int64)
+        self.X = np.zeros(n, dtype=np.int64)
+        self.PC = np.zeros(n, dtype=np.int64)
+        self.carry = np.zeros(n, dtype=bool)
+        self.zero = np.zeros(n, dtype=bool)
+        self.status = np.full(n, RUNNING, dtype=np.int8)
+        self.cycles = np.zeros(n, dtype=np.int64)
+        self.instr_count = np.zeros(n, dtype=np.int64)
+
+    def load_program(self, program, offset=0):
+        """Carga el mismo programa en todas las instancias y reinicia registros."""
+        program = np.asarray([b & 0xFF for b in program], dtype=np.uint8)
+        if offset + len(program) > 256:
+            raise ValueError(f"Programa demasiado largo para memoria: acaba en {offset + len(program)} (máximo 256)")
+        self.memory[:, offset:offset + len(program)] = program
+        self.reset(offset)
+
+    def load_images(self, images, pc=0):
+        """Carga una imagen de 256 bytes distinta por instancia (array N x 256)."""
+        images = np.asarray(images, dtype=np.uint8)
+        if images.shape != self.memory.shape:
+            raise ValueError(f"Se esperaban imágenes {self.memory.shape}, recibido {images.shape}")
+        self.memory[:] = images
+        self.reset(pc)
+
+    def reset(self, pc=0):
+        self.A[:] = 0
+        self.X[:] = 0
+        self.PC[:] = pc
+        self.carry[:] = False
+        self.zero[:] = False
+        self.status[:] = RUNNING
+        self.cycles[:] = 0
+        self.instr_count[:] = 0
+
+    def step(self, max_cycles=None):
+        """Ejecuta una instrucción en cada instancia activa. Devuelve cuántas la ejecutaron."""
+        idx = np.flatnonzero(self.status == RUNNING)
+        if idx.size == 0:
+            return 0
+
+        # Fin de memoria: se detiene con el coste de un FETCH
+        pc = self.PC[idx]
+        over = pc >= 256
+        if over.any():
+            stop = idx[over]
+            if max_cycles is not None:
+                late = self.cycles[stop] + 1 > max_cycles
+                self.status[stop[late]] = TIMEOUT
+                stop = stop[~late]
+            self.status[stop] = PC_OVERFLOW
+            self.cycles[stop] += 1
+            idx, pc = idx[~over], pc[~over]
+
+        op = self.memory[idx, pc].astype(np.int64)
+        cost = _COST[op]
+        if max_cycles is not None:
+            late = self.cycles[idx] + cost > max_cycles
+            if late.any():
+                self.status[idx[late]] = TIMEOUT
+                keep = ~late
+                idx, pc, op, cost = idx[keep], pc[keep], op[keep], cost[keep]
+
+        two = _TWO_BYTE[op]
+        fault = two & (pc == 255)
+        if fault.any():
+            self.status[idx[fault]] = FAULT
+            keep = ~fault
+            idx, pc, op, cost, two = idx[keep], pc[keep], op[keep], cost[keep], two[keep]
+        if idx.size == 0:
+            return 0
+
+        operand = self.memory[idx, np.minimum(pc + 1, 255)].astype(np.int64)
+        self.PC[idx] = pc + np.where(two, 2, 1)
+        self.cycles[idx] += cost
+        self.instr_count[idx] += 1
+
+        A, X = self.A, self.X
+        for code in np.unique(op):
+            m = op == code
+            i = idx[m]
+            n = operand[m]
+            if code == 0x01:      # LDA
+                A[i] = n
+                self.zero[i] = n == 0
+            elif code == 0x02:    # ADD
+                res = A[i] + n
+                self.carry[i] = res > 255
+                A[i] = res & 0xFF
+                self.zero[i] = A[i] == 0
+            elif code == 0x03:    # STA
+                self.memory[i, n] = A[i]
+            elif code == 0x04:    # JMP
+                self.PC[i] = n
+            elif code == 0x05:    # SUB
+                res = A[i] - n
+                self.carry[i] = res < 0
+                A[i] = res & 0xFF
+                self.zero[i] = A[i] == 0
+            elif code == 0x06:    # BEQ
+                self.PC[i] = np.where(self.zero[i], n, self.PC[i])
+            elif code == 0x07:    # AND
+                A[i] &= n
+                self.zero[i] = A[i] == 0
+            elif code == 0x08:    # OR
+                A[i] |= n
+                self.zero[i] = A[i] == 0
+            elif code == 0x09:    # XOR
+                A[i] ^= n
+                self.zero[i] = A[i] == 0
+            elif code == 0x0A:    # NOT
+                A[i] = (~A[i]) & 0xFF
+                self.zero[i] = A[i] == 0
+            elif code == 0x0B:    # LDX
+                X[i] = n
+                self.zero[i] = n == 0
+            elif code == 0x0C:    # INX
+                X[i] = (X[i] + 1) & 0xFF
+                self.zero[i] = X[i] == 0
+            elif code == 0x0D:    # DEX
+                X[i] = (X[i] - 1) & 0xFF
+                self.zero[i] = X[i] == 0
+            elif code == 0xFF:    # HALT
+                self.status[i] = HALTED
+            # Cualquier otro opcode: SKIP (solo avanza PC)
+        return idx.size
+
+    def run(self, max_cycles=None, max_steps=None):
+        """
+        Ejecuta en lockstep hasta que ninguna instancia esté activa. Sin max_cycles, un
+        programa que no termina mantiene la ejecución indefinidamente (usar max_steps).
+        Devuelve results().
+        """
+        steps = 0
+        while self.step(max_cycles):
+            steps += 1
+            if max_steps is not None and steps >= max_steps:
+                break
+        return self.results()
+
+    def results(self):
+        """Estado final por instancia como arrays NumPy."""
+        return {
+            "A": self.A.astype(np.uint8), "X": self.X.astype(np.uint8), "PC": self.PC.copy(),
+            "carry": self.carry.copy(), "zero": self.zero.copy(),
+            "cycles": self.cycles.copy(), "instructions": self.instr_count.copy(),
+            "status": self.status.copy(),
+        }
+
+    def state(self, i):
+        """Estado de la instancia i como diccionario de valores Python."""
+        return {
+            "A": int(self.A[i]), "X": int(self.X[i]), "PC": int(self.PC[i]),
+            "carry": bool(self.carry[i]), "zero": bool(self.zero[i]),
+            "cycles": int(self.cycles[i]), "instructions": int(self.instr_count[i]),
+            "status": STATUS_NAMES[self.status[i]], "memory": self.memory[i].tobytes(),
+        }
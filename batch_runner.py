@@ -0,0 +1,141 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+
+from assembler import compile_asm, parse_hex
+from bus import MemoryFault
+from cpu import CPU, halt_reason
+from tracer import TRACE_OFF
+
+# Ejecución por lotes de un corpus de programas (.hex y .asm) repartido entre procesos.
+
+PROGRAM_EXTENSIONS = (".hex", ".asm")
+DEFAULT_MAX_CYCLES = 100000
+
+RESULT_FIELDS = ["program", "halt_reason", "A", "X", "PC", "carry", "zero",
+                 "cycles", "instructions", "memory_sha256", "error", "cycle_bound"]
+
+
+def load_program_file(path):
+    """Lee un programa .hex o .asm y devuelve su bytecode."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if path.lower().endswith(".asm"):
+        bytecode, error = compile_asm(text, verbose=False)
+        if error:
+            raise ValueError(error)
+        return bytecode
+    return parse_hex(text)
+
+
+def find_programs(directory):
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.lower().endswith(PROGRAM_EXTENSIONS))
+
+
+def run_program(path, max_cycles=DEFAULT_MAX_CYCLES, offset=0, jit=False, detect_loops=False,
+                static_budget=False, reject_unbounded=False):
+    """
+    Ejecuta un programa sin interfaz y devuelve su fila de resultados.
+    Con static_budget, el presupuesto de ciclos es la cota estática del programa
+    (analysis.py) si la tiene y es menor que max_cycles; con reject_unbounded, los
+    programas sin cota no se ejecutan (razón "rejected").
+    """
+    row = dict.fromkeys(RESULT_FIELDS)
+    row["program"] = path
+    try:
+        bytecode = load_program_file(path)
+        if static_budget or reject_unbounded:
+            from analysis import static_budget as cycle_bound
+            bound = row["cycle_bound"] = cycle_bound(bytecode, offset)
+            if bound is None and reject_unbounded:
+                row["halt_reason"] = "rejected"
+                return row
+            if bound is not None and static_budget:
+                max_cycles = bound if max_cycles is None else min(max_cycles, bound)
+        cpu = CPU(trace_level=TRACE_OFF, jit=jit, detect_loops=detect_loops)
+        cpu.load_program(bytecode, offset)
+        try:
+            cpu.run(max_cycles)
+            row["halt_reason"] = halt_reason(cpu)
+        except (IndexError, MemoryFault) as e:
+            row["halt_reason"] = "fault"
+            row["error"] = str(e)
+        row.update(A=cpu.A, X=cpu.X, PC=cpu.PC, carry=cpu.carry, zero=cpu.zero,
+                   cycles=cpu.cycles, instructions=cpu.instr_count,
+                   memory_sha256=hashlib.sha256(cpu.memory.dump_image()).hexdigest())
+    except (OSError, ValueError) as e:
+        row["halt_reason"] = "error"
+        row["error"] = str(e)
+    return row
+
+
+def _run_task(task):
+    return run_program(*task)
+
+
+def run_corpus(paths, max_cycles=DEFAULT_MAX_CYCLES, offset=0, jit=False, workers=None, chunksize=None,
+               detect_loops=False, static_budget=False, reject_unbounded=False):
+    """
+    Reparte los programas entre un ProcessPoolExecutor y genera las filas en orden.
+    Cada tarea enviada a un proceso agrupa 'chunksize' programas para que el coste de
+    comunicación sea pequeño frente al de ejecución.
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = [(path, max_cycles, offset, jit, detect_loops, static_budget, reject_unbounded) for path in paths]
+    if workers == 1:
+        yield from map(_run_task, tasks)
+        return
+    if chunksize is None:
+        chunksize = max(1, len(tasks) // (workers * 4))
+    from concurrent.futures import ProcessPoolExecutor   # Solo con varios procesos
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_run_task, tasks, chunksize=chunksize)
+
+
+def write_results(rows, output):
+    """Escribe las filas en JSONL o CSV (según la extensión) a medida que llegan."""
+    count = 0
+    with open(output, "w", encoding="utf-8", newline="") as f:
+        if output.lower().endswith(".csv"):
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        else:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+                count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LOGICA-8: ejecución por lotes de un corpus de programas")
+    parser.add_argument("corpus", help="Directorio con ficheros .hex / .asm")
+    parser.add_argument("-o", "--output", default="results.jsonl", help="Fichero .jsonl o .csv")
+    parser.add_argument("--max-cycles", type=int, default=DEFAULT_MAX_CYCLES)
+    parser.add_argument("--offset", type=lambda s: int(s, 0), default=0, help="Dirección de carga")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=None)
+    parser.add_argument("--jit", action="store_true", help="Usar el traductor de bloques")
+    parser.add_argument("--detect-loops", action="store_true",
+                        help="Detener los programas en bucle infinito (razón 'loop')")
+    parser.add_argument("--static-budget", action="store_true",
+                        help="Presupuesto por programa según su cota estática de ciclos")
+    parser.add_argument("--reject-unbounded", action="store_true",
+                        help="No ejecutar los programas sin cota estática (razón 'rejected')")
+    args = parser.parse_args(argv)
+
+    paths = find_programs(args.corpus)
+    rows = run_corpus(paths, args.max_cycles, args.offset, args.jit, args.workers, args.chunksize,
+                      args.detect_loops, args.static_budget, args.reject_unbounded)
+    count = write_results(rows, args.output)
+    print(f"[SISTEMA] {count} programas ejecutados -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
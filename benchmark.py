@@ -0,0 +1,220 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+from assembler import compile_asm
+from cpu import CPU, INSTR_CYCLES
+from renderer import TerminalRenderer
+from sample_programs import PROGRAMS
+from tracer import TRACE_OFF, TRACE_UOP
+
+# Benchmarks del núcleo: velocidad de ejecución (run/JIT/step), del ensamblador y del
+# renderizado. Cada medida se repite varias veces tras un calentamiento y se guarda la
+# mediana de las repeticiones (estable frente a picos del sistema en ambos sentidos);
+# --baseline compara con un JSON anterior y marca las regresiones.
+
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.10    # Empeoramiento relativo a partir del cual hay regresión
+MIN_SAMPLE_TIME = 0.05      # Cada repetición dura al menos esto (se ajusta 'number')
+PROGRAM_CYCLES = 100000     # Presupuesto para los programas que no terminan
+MIN_RUN_INSTR = 20000       # Instrucciones por llamada medida (los ejemplos cortos se repiten)
+
+
+def measure(func, repeat=DEFAULT_REPEAT, min_time=MIN_SAMPLE_TIME):
+    """
+    Mide func() (que devuelve cuántas operaciones hizo) y devuelve (mediana de la tasa
+    de operaciones por segundo, dispersión relativa entre repeticiones: desviación
+    absoluta mediana / mediana). Se calibra el número de llamadas por repetición para
+    que cada una dure al menos min_time.
+    """
+    func()   # Calentamiento
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number): func()
+        if time.perf_counter() - start >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+    rates = []
+    for _ in range(repeat):
+        ops = 0
+        start = time.perf_counter()
+        for _ in range(number): ops += func()
+        rates.append(ops / (time.perf_counter() - start))
+    median = statistics.median(rates)
+    if not median:
+        return median, 0.0
+    return median, statistics.median(abs(rate - median) for rate in rates) / median
+
+
+def _result(value, unit, spread, higher_is_better=True):
+    return {"value": value, "unit": unit, "spread": round(spread, 4), "higher_is_better": higher_is_better}
+
+
+# --- MEDIDAS ---
+
+def bench_program(key, jit=False, repeat=DEFAULT_REPEAT):
+    """
+    Instrucciones por segundo de run() sobre un programa de ejemplo. Los ejemplos que
+    terminan en pocas instrucciones se ejecutan seguidos hasta sumar MIN_RUN_INSTR, para
+    medir la ejecución y no la llamada. Entre ejecuciones solo se restauran los
+    registros: recargar la memoria invalidaría los bloques del JIT.
+    """
+    _, bytecode, offset = PROGRAMS[key]
+    cpu = CPU(trace_level=TRACE_OFF, jit=jit)
+    cpu.load_program(bytecode, offset)
+    inicial = cpu.registers()
+
+    def run():
+        instr = 0
+        while instr < MIN_RUN_INSTR:
+            cpu.set_registers(inicial)
+            instr += cpu.run(PROGRAM_CYCLES)[0]
+        return instr
+
+    rate, spread = measure(run, repeat)
+    return _result(rate, "instr/s", spread)
+
+
+def bench_step(trace_level=TRACE_OFF, repeat=DEFAULT_REPEAT, steps=200):
+    """Llamadas a CPU.step() por segundo (la salida de depuración se descarta)."""
+    _, bytecode, offset = PROGRAMS["5"]
+    cpu = CPU(trace_level=trace_level)
+
+    def run():
+        cpu.load_program(bytecode, offset)
+        for _ in range(steps): cpu.step()
+        return steps
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        rate, spread = measure(run, repeat)
+    return _result(rate, "step/s", spread)
+
+
+def synthetic_source(n_lines):
+    """Fuente grande con etiquetas, referencias hacia delante e instrucciones de 1 y 2 bytes."""
+    lines = []
+    for i in range(n_lines):
+        if i % 16 == 0 and i < 512:
+            lines.append(f"L{i // 16}: LDA {i % 256}")
+        elif i % 7 == 0:
+            lines.append(f"    JMP L{(i // 16 + 1) % 32}")
+        elif i % 5 == 0:
+            lines.append("    DEX")
+        else:
+            lines.append(f"    ADD 0x{i % 256:02X}")
+    return "\n".join(lines)
+
+
+def bench_assembler(n_lines=20000, repeat=DEFAULT_REPEAT):
+    """Líneas por segundo de compile_asm (sin caché)."""
+    source = synthetic_source(n_lines)
+
+    def run():
+        compile_asm(source, verbose=False, cache=False)
+        return n_lines
+
+    rate, spread = measure(run, repeat)
+    return _result(rate, "lines/s", spread)
+
+
+def bench_render(full, repeat=DEFAULT_REPEAT):
+    """Tiempo por fotograma: completo (full=True) o solo diferencias tras un paso."""
+    _, bytecode, offset = PROGRAMS["7"]
+    cpu = CPU(trace_level=TRACE_UOP)
+    cpu.load_program(bytecode, offset)
+    out = io.StringIO()
+    renderer = cpu.renderer = TerminalRenderer(out=out, fps=0)
+
+    def run():
+        if full: renderer.invalidate()
+        elif cpu.running: cpu.run_interpreted(INSTR_CYCLES.get(cpu.memory.data[cpu.PC], 1))
+        else: cpu.load_program(bytecode, offset)
+        renderer.draw(cpu)
+        out.seek(0)
+        out.truncate()
+        return 1
+
+    rate, spread = measure(run, repeat)
+    return _result(1.0 / rate, "s/frame", spread, higher_is_better=False)
+
+
+def run_benchmarks(repeat=DEFAULT_REPEAT, quick=False):
+    results = {}
+    keys = ["7"] if quick else list(PROGRAMS)
+    for key in keys:
+        results[f"run.program{key}"] = bench_program(key, repeat=repeat)
+        results[f"jit.program{key}"] = bench_program(key, jit=True, repeat=repeat)
+    results["step.trace_off"] = bench_step(TRACE_OFF, repeat)
+    results["step.trace_uop"] = bench_step(TRACE_UOP, repeat)
+    results["asm.compile"] = bench_assembler(2000 if quick else 20000, repeat)
+    results["render.full"] = bench_render(True, repeat)
+    results["render.diff"] = bench_render(False, repeat)
+    return {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(),
+                 "date": time.strftime("%Y-%m-%d %H:%M:%S"), "repeat": repeat},
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compara cada medida con la del baseline. Devuelve filas (nombre, antes, ahora,
+    cambio relativo, es_regresión); el cambio es positivo cuando mejora. Un
+    empeoramiento solo es regresión si supera el umbral y también la dispersión medida
+    en ambas ejecuciones (ruido del sistema).
+    """
+    rows = []
+    for name, now in report["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if before is None or not before["value"]:
+            continue
+        change = now["value"] / before["value"] - 1
+        if not now.get("higher_is_better", True):
+            change = before["value"] / now["value"] - 1 if now["value"] else 0.0
+        tolerance = max(threshold, before.get("spread", 0) + now.get("spread", 0))
+        rows.append((name, before["value"], now["value"], change, change < -tolerance))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LOGICA-8: benchmarks del emulador")
+    parser.add_argument("-o", "--output", default=None, help="Guardar los resultados en JSON")
+    parser.add_argument("--baseline", default=None, help="JSON anterior con el que comparar")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Empeoramiento relativo que cuenta como regresión (0.10 = 10%%)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--quick", action="store_true", help="Menos programas y un fuente más pequeño")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.repeat, args.quick)
+    for name, r in report["results"].items():
+        print(f"{name:<20} {r['value']:>14.6g} {r['unit']:<8} ±{r['spread']*100:.1f}%")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[SISTEMA] Resultados guardados en {args.output}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(report, baseline, args.threshold)
+        regresiones = [row for row in rows if row[4]]
+        print("\nCOMPARACIÓN CON BASELINE")
+        for name, before, now, change, regression in rows:
+            marca = "REGRESIÓN" if regression else ""
+            print(f"{name:<20} {before:>12.6g} -> {now:<12.6g} {change*100:+7.1f}%  {marca}")
+        if regresiones:
+            print(f"\n{len(regresiones)} regresiones (umbral {args.threshold*100:.0f}%)")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
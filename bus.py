@@ -1,13 +1,244 @@
+from collections import deque
+
+# Permisos por página (filas de 16 bytes). Solo afectan a los accesos de la CPU
+# (read_trusted / write_trusted); las herramientas externas usan read/write y load_image.
+PAGE_SHIFT = 4
+PAGE_SIZE = 1 << PAGE_SHIFT
+PERM_ROM = 0x01       # Solo lectura: escribir produce un fallo
+PERM_NOEXEC = 0x02    # No ejecutable: leer un opcode u operando produce un fallo
+PERM_WATCH = 0x04     # Los accesos se anotan en watch_hits
+WATCH_LOG = 1024
+
+
+class MemoryFault(Exception):
+    """
+    Violación de permisos de página. kind es "write_rom" o "exec_nx"; addr la dirección
+    accedida y pc la de la instrucción que la provocó (la rellena la CPU).
+    """
+
+    def __init__(self, kind, addr, pc=None):
+        super().__init__(kind, addr)
+        self.kind = kind
+        self.addr = addr
+        self.pc = pc
+
+    def __str__(self):
+        where = f" (PC=${self.pc:02X})" if self.pc is not None else ""
+        return f"Fallo de memoria {self.kind} en ${self.addr:02X}{where}"
+
 
 class Bus:
     def __init__(self):
         self.memory = None
+        # Funciones hook(addr, length) llamadas ANTES de cada escritura
+        self.write_hooks = []
+        # Funciones hook(addr, value) llamadas DESPUÉS de cada lectura de confianza que
+        # atiende un dispositivo (las de RAM no: son deterministas y van por el camino rápido)
+        self.read_hooks = []
+        # Dispositivos mapeados en memoria: tabla dirección -> dispositivo (None = RAM)
+        self.devices = []
+        self.device_map = None
+        # Permisos: flags por página y su expansión por dirección (None = sin permisos)
+        self.page_perms = None
+        self.perm_map = None
+        self.read_checked = False
+        self.write_checked = False
+        self.perm_version = 0
+        self.watch_hits = deque(maxlen=WATCH_LOG)
+        self.view = BusView(self)
 
     def attach_memory(self, memory):
         self.memory = memory
 
+    def add_write_hook(self, hook):
+        self.write_hooks.append(hook)
+
+    def remove_write_hook(self, hook):
+        self.write_hooks.remove(hook)
+
+    def add_read_hook(self, hook):
+        self.read_hooks.append(hook)
+
+    def remove_read_hook(self, hook):
+        self.read_hooks.remove(hook)
+
+    # --- DISPOSITIVOS ---
+
+    def map_device(self, device, start, length=None):
+        """Mapea un dispositivo en [start, start+length). length por defecto: device.size."""
+        length = device.size if length is None else length
+        if self.device_map is None:
+            self.device_map = [None] * self.memory.size
+        if start < 0 or start + length > len(self.device_map):
+            raise ValueError(f"Rango de dispositivo fuera de memoria: ${start:02X} (+{length})")
+        for addr in range(start, start + length):
+            if self.device_map[addr] is not None:
+                raise ValueError(f"Dirección ${addr:02X} ya asignada a otro dispositivo")
+        # El contenido visible de esas direcciones cambia (p.ej. invalida bloques del JIT)
+        for hook in self.write_hooks:
+            hook(start, length)
+        device.base = start
+        for addr in range(start, start + length):
+            self.device_map[addr] = device
+        self.devices.append(device)
+        self._select_paths()
+        return device
+
+    def unmap_device(self, device):
+        device.flush()
+        self.devices.remove(device)
+        for addr, dev in enumerate(self.device_map):
+            if dev is device:
+                self.device_map[addr] = None
+        if not self.devices:
+            self.device_map = None
+        self._select_paths()
+
+    def _select_paths(self):
+        """
+        Elige los accesos de confianza: directos a la RAM, por la tabla de despacho de
+        dispositivos y/o con comprobación de permisos. Sin dispositivos ni permisos se
+        usa el camino directo (los métodos de la clase).
+        """
+        self.__dict__.pop("read_trusted", None)
+        self.__dict__.pop("write_trusted", None)
+        if self.devices:
+            self.read_trusted = self._read_dispatch
+            self.write_trusted = self._write_dispatch
+        if self.read_checked:
+            self.read_trusted = self._read_protected
+        if self.write_checked:
+            self.write_trusted = self._write_protected
+
+    # --- PERMISOS DE PÁGINA ---
+
+    def set_page_perms(self, page, flags, count=1):
+        """Asigna flags (PERM_*) a 'count' páginas desde 'page'. flags=0 las libera."""
+        pages = self.memory.size >> PAGE_SHIFT
+        if page < 0 or page + count > pages:
+            raise ValueError(f"Página fuera de memoria: {page} (+{count})")
+        if self.page_perms is None:
+            self.page_perms = bytearray(pages)
+        self.page_perms[page:page + count] = bytes([flags]) * count
+        self._build_perm_map()
+
+    def clear_page_perms(self):
+        self.page_perms = None
+        self._build_perm_map()
+
+    def page_flags(self, addr):
+        return self.perm_map[addr] if self.perm_map is not None else 0
+
+    def _build_perm_map(self):
+        # Tabla precalculada: una sola consulta por acceso, sin desplazar la dirección
+        perms = self.page_perms
+        if perms is None or not any(perms):
+            self.page_perms = self.perm_map = None
+        else:
+            self.perm_map = bytes(flags for flags in perms for _ in range(PAGE_SIZE))
+        self.read_checked = self.perm_map is not None and any(f & (PERM_NOEXEC | PERM_WATCH) for f in perms)
+        self.write_checked = self.perm_map is not None and any(f & (PERM_ROM | PERM_WATCH) for f in perms)
+        self.perm_version += 1
+        self._select_paths()
+
+    def _read_protected(self, addr):
+        flags = self.perm_map[addr]
+        if flags:
+            if flags & PERM_NOEXEC:
+                raise MemoryFault("exec_nx", addr)
+            if flags & PERM_WATCH:
+                self.watch_hits.append(("read", addr))
+        return self._read_dispatch(addr) if self.devices else self.memory.data[addr]
+
+    def _write_protected(self, addr, value):
+        flags = self.perm_map[addr]
+        if flags:
+            if flags & PERM_ROM:
+                raise MemoryFault("write_rom", addr)
+            if flags & PERM_WATCH:
+                self.watch_hits.append(("write", addr))
+        if self.devices:
+            self._write_dispatch(addr, value)
+        else:
+            if self.write_hooks:
+                for hook in self.write_hooks:
+                    hook(addr, 1)
+            self.memory.data[addr] = value
+
+    def flush(self):
+        """Entrega a sus destinos los datos que los dispositivos tengan acumulados."""
+        for device in self.devices:
+            device.flush()
+
+    # --- ACCESO VALIDADO ---
+
     def read(self, addr):
+        if self.device_map is not None and isinstance(addr, int) and 0 <= addr < len(self.device_map):
+            dev = self.device_map[addr]
+            if dev is not None:
+                return dev.read(addr - dev.base)
         return self.memory.read(addr)
 
     def write(self, addr, value):
-        self.memory.write(addr, int(value) & 0xFF)
\ No newline at end of file
+        if self.write_hooks:
+            for hook in self.write_hooks:
+                hook(addr, 1)
+        if self.device_map is not None and isinstance(addr, int) and 0 <= addr < len(self.device_map):
+            dev = self.device_map[addr]
+            if dev is not None:
+                dev.write(addr - dev.base, int(value) & 0xFF)
+                return
+        self.memory.write(addr, int(value) & 0xFF)
+
+    # --- ACCESO DE CONFIANZA (CPU): sin validaciones de tipo ---
+
+    def read_trusted(self, addr):
+        return self.memory.data[addr]
+
+    def write_trusted(self, addr, value):
+        if self.write_hooks:
+            for hook in self.write_hooks:
+                hook(addr, 1)
+        self.memory.data[addr] = value
+
+    def _read_dispatch(self, addr):
+        dev = self.device_map[addr]
+        if dev is None:
+            return self.memory.data[addr]
+        value = dev.read(addr - dev.base)
+        if self.read_hooks:
+            for hook in self.read_hooks:
+                hook(addr, value)
+        return value
+
+    def _write_dispatch(self, addr, value):
+        if self.write_hooks:
+            for hook in self.write_hooks:
+                hook(addr, 1)
+        dev = self.device_map[addr]
+        if dev is None:
+            self.memory.data[addr] = value
+        else:
+            dev.write(addr - dev.base, value)
+
+    def load_image(self, image, offset=0):
+        if self.write_hooks:
+            for hook in self.write_hooks:
+                hook(offset, len(image))
+        self.memory.load_image(image, offset)
+
+
+class BusView:
+    """
+    Vista indexable del Bus (view[addr], view[addr] = v) con el mismo interfaz que
+    memory.data, para que los motores rápidos funcionen igual con dispositivos mapeados.
+    """
+
+    def __init__(self, bus):
+        self.bus = bus
+
+    def __getitem__(self, addr):
+        return self.bus.read_trusted(addr)
+
+    def __setitem__(self, addr, value):
+        self.bus.write_trusted(addr, value)
@@ -0,0 +1,200 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from assembler import compile_asm, parse_hex
+from batch_runner import DEFAULT_MAX_CYCLES
+from cpu import CPU, INSTR_CYCLES, halt_reason
+from tracer import TRACE_OFF
+
+# Pruebas de conformidad sin interfaz: casos en ficheros de datos (.json o .jsonl) con
+# el programa y el estado esperado, ejecutados en paralelo.
+#
+# Formato de un caso:
+#   {"name": "...", "program": "01 05 FF" | [1, 5, 255], "asm": "LDA 5\nHALT",
+#    "offset": 0, "max_cycles": 1000,
+#    "expect": {"A": 5, "X": 0, "PC": 3, "carry": false, "zero": false,
+#               "halt_reason": "halted", "cycles": 5, "instructions": 2,
+#               "memory": {"50": 15}, "memory_sha256": "...",
+#               "trace_sha256": "...", "trace_len": 2}}
+# Solo se comparan los campos presentes en "expect". Las claves de "memory" son
+# direcciones en hexadecimal.
+
+CASE_EXTENSIONS = (".json", ".jsonl")
+STATE_FIELDS = ("A", "X", "PC", "carry", "zero", "halt_reason", "cycles", "instructions")
+
+
+def load_cases(paths):
+    """Lee los casos de ficheros o directorios. A cada caso sin nombre se le da fichero:n."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                                if name.lower().endswith(CASE_EXTENSIONS)))
+        else:
+            files.append(path)
+    cases = []
+    for path in files:
+        with open(path, "r", encoding="utf-8") as f:
+            if path.lower().endswith(".jsonl"):
+                items = [json.loads(linea) for linea in f if linea.strip()]
+            else:
+                items = json.load(f)
+                if isinstance(items, dict):
+                    items = [items]
+        for n, case in enumerate(items, 1):
+            case.setdefault("name", f"{os.path.basename(path)}:{n}")
+            cases.append(case)
+    return cases
+
+
+def case_program(case):
+    """Bytecode del caso: 'program' (texto hex o lista de bytes) o 'asm' (fuente)."""
+    if "asm" in case:
+        bytecode, error = compile_asm(case["asm"], verbose=False)
+        if error:
+            raise ValueError(error)
+        return bytecode
+    program = case["program"]
+    return parse_hex(program) if isinstance(program, str) else list(program)
+
+
+def run_traced(cpu, max_cycles):
+    """
+    Ejecuta instrucción a instrucción acumulando la traza dorada: por instrucción, 5
+    bytes (PC, opcode, A, X, flags) tras ejecutarla. Devuelve (sha256, instrucciones).
+    """
+    hasher = hashlib.sha256()
+    data = cpu.memory.data
+    count = cycles = 0
+    while cpu.running:
+        pc = cpu.PC
+        op = data[pc] if pc < 256 else None
+        cost = INSTR_CYCLES.get(op, 1)
+        if max_cycles is not None and cycles + cost > max_cycles:
+            break
+        i, c = cpu.run_interpreted(cost)
+        cycles += c
+        if i:
+            count += 1
+            hasher.update(bytes((pc, op, cpu.A, cpu.X, cpu.carry | cpu.zero << 1)))
+    return hasher.hexdigest(), count
+
+
+def run_case(case, jit=False, trace=None):
+    """
+    Ejecuta un caso en una CPU nueva y devuelve su resultado: nombre, passed, lista de
+    diferencias ("campo: esperado X, obtenido Y") y el estado obtenido ('actual').
+    Con trace=None la traza solo se calcula si el caso la espera.
+    """
+    expect = case.get("expect", {})
+    result = {"name": case["name"], "passed": False, "failures": [], "actual": None}
+    try:
+        bytecode = case_program(case)
+        cpu = CPU(trace_level=TRACE_OFF, jit=jit)
+        cpu.load_program(bytecode, case.get("offset", 0))
+        max_cycles = case.get("max_cycles", DEFAULT_MAX_CYCLES)
+        if trace is None:
+            trace = "trace_sha256" in expect or "trace_len" in expect
+        actual = {}
+        try:
+            if trace:
+                actual["trace_sha256"], actual["trace_len"] = run_traced(cpu, max_cycles)
+            else:
+                cpu.run(max_cycles)
+            actual["halt_reason"] = halt_reason(cpu)
+        except IndexError:
+            actual["halt_reason"] = "fault"
+    except (KeyError, ValueError) as e:
+        result["failures"].append(f"caso inválido: {e}")
+        return result
+
+    image = cpu.memory.dump_image()
+    actual.update(A=cpu.A, X=cpu.X, PC=cpu.PC, carry=cpu.carry, zero=cpu.zero,
+                  cycles=cpu.cycles, instructions=cpu.instr_count,
+                  memory_sha256=hashlib.sha256(image).hexdigest())
+    result["actual"] = actual
+
+    failures = result["failures"]
+    for field, expected in expect.items():
+        if field == "memory":
+            for addr, value in expected.items():
+                got = image[int(addr, 16)]
+                if got != value:
+                    failures.append(f"memory[${int(addr, 16):02X}]: esperado {value}, obtenido {got}")
+        elif field not in actual:
+            failures.append(f"{field}: campo desconocido")
+        elif actual[field] != expected:
+            failures.append(f"{field}: esperado {expected}, obtenido {actual[field]}")
+    result["passed"] = not failures
+    return result
+
+
+def _run_task(task):
+    return run_case(*task)
+
+
+def run_cases(cases, jit=False, workers=None, chunksize=None, trace=None):
+    """Ejecuta los casos en un ProcessPoolExecutor y genera los resultados en orden."""
+    workers = workers or os.cpu_count() or 1
+    tasks = [(case, jit, trace) for case in cases]
+    if workers == 1 or len(tasks) < 2:
+        yield from map(_run_task, tasks)
+        return
+    if chunksize is None:
+        chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_run_task, tasks, chunksize=chunksize)
+
+
+def golden_case(case, result):
+    """Copia del caso con 'expect' rellenado a partir del estado obtenido (traza incluida)."""
+    actual = result["actual"]
+    expect = {field: actual[field] for field in STATE_FIELDS}
+    expect.update(memory_sha256=actual["memory_sha256"],
+                  trace_sha256=actual["trace_sha256"], trace_len=actual["trace_len"])
+    return dict(case, expect=expect)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LOGICA-8: pruebas de conformidad en paralelo")
+    parser.add_argument("cases", nargs="+", help="Ficheros .json/.jsonl o directorios de casos")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=None)
+    parser.add_argument("--jit", action="store_true", help="Ejecutar con el traductor de bloques")
+    parser.add_argument("--report", default=None, help="Guardar los resultados en JSONL")
+    parser.add_argument("--record", default=None,
+                        help="Generar un .jsonl con los casos y su estado/traza obtenidos como esperados")
+    args = parser.parse_args(argv)
+
+    cases = load_cases(args.cases)
+    trace = True if args.record else None
+    results = list(run_cases(cases, args.jit, args.workers, args.chunksize, trace))
+
+    if args.record:
+        with open(args.record, "w", encoding="utf-8") as f:
+            for case, result in zip(cases, results):
+                if result["actual"] is not None:
+                    f.write(json.dumps(golden_case(case, result)) + "\n")
+        print(f"[SISTEMA] Casos dorados guardados en {args.record}", file=sys.stderr)
+        return 0
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+
+    fallidos = [r for r in results if not r["passed"]]
+    for r in fallidos:
+        print(f"[FAIL] {r['name']}")
+        for failure in r["failures"]:
+            print(f"         {failure}")
+    print(f"RESULTADO: {len(results) - len(fallidos)}/{len(results)} casos superados.")
+    return 1 if fallidos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
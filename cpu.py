@@ -1,54 +1,95 @@
 
 from memory import Memory
-from bus import Bus
+from bus import Bus, MemoryFault
 from microops import *
-import os
-import time
+from tracer import Tracer, TRACE_OFF, TRACE_INSTR, TRACE_UOP, write_text_header
+
+# Tabla de instrucciones: OpCode -> secuencia estática de micro-ops.
+# Se define una sola vez y la comparten todas las instancias de CPU.
+INSTRUCTIONS = {
+    0x01: (fetch_operand, load_A),              # LDA
+    0x02: (fetch_operand, alu_add, flags_A),    # ADD
+    0x03: (fetch_operand, store_A),             # STA
+    0x04: (fetch_operand, jump),                # JMP
+    0x05: (fetch_operand, alu_sub, flags_A),    # SUB
+    0x06: (fetch_operand, branch_zero),         # BEQ
+    0x07: (fetch_operand, alu_and),             # AND
+    0x08: (fetch_operand, alu_or),              # OR
+    0x09: (fetch_operand, alu_xor, flags_A),    # XOR
+    0x0A: (alu_not,),                           # NOT
+    0x0B: (fetch_operand, load_X),              # LDX
+    0x0C: (inc_X,),                             # INX
+    0x0D: (dec_X,),                             # DEX
+    0xFF: (halt,)                               # HALT
+}
+
+# Ciclos (llamadas a step) que consume cada instrucción: 1 de FETCH + sus micro-ops.
+# Un opcode desconocido consume solo el ciclo de FETCH.
+INSTR_CYCLES = {op: 1 + len(uops) for op, uops in INSTRUCTIONS.items()}
 
 class CPU:
-    def __init__(self):
-        self.memory = Memory()
+    def __init__(self, trace_level=TRACE_UOP, jit=False, memory_file=None, detect_loops=False, profile=False,
+                 debug_sink=print, memory=None):
+        # memory: una Memory ya creada (p.ej. compartida entre varias CPU, ver multicore.py)
+        self.memory = memory if memory is not None else Memory(backing_file=memory_file)
         self.bus = Bus()
         self.bus.attach_memory(self.memory)
         
         # Log
-        self.full_history = []
+        self.tracer = Tracer(trace_level)
 
         # Registros
         self.A = 0x00
         self.X = 0x00
         self.PC = 0x00
         self.IR = 0x00
+        self.operand = 0x00
         self.carry = False
         self.zero = False
         self.running = True
-        self.log = []
-
-        # Micro-ops pendientes
-        self.micro_ops = []
-
-        # Tabla de instrucciones
-        self.instructions = {
-            0x01: self._lda,
-            0x02: self._add,
-            0x03: self._sta,
-            0x04: self._jmp,
-            0x05: self._sub,
-            0x06: self._beq,
-            0x07: self._and,
-            0x08: self._or,
-            0x09: self._xor,
-            0x0A: self._not,
-            0x0B: self._ldx,
-            0x0C: self._inx,
-            0x0D: self._dex,
-            0xFF: self._halt
-        }
+        self.stop_reason = None   # "loop" si run() se detuvo por un bucle infinito, "fault" si por un fallo de memoria
+        self.fault = None         # Último MemoryFault (permisos de página del Bus)
+        self.instr_pc = 0x00      # Dirección de la instrucción en curso
+
+        # Contadores de ejecución (comparables entre step() y run())
+        self.cycles = 0
+        self.instr_count = 0
+
+        # Micro-programa en curso y posición dentro de él
+        self.micro_program = ()
+        self.micro_pc = 0
+
+        # Motor de ejecución rápida: intérprete (None) o traductor de bloques
+        self.jit = None
+        if jit:
+            from jit import BlockJIT
+            self.jit = BlockJIT(self)
+
+        # Detección de bucles infinitos y avance rápido de bucles contados (solo en run)
+        self.loop_guard = None
+        if detect_loops:
+            from loops import LoopGuard
+            self.loop_guard = LoopGuard(self)
+
+        # Perfilador de ejecución (opcional; sin él no hay coste añadido)
+        self.profiler = None
+        if profile:
+            from profiler import Profiler
+            Profiler(self)
+
+        # Panel de terminal (se crea al primer render)
+        self.renderer = None
+
+        # Destino de la línea de depuración de step(): print, cualquier callable o None
+        self.debug_sink = debug_sink
+
+    # Tabla de instrucciones (compartida)
+    instructions = INSTRUCTIONS
 
     # --- MÉTODOS DE SOPORTE ---
 
     def fetch_byte(self):
-        byte = self.bus.read(self.PC)
+        byte = self.bus.read_trusted(self.PC)
         self.PC += 1
         return byte
 
@@ -59,182 +100,114 @@ class CPU:
         self.carry = False
         self.zero = False
         self.running = True
-        self.log = []
-        self.micro_ops = []
-
-        for i, byte in enumerate(program):
-            addr = offset + i
-            if addr >= 256:
-                raise ValueError(f"Programa demasiado largo para memoria: {addr}")
-            self.bus.write(addr, byte & 0xFF)
-
-    def add_log(self, msg):
-        self.log.append(msg)
-        if len(self.log) > 15:
-            self.log.pop(0)
-        timestamp = time.strftime("%H:%M:%S")
-        self.full_history.append(f"[{timestamp}] {msg}")
-        
+        self.stop_reason = None
+        self.fault = None
+        self.tracer.clear_screen()
+        self.micro_program = ()
+        self.micro_pc = 0
+        self.cycles = 0
+        self.instr_count = 0
+
+        if not isinstance(program, (bytes, bytearray)):
+            program = bytes(byte & 0xFF for byte in program)
+        if offset + len(program) > self.memory.size:
+            raise ValueError(f"Programa demasiado largo para memoria: acaba en {offset + len(program)} (máximo {self.memory.size})")
+        self.bus.load_image(program, offset)
+        if self.loop_guard is not None:
+            self.loop_guard.reset()
+        if self.profiler is not None:
+            self.profiler.reset()
+
+    @property
+    def log(self):
+        # Historial en pantalla (últimas 15 líneas), formateado bajo demanda
+        return self.tracer.screen_lines()
+
+    @property
+    def full_history(self):
+        return list(self.tracer.history_lines())
+
+    def add_log(self, msg, level=TRACE_INSTR):
+        if self.tracer.level >= level:
+            self.tracer.record(msg)
+
     def export_log(self, filename="execution.log"):
+        # Solo se conservan los últimos HISTORY_LIMIT registros (tracer.py); si se han
+        # descartado anteriores, el fichero lo indica tras la cabecera
         try:
             with open(filename, "w", encoding="utf-8") as f:
-                f.write(f"--- LOGICA-8 EXECUTION TRACE ---\n")
-                f.write(f"Project: LOGICA-8\n") #
-                f.write(f"Generated: {time.ctime()}\n")
-                f.write("-" * 40 + "\n\n")
-                for line in self.full_history:
+                write_text_header(f)
+                if self.tracer.dropped:
+                    f.write(f"[{self.tracer.dropped} registros anteriores descartados: el historial "
+                            f"guarda los últimos {self.tracer.history.maxlen}]\n")
+                for line in self.tracer.history_lines():
                     f.write(line + "\n")
             print(f"\n[SISTEMA] Historial exportado con éxito a {filename}")
         except Exception as e:
             print(f"\n[ERROR] No se pudo exportar el log: {e}")
 
-    # --- INSTRUCCIONES ---
-
-	# 0x01
-    def _lda(self):
-        self.micro_ops.append(lambda: fetch_operand(self))
-        self.micro_ops.append(lambda: load_A(self))
-
-	# 0x02
-    def _add(self):
-        def do_add():
-            old_a = self.A
-            self.A = (self.A + self.operand) % 256
-            self.carry = (old_a + self.operand) > 255
-            self.add_log(f"EXEC: ADD #{self.operand:02X} a A:{old_a:02X} -> RES:{self.A:02X}")
-        self.micro_ops.append(lambda: fetch_operand(self))
-        self.micro_ops.append(do_add)
-        self.micro_ops.append(lambda: update_flags(self, self.A))
-
-	# 0x03
-    def _sta(self):
-        def do_sta():
-            self.bus.write(self.operand, self.A)
-            self.add_log(f"STA: {self.A:02X} -> ${self.operand:02X}")
-        self.micro_ops.append(lambda: fetch_operand(self))
-        self.micro_ops.append(do_sta)
-
-	# 0x04
-    def _jmp(self):
-        def do_jmp():
-            old_pc = self.PC
-            self.PC = self.operand
-            self.add_log(f"EXEC: JUMP     -> Forzando PC: ${old_pc:02X} a ${self.PC:02X}")
-        
-        self.micro_ops.append(lambda: fetch_operand(self))
-        self.micro_ops.append(do_jmp)
-
-    # 0x05
-    def _sub(self):
-        def do_sub():
-            old_a = self.A
-            res = self.A - self.operand
-            self.A = res % 256
-            self.carry = res < 0
-            self.add_log(f"EXEC: SUB      -> A:{old_a:02X} - #{self.operand:02X} = {self.A:02X}")
-        self.micro_ops.append(lambda: fetch_operand(self))
-        self.micro_ops.append(do_sub)
-        self.micro_ops.append(lambda: update_flags(self, self.A))
-
-	# 0x06
-    def _beq(self):
-        def do_beq():
-            if self.zero:
-                old_pc = self.PC
-                self.PC = self.operand
-                self.add_log(f"EXEC: BRANCH   -> Z es ON. Salto: ${old_pc:02X} a ${self.PC:02X}")
-            else:
-                self.add_log(f"EXEC: BRANCH   -> Z es OFF. No hay salto.")
-        
-        self.micro_ops.append(lambda: fetch_operand(self))
-        self.micro_ops.append(do_beq)
-
-	# 0x07
-    def _and(self):
-        def do_and():
-            old_a = self.A
-            self.A &= self.operand
-            self.zero = (self.A == 0)
-            self.add_log(f"AND: {old_a:02X} & {self.operand:02X} = {self.A:02X}")
-        self.micro_ops.append(lambda: fetch_operand(self))
-        self.micro_ops.append(do_and)
-
-	# 0x08
-    def _or(self):
-        def do_or():
-            old_a = self.A
-            self.A |= self.operand
-            self.zero = (self.A == 0)
-            self.add_log(f"OR: {old_a:02X} | {self.operand:02X} = {self.A:02X}")
-        self.micro_ops.append(lambda: fetch_operand(self))
-        self.micro_ops.append(do_or)
-
-	# 0x09
-    def _xor(self):
-        def do_xor():
-            old_a = self.A
-            self.A ^= self.operand
-            self.add_log(f"EXEC: XOR      -> A:{old_a:02X} ^ #{self.operand:02X} = {self.A:02X}")
-        self.micro_ops.append(lambda: fetch_operand(self))
-        self.micro_ops.append(do_xor)
-        self.micro_ops.append(lambda: update_flags(self, self.A))
-
-    # 0x0A
-    def _not(self):
-        def do_not():
-            old_a = self.A
-            self.A = (~self.A) & 0xFF
-            self.zero = (self.A == 0)
-            self.add_log(f"NOT: ~{old_a:02X} = {self.A:02X}")
-        self.micro_ops.append(do_not)
-
-    # 0x0B
-    def _ldx(self):
-        def do_ldx():
-            self.X = self.operand
-            self.zero = (self.X == 0)
-            self.add_log(f"LDX: {self.X:02X}")
-        self.micro_ops.append(lambda: fetch_operand(self))
-        self.micro_ops.append(do_ldx)
-
-    # 0x0C
-    def _inx(self):
-        def do_inx():
-            old_x = self.X
-            self.X = (self.X + 1) % 256
-            self.zero = (self.X == 0)
-            self.add_log(f"INX: {old_x:02X} -> {self.X:02X}")
-        self.micro_ops.append(do_inx)
-
-    # 0x0D
-    def _dex(self):
-        def do_dex():
-            old_x = self.X
-            self.X = (self.X - 1) % 256
-            self.zero = (self.X == 0)
-            self.add_log(f"DEX: {old_x:02X} -> {self.X:02X}")
-        self.micro_ops.append(do_dex)
-
-    # 0xFF
-    def _halt(self):
-        def do_halt():
-            self.running = False
-            self.add_log("HALT ejecutado")
-        self.micro_ops.append(do_halt)
+    # --- INSTANTÁNEAS ---
+
+    # Estado de la CPU fuera de la memoria (incluye la posición dentro del micro-programa)
+    STATE_FIELDS = ("A", "X", "PC", "IR", "operand", "carry", "zero", "running",
+                    "micro_program", "micro_pc", "cycles", "instr_count")
+
+    def registers(self):
+        return tuple(getattr(self, name) for name in self.STATE_FIELDS)
 
+    def set_registers(self, values):
+        for name, value in zip(self.STATE_FIELDS, values):
+            setattr(self, name, value)
+
+    def snapshot(self):
+        """Copia completa e inmutable del estado: (registros, imagen de 256 bytes)."""
+        return self.registers(), self.memory.dump_image()
+
+    def restore(self, snap):
+        registers, image = snap
+        self.set_registers(registers)
+        self.bus.load_image(image, 0)
+        if self.loop_guard is not None:
+            self.loop_guard.reset()
 
     # --- CICLO DE EJECUCIÓN ---
-    
+
+    @property
+    def pending_micro_ops(self):
+        return len(self.micro_program) - self.micro_pc
+
+    def _micro_step(self):
+        micro = self.micro_program[self.micro_pc]
+        self.micro_pc += 1
+        if self.micro_pc == len(self.micro_program):
+            self.micro_program = ()
+            self.micro_pc = 0
+        micro(self)
+
+    def _fault(self, fault):
+        """Detiene la CPU en la instrucción que violó los permisos de página."""
+        fault.pc = self.PC = self.instr_pc
+        self.micro_program = ()
+        self.micro_pc = 0
+        self.running = False
+        self.stop_reason = "fault"
+        self.fault = fault
+
     def step(self):
-        print(f"STEP: PC={self.PC:02X}, running={self.running}, micro_ops={len(self.micro_ops)}")
+        if self.debug_sink is not None:
+            self.debug_sink(f"STEP: PC={self.PC:02X}, running={self.running}, micro_ops={self.pending_micro_ops}")
 
         if not self.running:
             return
 
         # 1 Si hay micro-ops pendientes, ejecutar una
-        if self.micro_ops:
-            micro = self.micro_ops.pop(0)
-            micro()
+        self.cycles += 1
+        if self.micro_program:
+            try:
+                self._micro_step()
+            except MemoryFault as fault:
+                self._fault(fault)
+                raise
             return
 
         # 2️ FETCH (opcode)
@@ -242,38 +215,233 @@ class CPU:
             self.running = False
             return
         
-        self.IR = self.fetch_byte()
+        self.instr_pc = self.PC
+        try:
+            self.IR = self.fetch_byte()
+        except MemoryFault as fault:
+            self._fault(fault)
+            raise
+        self.instr_count += 1
+        if self.profiler is not None:
+            self.profiler.record(self.PC - 1, self.IR, INSTR_CYCLES.get(self.IR, 1))
         # Separador visual para identificar nuevas instrucciones
-        self.add_log(f"--- FETCH INSTR: OpCode {self.IR:02X} ---")
+        if self.tracer.level >= TRACE_INSTR:
+            self.tracer.record("--- FETCH INSTR: OpCode {:02X} ---", self.IR)
 
         # 3️ DECODIFICACIÓN
-        instr = self.instructions.get(self.IR)
-        if instr:
-            instr()
-        else:
-            self.add_log(f"SKIP: Opcode {self.IR:02X}")
-
+        uops = self.instructions.get(self.IR)
+        if uops:
+            self.micro_program = uops
+            self.micro_pc = 0
+        elif self.tracer.level >= TRACE_INSTR:
+            self.tracer.record("SKIP: Opcode {:02X}", self.IR)
+
+    def run(self, max_cycles=None):
+        """
+        Ejecución rápida sin interfaz. Usa el traductor de bloques si la CPU se creó con
+        jit=True y el intérprete directo en caso contrario; ambos producen el mismo estado.
+        Con detect_loops=True se detiene si detecta un bucle infinito (stop_reason = "loop",
+        running sigue a True) y avanza de golpe los bucles contados DEX/BEQ/JMP.
+        Con el perfilador activo se ejecuta instrucción a instrucción para contarlas.
+        Devuelve (instrucciones, ciclos) ejecutados.
+        """
+        self.stop_reason = None
+        try:
+            if self.profiler is not None:
+                return self.profiler.run(max_cycles)
+            if self.jit is not None:
+                return self.jit.run(max_cycles)
+            return self.run_interpreted(max_cycles)
+        finally:
+            if self.bus.devices:
+                self.bus.flush()
+
+    def run_interpreted(self, max_cycles=None):
+        """
+        Modo de ejecución rápida (sin interfaz ni log): ejecuta instrucciones completas
+        directamente, sin pasar por la cola de micro-ops. El estado final (A, X, PC,
+        flags y memoria) es el mismo que se obtiene llamando a step() hasta que la CPU
+        se detiene.
+        Si se indica max_cycles, solo se ejecutan instrucciones cuyo coste completo
+        cabe en el presupuesto. Devuelve (instrucciones, ciclos) ejecutados, donde un
+        ciclo equivale a una llamada a step().
+        """
+        instr = 0
+        cycles = 0
+
+        # Terminar la instrucción que step() haya dejado a medias
+        while self.running and self.micro_program:
+            if max_cycles is not None and cycles >= max_cycles:
+                return instr, cycles
+            try:
+                self._micro_step()
+            except MemoryFault as fault:
+                self._fault(fault)
+                raise
+            cycles += 1
+            self.cycles += 1
+
+        bus = self.bus
+        # Con hooks o páginas protegidas contra escritura, STA pasa por el Bus
+        hooks = bus.write_hooks or bus.write_checked
+        # Con dispositivos mapeados, los accesos pasan por la tabla de despacho del Bus
+        # y el contador de ciclos se mantiene al día para el registro CycleCounter.
+        # Con permisos de lectura (NX, vigilancia), también por la vista del Bus.
+        sync = bool(bus.devices)
+        data = bus.view if sync or bus.read_checked else self.memory.data
+        # Con permisos, el coste de la siguiente instrucción se consulta en la RAM sin
+        # comprobar: si no cabe en el presupuesto no debe fallar (NX) ni anotarse (vigilancia)
+        checked = bus.read_checked
+        raw = self.memory.data
+        device_map = bus.device_map
+        guard = self.loop_guard
+        base_cycles = self.cycles
+        A, X, PC = self.A, self.X, self.PC
+        carry, zero = self.carry, self.zero
+        ir, operand = self.IR, self.operand
+        running = self.running
+        budget = -1 if max_cycles is None else max_cycles - cycles
+        spent = 0
 
-    def render(self):
-        os.system('cls' if os.name == 'nt' else 'clear')
-        c_f = "ON" if self.carry else "OFF"
-        z_f = "ON" if self.zero else "OFF"
-        
-        # Cabecera estandarizada: HEX (DEC)
-        header_text = f" LOGICA-8 | A: {self.A:02X} ({self.A:03d}) | X: {self.X:02X} ({self.X:03d}) | PC:${self.PC:02X} | CARRY:{c_f} | ZERO:{z_f} "
-        border = "═" * len(header_text)
-        print(f"╔{border}╗")
-        print(f"║{header_text}║")
-        print(f"╚{border}╝")
-        print("     0  1  2  3  4  5  6  7  8  9  A  B  C  D  E  F        HISTORIAL")
-        for i in range(16):
-            line = f"{i*16:02X}: "
-            for j in range(16):
-                idx = i*16 + j
-                v = self.bus.read(idx)
-                if idx == self.PC: line += f"\033[42m\033[30m{v:02X}\033[0m "
-                elif v != 0: line += f"\033[36m{v:02X}\033[0m "
-                else: line += f"\033[90m{v:02X}\033[0m "
-            if i < len(self.log): line += f"   │ {self.log[i]}"
-            print(line)
-        print("═"*105)
\ No newline at end of file
+        try:
+            while running:
+                if PC >= 256:
+                    if budget >= 0 and spent + 1 > budget: break
+                    running = False
+                    spent += 1
+                    break
+
+                at = PC
+                if checked and (device_map is None or device_map[PC] is None):
+                    op = raw[PC]
+                    if budget >= 0 and spent + INSTR_CYCLES.get(op, 1) > budget: break
+                    data[PC]   # Lectura comprobada del opcode, solo si se ejecuta
+                else:
+                    op = data[PC]
+                    if budget >= 0 and spent + INSTR_CYCLES.get(op, 1) > budget: break
+                if sync: self.cycles = base_cycles + spent + 2   # Valor visto al leer el operando
+
+                if op == 0x02:    # ADD
+                    operand = data[PC + 1]
+                    res = A + operand
+                    carry = res > 255
+                    A = res & 0xFF
+                    zero = A == 0
+                    PC += 2
+                elif op == 0x01:  # LDA
+                    operand = data[PC + 1]
+                    A = operand
+                    zero = A == 0
+                    PC += 2
+                elif op == 0x0D:  # DEX
+                    X = (X - 1) & 0xFF
+                    zero = X == 0
+                    PC += 1
+                elif op == 0x06:  # BEQ
+                    operand = data[PC + 1]
+                    PC = operand if zero else PC + 2
+                elif op == 0x04:  # JMP
+                    operand = data[PC + 1]
+                    PC = operand
+                elif op == 0x03:  # STA
+                    operand = data[PC + 1]
+                    if sync: self.cycles = base_cycles + spent + 3   # Ciclo de la escritura
+                    if hooks: bus.write_trusted(operand, A)
+                    else: data[operand] = A
+                    PC += 2
+                elif op == 0x05:  # SUB
+                    operand = data[PC + 1]
+                    res = A - operand
+                    carry = res < 0
+                    A = res & 0xFF
+                    zero = A == 0
+                    PC += 2
+                elif op == 0x0C:  # INX
+                    X = (X + 1) & 0xFF
+                    zero = X == 0
+                    PC += 1
+                elif op == 0x0B:  # LDX
+                    operand = data[PC + 1]
+                    X = operand
+                    zero = X == 0
+                    PC += 2
+                elif op == 0x07:  # AND
+                    operand = data[PC + 1]
+                    A &= operand
+                    zero = A == 0
+                    PC += 2
+                elif op == 0x08:  # OR
+                    operand = data[PC + 1]
+                    A |= operand
+                    zero = A == 0
+                    PC += 2
+                elif op == 0x09:  # XOR
+                    operand = data[PC + 1]
+                    A ^= operand
+                    zero = A == 0
+                    PC += 2
+                elif op == 0x0A:  # NOT
+                    A = (~A) & 0xFF
+                    zero = A == 0
+                    PC += 1
+                elif op == 0xFF:  # HALT
+                    running = False
+                    PC += 1
+                else:             # Opcode desconocido: SKIP
+                    PC += 1
+
+                ir = op
+                instr += 1
+                spent += INSTR_CYCLES.get(op, 1)
+
+                if guard is not None and PC <= at:
+                    # Salto hacia atrás: cabeza de bucle
+                    self.A, self.X, self.PC, self.carry, self.zero = A, X, PC, carry, zero
+                    self.IR, self.operand = ir, operand
+                    if guard.check():
+                        self.stop_reason = "loop"
+                        break
+                    ff = guard.fast_forward(None if budget < 0 else budget - spent)
+                    if ff is not None:
+                        instr += ff[0]
+                        spent += ff[1]
+                        A, X, PC, carry, zero = self.A, self.X, self.PC, self.carry, self.zero
+                        ir, operand = self.IR, self.operand
+        except MemoryFault as fault:
+            # PC local sigue en la instrucción que falló: ninguna avanza PC antes de acceder
+            fault.pc = self.instr_pc = at
+            running = False
+            self.stop_reason = "fault"
+            self.fault = fault
+            raise
+        finally:
+            # Volcar el estado local a los registros (también si hay excepción)
+            self.A, self.X, self.PC = A, X, PC
+            self.carry, self.zero = carry, zero
+            self.IR, self.operand = ir, operand
+            self.running = running
+            self.instr_count += instr
+            self.cycles = base_cycles + spent
+
+        return instr, cycles + spent
+
+    def render(self, force=False):
+        """
+        Dibuja el panel redibujando solo lo que cambió desde el último fotograma.
+        Sin force, los redibujados se limitan a renderer.min_interval: devuelve False
+        si el fotograma se omitió.
+        """
+        if self.renderer is None:
+            from renderer import TerminalRenderer
+            self.renderer = TerminalRenderer()
+        return self.renderer.draw(self, force)
+
+
+def halt_reason(cpu):
+    """Motivo de parada de una ejecución sin interfaz: halted, timeout, loop, fault o pc_overflow."""
+    if cpu.stop_reason in ("loop", "fault"):
+        return cpu.stop_reason
+    if cpu.running:
+        return "timeout"
+    # HALT deja IR = FF; si no, la CPU se detuvo al salirse de la memoria
+    return "halted" if cpu.IR == 0xFF else "pc_overflow"
@@ -0,0 +1,141 @@
+from cpu import INSTRUCTIONS, INSTR_CYCLES
+from microops import fetch_operand
+
+# Puntos de parada para la ejecución continua: breakpoints de PC y watchpoints de
+# lectura/escritura en memoria.
+
+TWO_BYTE_OPCODES = frozenset(op for op, uops in INSTRUCTIONS.items() if uops[0] is fetch_operand)
+
+
+class Debugger:
+    """
+    Ejecución continua que se detiene en breakpoints (antes de ejecutar la instrucción
+    en esa dirección) y watchpoints (lectura: antes de la instrucción que lee el byte
+    como opcode u operando; escritura: justo después del STA que lo modifica).
+
+    Todas las comprobaciones usan conjuntos precalculados al cambiar los puntos: las
+    direcciones de PC donde hay que mirar (stop_pcs) y un hook de escritura en el Bus
+    que solo se instala si hay watchpoints de escritura. Sin ningún punto, run() es
+    exactamente CPU.run() (intérprete o JIT a velocidad completa).
+    Al detenerse deja cpu.stop_reason = "breakpoint", "watch_read" o "watch_write" y la
+    dirección en hit_addr.
+    """
+
+    def __init__(self, cpu):
+        self.cpu = cpu
+        self.breakpoints = set()
+        self.watch_reads = set()
+        self.watch_writes = set()
+        self.stop_pcs = frozenset()
+        self.hit_addr = None
+        self._write_hit = None
+        self._hooked = False
+
+    @property
+    def active(self):
+        return bool(self.stop_pcs or self.watch_writes)
+
+    def toggle_breakpoint(self, addr):
+        return self._toggle(self.breakpoints, addr)
+
+    def toggle_watch_read(self, addr):
+        return self._toggle(self.watch_reads, addr)
+
+    def toggle_watch_write(self, addr):
+        return self._toggle(self.watch_writes, addr)
+
+    def _toggle(self, points, addr):
+        """Activa o desactiva el punto. Devuelve True si queda activo."""
+        if not 0 <= addr <= 255:
+            raise ValueError(f"Dirección fuera de memoria: {addr}")
+        points.symmetric_difference_update((addr,))
+        self._rebuild()
+        return addr in points
+
+    def clear(self):
+        self.breakpoints.clear()
+        self.watch_reads.clear()
+        self.watch_writes.clear()
+        self._rebuild()
+
+    def close(self):
+        self.clear()
+
+    def _rebuild(self):
+        # Un byte se lee como opcode (PC = addr) o como operando (PC = addr - 1)
+        stops = set(self.breakpoints)
+        for addr in self.watch_reads:
+            stops.add(addr)
+            if addr > 0:
+                stops.add(addr - 1)
+        self.stop_pcs = frozenset(stops)
+
+        bus = self.cpu.bus
+        if self.watch_writes and not self._hooked:
+            bus.add_write_hook(self._on_write)
+            self._hooked = True
+        elif not self.watch_writes and self._hooked:
+            bus.remove_write_hook(self._on_write)
+            self._hooked = False
+
+    def _on_write(self, addr, length):
+        if self._write_hit is None:
+            for a in range(addr, addr + length):
+                if a in self.watch_writes:
+                    self._write_hit = a
+                    break
+
+    def _pc_hit(self, pc):
+        """Motivo de parada antes de ejecutar la instrucción en pc, o None."""
+        if pc in self.breakpoints:
+            return "breakpoint", pc
+        if pc in self.watch_reads:
+            return "watch_read", pc
+        if pc + 1 in self.watch_reads and self.cpu.memory.data[pc] in TWO_BYTE_OPCODES:
+            return "watch_read", pc + 1
+        return None
+
+    def run(self, max_cycles=None):
+        """
+        Como CPU.run(), pero deteniéndose en los puntos activos. Si la CPU ya está en un
+        breakpoint, la primera instrucción se ejecuta sin comprobarlo (para continuar).
+        Devuelve (instrucciones, ciclos) ejecutados.
+        """
+        cpu = self.cpu
+        self.hit_addr = None
+        if not self.active:
+            return cpu.run(max_cycles)
+
+        cpu.stop_reason = None
+        self._write_hit = None
+        stops = self.stop_pcs
+        data = cpu.memory.data
+        instr = cycles = 0
+        first = True
+        execute = cpu.run_interpreted if cpu.profiler is None else cpu.profiler.run
+        try:
+            if cpu.micro_program:
+                i, c = cpu.run_interpreted(cpu.pending_micro_ops)
+                instr, cycles, first = instr + i, cycles + c, False
+            while cpu.running and self._write_hit is None:
+                pc = cpu.PC
+                if not first and pc in stops:
+                    hit = self._pc_hit(pc)
+                    if hit is not None:
+                        cpu.stop_reason, self.hit_addr = hit
+                        break
+                first = False
+                cost = INSTR_CYCLES.get(data[pc], 1) if pc < 256 else 1
+                if max_cycles is not None and cycles + cost > max_cycles:
+                    break
+                i, c = execute(cost)
+                instr += i
+                cycles += c
+                if cpu.stop_reason is not None:
+                    break
+            if self._write_hit is not None:
+                cpu.stop_reason, self.hit_addr = "watch_write", self._write_hit
+        finally:
+            if cpu.bus.devices:
+                cpu.bus.flush()
+        return instr, cycles
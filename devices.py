@@ -0,0 +1,111 @@
+import contextlib
+import random
+import sys
+
+# Dispositivos mapeados en memoria para el Bus (ver Bus.map_device).
+# Cada dispositivo ocupa 'size' direcciones y recibe desplazamientos relativos a su base.
+
+
+class Device:
+    size = 1
+
+    def __init__(self):
+        self.base = None
+
+    def read(self, offset):
+        return 0x00
+
+    def write(self, offset, value):
+        pass
+
+    def flush(self):
+        pass
+
+
+class CharOutputPort(Device):
+    """
+    Puerto de salida de caracteres: cada byte escrito es un carácter (latin-1).
+    La salida se acumula y se entrega en lotes a 'sink' (una llamada por salto de
+    línea o cada 'batch_size' bytes), no una llamada por byte.
+    """
+
+    def __init__(self, sink=None, batch_size=256):
+        super().__init__()
+        self.sink = sink if sink is not None else sys.stdout.write
+        self.batch_size = batch_size
+        self.buffer = bytearray()
+        self.last = 0x00
+
+    def read(self, offset):
+        return self.last
+
+    def write(self, offset, value):
+        self.last = value
+        self.buffer.append(value)
+        if value == 0x0A or len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            text = self.buffer.decode("latin-1")
+            self.buffer.clear()
+            self.sink(text)
+
+
+class CycleCounter(Device):
+    """
+    Registro de 16 bits con los ciclos de la CPU: base = byte bajo, base+1 = byte alto.
+    Escribir cualquier valor lo pone a cero.
+    """
+
+    size = 2
+
+    def __init__(self, cpu):
+        super().__init__()
+        self.cpu = cpu
+        self.origin = 0
+
+    def read(self, offset):
+        return ((self.cpu.cycles - self.origin) >> (8 * offset)) & 0xFF
+
+    def write(self, offset, value):
+        self.origin = self.cpu.cycles
+
+
+class RandomPort(Device):
+    """Cada lectura devuelve un byte aleatorio. Escribir un valor reinicia la semilla."""
+
+    def __init__(self, seed=None):
+        super().__init__()
+        self.rng = random.Random(seed)
+
+    def read(self, offset):
+        return self.rng.getrandbits(8)
+
+    def write(self, offset, value):
+        self.rng.seed(value)
+
+
+class TestAndSet(Device):
+    """
+    Cerrojo atómico: leer devuelve el valor anterior y deja un 1 (test-and-set); escribir
+    0 lo libera. El valor vive en la RAM de su dirección (compartida entre las CPU de
+    multicore.py) y cada operación se hace con 'lock' tomado, así es atómica también
+    entre procesos. Sin lock (una sola CPU o núcleos en un solo proceso) no hace falta.
+    """
+
+    def __init__(self, memory, lock=None):
+        super().__init__()
+        self.memory = memory
+        self.lock = lock if lock is not None else contextlib.nullcontext()
+
+    def read(self, offset):
+        data, addr = self.memory.data, self.base + offset
+        with self.lock:
+            old = data[addr]
+            data[addr] = 1
+        return old
+
+    def write(self, offset, value):
+        with self.lock:
+            self.memory.data[self.base + offset] = value
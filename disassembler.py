@@ -0,0 +1,86 @@
+from functools import lru_cache
+
+from assembler import ASM_TO_HEX, SINGLE_BYTE_INSTR
+
+# Desensamblador por tabla: cada uno de los 256 opcodes tiene precalculado su mnemónico
+# y su longitud. Los opcodes no definidos se muestran como dato (DB), igual que la CPU
+# los salta como un solo byte.
+
+JUMP_INSTR = frozenset({"JMP", "BEQ"})    # Su argumento es una dirección (etiqueta)
+LISTING_CACHE_SIZE = 64
+
+DECODE_TABLE = [None] * 256    # opcode -> (mnemónico, longitud)
+for _mnemonico, _opcode in ASM_TO_HEX.items():
+    DECODE_TABLE[_opcode] = (_mnemonico, 1 if _mnemonico in SINGLE_BYTE_INSTR else 2)
+del _mnemonico, _opcode
+
+
+def label_name(addr):
+    return f"L_{addr:02X}"
+
+
+def decode(image, start=0, end=None):
+    """
+    Recorrido lineal de la imagen entre start y end. Devuelve una lista de filas
+    (dirección, longitud, mnemónico, argumento); argumento es None si no lleva.
+    Una instrucción de 2 bytes cortada por el final se muestra como dato.
+    """
+    end = len(image) if end is None else min(end, len(image))
+    table = DECODE_TABLE
+    rows = []
+    addr = start
+    while addr < end:
+        entry = table[image[addr]]
+        if entry is None or (entry[1] == 2 and addr + 1 >= end):
+            rows.append((addr, 1, "DB", image[addr]))
+            addr += 1
+        elif entry[1] == 1:
+            rows.append((addr, 1, entry[0], None))
+            addr += 1
+        else:
+            rows.append((addr, 2, entry[0], image[addr + 1]))
+            addr += 2
+    return rows
+
+
+def find_labels(rows):
+    """Direcciones destino de JMP/BEQ que coinciden con el inicio de una instrucción."""
+    starts = {row[0] for row in rows}
+    return {arg for _, _, mnemonico, arg in rows if mnemonico in JUMP_INSTR and arg in starts}
+
+
+@lru_cache(maxsize=LISTING_CACHE_SIZE)
+def _listing(image, start, end):
+    rows = decode(image, start, end)
+    labels = find_labels(rows)
+    lines = []
+    for addr, length, mnemonico, arg in rows:
+        if addr in labels:
+            lines.append((None, f"{label_name(addr)}:"))
+        raw = " ".join(f"{b:02X}" for b in image[addr:addr + length])
+        if arg is None:
+            asm = mnemonico
+        elif mnemonico in JUMP_INSTR and arg in labels:
+            asm = f"{mnemonico} {label_name(arg)}"
+        else:
+            asm = f"{mnemonico} 0x{arg:02X}"
+        lines.append((addr, f"${addr:02X} | {raw:<5} |     {asm}"))
+    return tuple(lines)
+
+
+def disassemble(image, start=0, end=None, pc=None):
+    """
+    Listado anotado de la imagen: dirección, bytes e instrucción, con etiquetas L_XX en
+    los destinos de los saltos. La línea de la instrucción en pc se marca con '>'.
+    El listado de una misma imagen se reutiliza (caché), así que puede regenerarse en
+    cada refresco de pantalla.
+    """
+    lines = _listing(bytes(image), start, len(image) if end is None else end)
+    return [f"{'>' if addr is not None and addr == pc else ' '} {text}" if addr is not None else text
+            for addr, text in lines]
+
+
+def to_source(image, start=0, end=None):
+    """Fuente equivalente para compile_asm desde start=0 (las filas DB no son ensamblables)."""
+    return "\n".join(text.split("|")[-1].strip() if addr is not None else text
+                     for addr, text in _listing(bytes(image), start, len(image) if end is None else end))
@@ -0,0 +1,62 @@
+from collections import deque
+
+HISTORY_DEPTH = 1000
+
+
+class StepHistory:
+    """
+    Historial para retroceder paso a paso. Cada paso guarda solo los registros y las
+    escrituras en memoria que produjo (dirección, valor anterior), capturadas con un
+    hook del Bus. La profundidad está acotada: los pasos más antiguos se descartan.
+    Retroceder restaura la RAM sin pasar por los dispositivos mapeados.
+    """
+
+    def __init__(self, cpu, depth=HISTORY_DEPTH):
+        self.cpu = cpu
+        self.entries = deque(maxlen=depth)
+        self.writes = None       # Escrituras del paso en curso
+        cpu.bus.add_write_hook(self._on_write)
+
+    def _on_write(self, addr, length):
+        if self.writes is not None:
+            data = self.cpu.memory.data
+            for a in range(addr, min(addr + length, len(data))):
+                self.writes.append((a, data[a]))
+
+    def step(self):
+        """Ejecuta cpu.step() guardando lo necesario para deshacerlo."""
+        self.writes = []
+        registers = self.cpu.registers()
+        try:
+            self.cpu.step()
+        finally:
+            self.entries.append((registers, self.writes))
+            self.writes = None
+
+    def step_back(self):
+        """Deshace el último paso. Devuelve False si no queda historial."""
+        if not self.entries:
+            return False
+        registers, writes = self.entries.pop()
+        bus = self.cpu.bus
+        data = self.cpu.memory.data
+        device_map = bus.device_map
+        for addr, old in reversed(writes):
+            # Las escrituras a un dispositivo no cambiaron la RAM y repetirlas tendría
+            # efectos (volver a emitir un carácter, reiniciar un contador...): se omiten
+            if device_map is not None and device_map[addr] is not None:
+                continue
+            for hook in bus.write_hooks:
+                hook(addr, 1)     # Invalida los bloques del JIT, como una escritura normal
+            data[addr] = old
+        self.cpu.set_registers(registers)
+        return True
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+
+    def close(self):
+        self.cpu.bus.remove_write_hook(self._on_write)
@@ -0,0 +1,217 @@
+from bus import PERM_NOEXEC, PERM_ROM, PERM_WATCH
+from cpu import INSTRUCTIONS, INSTR_CYCLES
+from microops import fetch_operand
+
+# Opcodes que llevan un byte de operando (su micro-programa empieza leyéndolo)
+TWO_BYTE_OPCODES = {op for op, uops in INSTRUCTIONS.items() if uops[0] is fetch_operand}
+
+# Instrucciones que cierran un bloque básico (los JMP se siguen)
+BLOCK_END_OPCODES = {0x06, 0xFF}   # BEQ, HALT
+
+MAX_BLOCK_INSTR = 64
+
+# Permisos de página que obligan a pasar por el intérprete (que comprueba cada acceso)
+CHECKED_READ = PERM_NOEXEC | PERM_WATCH
+CHECKED_WRITE = PERM_ROM | PERM_WATCH
+
+# Plantillas de código por opcode ({n} = operando)
+_TEMPLATES = {
+    0x01: ["A = {n}", "zero = A == 0"],
+    0x02: ["A += {n}", "carry = A > 255", "A &= 0xFF", "zero = A == 0"],
+    0x03: ["bus.write_trusted({n}, A)"],
+    0x05: ["A -= {n}", "carry = A < 0", "A &= 0xFF", "zero = A == 0"],
+    0x07: ["A &= {n}", "zero = A == 0"],
+    0x08: ["A |= {n}", "zero = A == 0"],
+    0x09: ["A ^= {n}", "zero = A == 0"],
+    0x0A: ["A = (~A) & 0xFF", "zero = A == 0"],
+    0x0B: ["X = {n}", "zero = X == 0"],
+    0x0C: ["X = (X + 1) & 0xFF", "zero = X == 0"],
+    0x0D: ["X = (X - 1) & 0xFF", "zero = X == 0"],
+}
+
+
+class BlockJIT:
+    """
+    Traductor de bloques básicos: convierte cada tramo lineal de bytecode (hasta un
+    BEQ/HALT) en una función Python cacheada por dirección de inicio. Los JMP se siguen
+    dentro del mismo bloque mientras no vuelvan a una dirección ya traducida en él,
+    de modo que un bucle ADD/DEX/BEQ/JMP se ejecuta con una sola llamada por vuelta.
+    Cualquier escritura por el Bus sobre un byte de un bloque lo invalida, por lo que
+    el código automodificable se vuelve a traducir al ejecutarse de nuevo.
+    """
+
+    def __init__(self, cpu):
+        self.cpu = cpu
+        self.blocks = {}                    # inicio -> (función, direcciones, instrucciones, ciclos)
+        self.covers = [set() for _ in range(256)]  # dirección -> inicios de bloques que la contienen
+        self.translations = 0
+        self.invalidations = 0
+        self.perm_version = cpu.bus.perm_version
+        cpu.bus.add_write_hook(self.invalidate)
+
+    def invalidate(self, addr, length=1):
+        covers = self.covers
+        for a in range(max(addr, 0), min(addr + length, 256)):
+            if covers[a]:
+                for start in list(covers[a]):
+                    self._drop(start)
+
+    def flush(self):
+        """Descarta todos los bloques (p.ej. al cambiar los permisos de página)."""
+        self.invalidations += len(self.blocks)
+        self.blocks.clear()
+        for covers in self.covers:
+            covers.clear()
+
+    def _drop(self, start):
+        _, addrs, _, _ = self.blocks.pop(start)
+        for a in addrs:
+            self.covers[a].discard(start)
+        self.invalidations += 1
+
+    def translate(self, start):
+        """Traduce el bloque que empieza en start. Devuelve None si no cabe ni una instrucción."""
+        data = self.cpu.memory.data
+        devmap = self.cpu.bus.device_map
+        perms = self.cpu.bus.perm_map
+        body = []
+        addrs = []
+        visited = set()
+        stored = set()      # Destinos de los STA ya traducidos en este bloque
+        pc = start
+        count = cycles = 0
+        op = operand = None
+
+        while pc < 256 and count < MAX_BLOCK_INSTR:
+            code = data[pc]
+            size = 2 if code in TWO_BYTE_OPCODES else 1
+            if pc + size > 256:
+                break   # El intérprete reproduce el fallo de lectura fuera de rango
+            nxt = pc + size
+            if stored and not stored.isdisjoint(range(pc, nxt)):
+                break   # Código reescrito por un STA anterior del bloque: lo ejecuta el siguiente
+            if devmap is not None and (any(devmap[a] is not None for a in range(pc, nxt))
+                                       or code == 0x03 and devmap[data[pc + 1]] is not None):
+                # Bytes servidos por un dispositivo (no son constantes) o STA a un dispositivo
+                # (debe ver cpu.cycles al día): los ejecuta el intérprete
+                break
+            if perms is not None and (any(perms[a] & CHECKED_READ for a in range(pc, nxt))
+                                      or code == 0x03 and perms[data[pc + 1]] & CHECKED_WRITE):
+                break   # Página protegida o vigilada: el intérprete comprueba el acceso
+            op = code
+            if size == 2:
+                operand = data[pc + 1]
+            visited.add(pc)
+            addrs.extend(range(pc, nxt))
+
+            if op == 0x04:    # JMP
+                nxt = operand
+            elif op == 0x06:  # BEQ
+                body.append(f"cpu.PC = {operand} if zero else {nxt}")
+            elif op == 0xFF:  # HALT
+                body.append("cpu.running = False")
+            else:
+                body.extend(line.format(n=operand) for line in _TEMPLATES.get(op, ()))
+
+            count += 1
+            cycles += INSTR_CYCLES.get(op, 1)
+            pc = nxt
+            if op in BLOCK_END_OPCODES or (op == 0x04 and pc in visited):
+                break
+            if op == 0x03:
+                stored.add(operand)
+
+        if count == 0:
+            return None
+        if op != 0x06:
+            body.append(f"cpu.PC = {pc}")
+        body.append(f"cpu.IR = {op}")
+        if operand is not None:
+            body.append(f"cpu.operand = {operand}")
+
+        src = ("def block(cpu):\n"
+               "    A = cpu.A; X = cpu.X; carry = cpu.carry; zero = cpu.zero\n"
+               + "".join(f"    {line}\n" for line in body)
+               + "    cpu.A = A; cpu.X = X; cpu.carry = carry; cpu.zero = zero\n")
+        namespace = {"bus": self.cpu.bus}
+        exec(compile(src, f"<block ${start:02X}>", "exec"), namespace)
+
+        addrs = tuple(sorted(set(addrs)))
+        block = (namespace["block"], addrs, count, cycles)
+        self.blocks[start] = block
+        for a in addrs:
+            self.covers[a].add(start)
+        self.translations += 1
+        return block
+
+    def run(self, max_cycles=None):
+        cpu = self.cpu
+        bus = cpu.bus
+        data = cpu.memory.data
+        instr = cycles = 0
+
+        # Terminar con el intérprete la instrucción que step() haya dejado a medias
+        if cpu.micro_program and cpu.running:
+            pending = cpu.pending_micro_ops
+            i, c = cpu.run_interpreted(pending if max_cycles is None else min(pending, max_cycles))
+            instr += i
+            cycles += c
+
+        if bus.perm_version != self.perm_version:
+            # Los bloques se tradujeron con otros permisos de página
+            self.flush()
+            self.perm_version = bus.perm_version
+        blocks = self.blocks
+        guard = cpu.loop_guard
+        done_instr = done_cycles = 0
+        try:
+            while cpu.running:
+                pc = cpu.PC
+                if pc >= 256:
+                    if max_cycles is not None and cycles + done_cycles + 1 > max_cycles: break
+                    cpu.running = False
+                    done_cycles += 1
+                    break
+                if guard is not None:
+                    if guard.check():
+                        cpu.stop_reason = "loop"
+                        break
+                    ff = guard.fast_forward(None if max_cycles is None
+                                            else max_cycles - cycles - done_cycles)
+                    if ff is not None:
+                        done_instr += ff[0]
+                        done_cycles += ff[1]
+                        continue
+                block = blocks.get(pc) or self.translate(pc)
+                if block is not None and (max_cycles is None
+                                          or cycles + done_cycles + block[3] <= max_cycles):
+                    block[0](cpu)
+                    done_instr += block[2]
+                    done_cycles += block[3]
+                    continue
+
+                # Sin bloque (operando fuera de rango o servido por un dispositivo) o sin
+                # presupuesto para el bloque entero: se usa el intérprete
+                cpu.instr_count += done_instr
+                cpu.cycles += done_cycles
+                instr += done_instr
+                cycles += done_cycles
+                done_instr = done_cycles = 0
+                left = None if max_cycles is None else max_cycles - cycles
+                if block is None and (bus.device_map is None or bus.device_map[pc] is None):
+                    # Una sola instrucción: su coste exacto como presupuesto
+                    cost = INSTR_CYCLES.get(data[pc], 1)
+                    if left is not None and cost > left: break
+                    i, c = cpu.run_interpreted(cost)
+                    instr += i
+                    cycles += c
+                    continue
+                i, c = cpu.run_interpreted(left)
+                instr += i
+                cycles += c
+                break
+        finally:
+            cpu.instr_count += done_instr
+            cpu.cycles += done_cycles
+
+        return instr + done_instr, cycles + done_cycles
@@ -0,0 +1,165 @@
+import argparse
+import sys
+
+# Línea de órdenes no interactiva: python -m logica8 run|asm|disasm|bench.
+# Cada subcomando importa solo los módulos que necesita, así que 'disasm' o 'asm' no
+# cargan la CPU y 'run' no carga el panel de terminal ni el ejecutor por lotes en paralelo.
+
+DEFAULT_MAX_CYCLES = 100000
+
+
+def read_program(path, optimize=False):
+    """Bytecode de un fichero .asm (ensamblado), .bin (bytes crudos) o .hex (texto)."""
+    lower = path.lower()
+    if lower.endswith(".asm"):
+        from assembler import compile_file
+        bytecode, error = compile_file(path, optimize=optimize)
+        if error:
+            raise ValueError(error)
+        return bytecode
+    if lower.endswith(".bin"):
+        with open(path, "rb") as f:
+            return list(f.read())
+    from assembler import parse_hex
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_hex(f.read())
+
+
+def final_state(cpu, memory=False):
+    from cpu import halt_reason
+    state = {
+        "A": cpu.A, "X": cpu.X, "PC": cpu.PC, "IR": cpu.IR, "carry": cpu.carry, "zero": cpu.zero,
+        "halt_reason": halt_reason(cpu), "cycles": cpu.cycles, "instructions": cpu.instr_count,
+    }
+    if cpu.fault is not None:
+        state["fault"] = str(cpu.fault)
+    if memory:
+        state["memory"] = cpu.memory.dump_image().hex()
+    return state
+
+
+def format_state(state):
+    flags = f"carry={'ON' if state['carry'] else 'OFF'} zero={'ON' if state['zero'] else 'OFF'}"
+    lines = [f"A=${state['A']:02X} X=${state['X']:02X} PC=${state['PC']:02X} IR=${state['IR']:02X} {flags}",
+             f"halt_reason={state['halt_reason']} cycles={state['cycles']} instructions={state['instructions']}"]
+    if "fault" in state:
+        lines.append(f"fault={state['fault']}")
+    if "error" in state:
+        lines.append(f"error={state['error']}")
+    if "memory" in state:
+        image = bytes.fromhex(state["memory"])
+        for row in range(0, len(image), 16):
+            lines.append(f"${row:02X}: " + image[row:row + 16].hex(" ").upper())
+    return "\n".join(lines)
+
+
+# --- SUBCOMANDOS ---
+
+def cmd_run(args):
+    from bus import MemoryFault
+    from cpu import CPU
+    from tracer import TRACE_OFF
+    bytecode = read_program(args.file, args.optimize)
+    cpu = CPU(trace_level=TRACE_OFF, jit=args.jit, detect_loops=args.detect_loops, debug_sink=None)
+    cpu.load_program(bytecode, args.offset)
+    error = None
+    try:
+        cpu.run(args.max_cycles)
+    except (IndexError, MemoryFault) as e:
+        # Lectura fuera de la memoria o violación de permisos: como en batch_runner
+        error = str(e)
+    state = final_state(cpu, args.memory)
+    if error is not None:
+        state["halt_reason"] = "fault"
+        state["error"] = error
+    if args.json:
+        import json
+        print(json.dumps(state))
+    else:
+        print(format_state(state))
+    return 0
+
+
+def cmd_asm(args):
+    from assembler import compile_file
+    listing_out = sys.stdout if args.output else sys.stderr
+    if args.listing:
+        # El listado va a stderr cuando el bytecode sale por stdout
+        import contextlib
+        with contextlib.redirect_stdout(listing_out):
+            bytecode, error = compile_file(args.file, verbose=True, optimize=args.optimize)
+    else:
+        bytecode, error = compile_file(args.file, optimize=args.optimize)
+    if error:
+        raise ValueError(error)
+    if args.output is None:
+        print(" ".join(f"{b:02X}" for b in bytecode))
+    elif args.output.lower().endswith(".bin"):
+        with open(args.output, "wb") as f:
+            f.write(bytes(bytecode))
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(" ".join(f"{b:02X}" for b in bytecode) + "\n")
+    if args.output:
+        print(f"[SISTEMA] {len(bytecode)} bytes escritos en {args.output}", file=sys.stderr)
+    return 0
+
+
+def cmd_disasm(args):
+    from disassembler import disassemble, to_source
+    bytecode = read_program(args.file)
+    image = bytes(args.offset) + bytes(bytecode)
+    if args.source:
+        print(to_source(image, args.offset))
+    else:
+        print("\n".join(disassemble(image, args.offset)))
+    return 0
+
+
+def cmd_bench(args):
+    import benchmark
+    return benchmark.main(args.bench_args)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="logica8", description="LOGICA-8: línea de órdenes sin interfaz")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("run", help="Ejecutar un programa y mostrar el estado final")
+    p.add_argument("file", help="Programa .hex, .bin o .asm")
+    p.add_argument("--offset", type=lambda s: int(s, 0), default=0, help="Dirección de carga")
+    p.add_argument("--max-cycles", type=int, default=DEFAULT_MAX_CYCLES)
+    p.add_argument("--jit", action="store_true", help="Usar el traductor de bloques")
+    p.add_argument("--detect-loops", action="store_true", help="Detener los bucles infinitos")
+    p.add_argument("--optimize", action="store_true", help="Optimizar el ensamblado (.asm)")
+    p.add_argument("--memory", action="store_true", help="Incluir un volcado de la memoria")
+    p.add_argument("--json", action="store_true", help="Estado final en JSON")
+    p.set_defaults(handler=cmd_run)
+
+    p = sub.add_parser("asm", help="Ensamblar un fuente")
+    p.add_argument("file")
+    p.add_argument("-o", "--output", default=None, help="Fichero .hex o .bin (por defecto, stdout)")
+    p.add_argument("--optimize", action="store_true")
+    p.add_argument("--listing", action="store_true", help="Mostrar la tabla de traducción")
+    p.set_defaults(handler=cmd_asm)
+
+    p = sub.add_parser("disasm", help="Desensamblar un programa")
+    p.add_argument("file", help="Programa .hex, .bin o .asm")
+    p.add_argument("--offset", type=lambda s: int(s, 0), default=0)
+    p.add_argument("--source", action="store_true", help="Fuente reensamblable en lugar del listado")
+    p.set_defaults(handler=cmd_disasm)
+
+    p = sub.add_parser("bench", help="Benchmarks del emulador (opciones de benchmark.py)")
+    p.add_argument("bench_args", nargs=argparse.REMAINDER)
+    p.set_defaults(handler=cmd_bench)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.handler(args)
+    except (OSError, ValueError) as e:
+        print(f"[SISTEMA] Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+import random
+
+from cpu import INSTR_CYCLES
+
+# Claves Zobrist: una por (dirección, valor). El hash de la memoria es el XOR de las
+# claves de su contenido y se actualiza solo con los bytes escritos.
+_rng = random.Random(0x4C38)
+_KEYS = [[_rng.getrandbits(64) for _ in range(256)] for _ in range(256)]
+del _rng
+
+MAX_LOOP_BODY = 16   # Instrucciones ADD/SUB admitidas en el cuerpo de un bucle contado
+
+
+class LoopGuard:
+    """
+    Detección de bucles infinitos y avance rápido de bucles contados.
+
+    En cada salto hacia atrás (cabeza de bucle) el motor llama a check(): se compara el
+    estado (PC, A, X, flags y hash de memoria) con uno guardado en instantes que se
+    duplican (algoritmo de Brent), así la memoria usada es constante. Si el estado se
+    repite exactamente, la CPU no puede terminar nunca.
+
+    fast_forward() reconoce el patrón  L: [ADD/SUB #k]* ; DEX ; BEQ fin ; JMP L  y
+    calcula su resultado de forma cerrada en lugar de iterar.
+    Con dispositivos mapeados (lecturas no deterministas) la detección y el avance
+    rápido se desactivan.
+    """
+
+    def __init__(self, cpu, fast_forward=True):
+        self.cpu = cpu
+        self.fast_forward_enabled = fast_forward
+        self.fast_forwards = 0
+        self.patterns = {}
+        cpu.bus.add_write_hook(self._on_write)
+        self.reset()
+
+    def reset(self):
+        data = self.cpu.memory.data
+        self.shadow = bytearray(data)
+        h = 0
+        for addr, value in enumerate(self.shadow):
+            h ^= _KEYS[addr][value]
+        self.mem_hash = h
+        self.dirty = set()
+        self.saved = None
+        self.saved_image = None
+        self.power = 1
+        self.lam = 0
+        self.detected = False
+
+    def close(self):
+        self.cpu.bus.remove_write_hook(self._on_write)
+
+    def _on_write(self, addr, length):
+        self.dirty.update(range(addr, min(addr + length, 256)))
+
+    def memory_hash(self):
+        if self.dirty:
+            data, shadow, h = self.cpu.memory.data, self.shadow, self.mem_hash
+            for addr in self.dirty:
+                new, old = data[addr], shadow[addr]
+                if new != old:
+                    h ^= _KEYS[addr][old] ^ _KEYS[addr][new]
+                    shadow[addr] = new
+            self.dirty.clear()
+            self.mem_hash = h
+        return self.mem_hash
+
+    def check(self):
+        """Devuelve True si el estado actual ya se había visto (bucle infinito)."""
+        cpu = self.cpu
+        if cpu.bus.devices:
+            return False
+        state = (cpu.PC, cpu.A, cpu.X, cpu.carry, cpu.zero, self.memory_hash())
+        # Con el hash igual se confirma byte a byte para descartar colisiones
+        if state == self.saved and self.shadow == self.saved_image:
+            self.detected = True
+            return True
+        self.lam += 1
+        if self.lam == self.power:
+            self.saved = state
+            self.saved_image = bytes(self.shadow)
+            self.power *= 2
+            self.lam = 0
+        return False
+
+    # --- AVANCE RÁPIDO ---
+
+    def counted_loop(self, start):
+        """Devuelve (cuerpo, salida) si en start empieza un bucle contado, o None."""
+        data = self.cpu.memory.data
+        cached = self.patterns.get(start)
+        if cached is not None:
+            body, exit_pc, code = cached
+            if data[start:start + len(code)] == code:
+                return body, exit_pc
+            del self.patterns[start]
+
+        pc = start
+        body = []
+        while pc < 254 and data[pc] in (0x02, 0x05) and len(body) < MAX_LOOP_BODY:
+            body.append((data[pc], data[pc + 1]))
+            pc += 2
+        if pc > 251 or data[pc] != 0x0D or data[pc + 1] != 0x06 or data[pc + 3] != 0x04 or data[pc + 4] != start:
+            return None
+        exit_pc = data[pc + 2]
+        self.patterns[start] = (tuple(body), exit_pc, bytes(data[start:pc + 5]))
+        return tuple(body), exit_pc
+
+    def fast_forward(self, budget=None):
+        """
+        Si la CPU está en la cabeza de un bucle contado (o en un JMP hacia ella), aplica
+        sus vueltas de una vez. Solo se aplican las que caben en budget (ciclos).
+        Devuelve (instrucciones, ciclos) consumidos o None si no hay avance.
+        """
+        cpu = self.cpu
+        if not self.fast_forward_enabled or cpu.micro_program or cpu.PC > 255:
+            return None
+        if cpu.bus.read_checked or cpu.bus.devices:
+            # Páginas NX o vigiladas, o dispositivos (lecturas no deterministas): cada
+            # lectura debe pasar por el Bus
+            return None
+        data = cpu.memory.data
+        start = cpu.PC
+        jmp_cost = INSTR_CYCLES[0x04]
+        instr = cycles = 0
+        if data[start] == 0x04 and start < 255:
+            # JMP L: se ejecuta el salto y se avanza desde L
+            loop = self.counted_loop(data[start + 1])
+            if loop is None or (budget is not None and budget < jmp_cost):
+                return None
+            start = data[start + 1]
+            instr, cycles = 1, jmp_cost
+        else:
+            loop = self.counted_loop(start)
+            if loop is None:
+                return None
+        body, exit_pc = loop
+
+        iter_cycles = sum(INSTR_CYCLES[op] for op, _ in body) + INSTR_CYCLES[0x0D] + INSTR_CYCLES[0x06]
+        iter_instr = len(body) + 2
+        m = cpu.X or 256               # Vueltas hasta que DEX deja X a 0
+        total = m * iter_cycles + (m - 1) * jmp_cost
+        left = None if budget is None else budget - cycles
+        if left is None or total <= left:
+            k, finish = m, True
+        else:
+            # Vueltas completas (con su JMP) que caben, sin llegar a la última
+            k, finish = min(m - 1, left // (iter_cycles + jmp_cost)), False
+            if k <= 0:
+                if instr:
+                    cpu.PC, cpu.IR, cpu.operand = start, 0x04, start
+                    return instr, cycles
+                return None
+
+        # Efecto neto de una vuelta sobre A y simulación exacta de la última
+        delta = sum(n if op == 0x02 else -n for op, n in body)
+        A = (cpu.A + (k - 1) * delta) & 0xFF
+        carry = cpu.carry
+        for op, n in body:
+            res = A + n if op == 0x02 else A - n
+            carry = res > 255 if op == 0x02 else res < 0
+            A = res & 0xFF
+        cpu.A, cpu.carry = A, carry
+        cpu.X = (cpu.X - k) & 0xFF
+        cpu.zero = cpu.X == 0
+
+        if finish:
+            cpu.PC, cpu.IR, cpu.operand = exit_pc, 0x06, exit_pc
+            instr += k * iter_instr + (k - 1)
+            cycles += total
+        else:
+            cpu.PC, cpu.IR, cpu.operand = start, 0x04, start
+            instr += k * (iter_instr + 1)
+            cycles += k * (iter_cycles + jmp_cost)
+        self.fast_forwards += 1
+        return instr, cycles
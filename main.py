@@ -1,11 +1,15 @@
 
 import os
+import signal
 import time
 
 from cpu import *
 from assembler import *
-from system_tests import *
 from sample_programs import *
+from history import StepHistory, HISTORY_DEPTH
+from debugger import Debugger
+from profiler import Profiler
+from renderer import CLEAR_SCREEN
 
 
 # --- SISTEMA DE MENÚS (Interfaz) ---
@@ -33,16 +37,134 @@ REGLAS Y FLAGS:
 - Registros: A y X son de 8 bits (0-255).
 - CARRY: Se activa (ON) si una operación excede los 8 bits.
 - ZERO : Se activa (ON) si el resultado de la operación es 0.
+
+EJECUCIÓN:
+- ENTER: Paso | B: Paso atrás | R: Ejecución continua (Ctrl+C para parar).
+- P $dir: Breakpoint | L $dir: Vigilar lectura | W $dir: Vigilar escritura.
+- V hz: Velocidad en ciclos por segundo (0 = sin límite).
+- H: Perfilador con mapa de calor; al desactivarlo se exporta a JSON.
 """
 
 
-def run_emulator(cpu):
+FREE_RUN_FPS = 30          # Refrescos de pantalla en ejecución continua
+FREE_RUN_SLICE = 20000     # Ciclos entre refrescos cuando la velocidad es ilimitada
+
+STOP_MESSAGES = {
+    "breakpoint": "Breakpoint en ${:02X}",
+    "watch_read": "Lectura vigilada de ${:02X}",
+    "watch_write": "Escritura vigilada en ${:02X}",
+}
+
+
+def parse_address(texto):
+    """Dirección de memoria: acepta $XX (hex) además de los formatos de parse_value."""
+    texto = texto.strip()
+    if texto.startswith("$"):
+        texto = "0x" + texto[1:]
+    valor = parse_value(texto)
+    return valor if valor is not None and 0 <= valor <= 255 else None
+
+
+def free_run(cpu, debugger, clock_hz=None):
+    """
+    Ejecución continua hasta HALT, un punto de parada o Ctrl+C. Con clock_hz se limita
+    a esa velocidad (ciclos por segundo); sin él se ejecuta tan rápido como se pueda.
+    La pantalla se refresca como máximo FREE_RUN_FPS veces por segundo.
+    """
+    interrumpido = []
+    anterior = signal.signal(signal.SIGINT, lambda *args: interrumpido.append(True))
+    frame = 1.0 / FREE_RUN_FPS
+    ciclos_por_frame = max(1, int(clock_hz * frame)) if clock_hz else FREE_RUN_SLICE
+    siguiente = time.perf_counter()
+    try:
+        while cpu.running and not interrumpido:
+            debugger.run(ciclos_por_frame)
+            if cpu.stop_reason is not None:
+                break
+            cpu.render()
+            if clock_hz:
+                siguiente += frame
+                espera = siguiente - time.perf_counter()
+                if espera > 0: time.sleep(espera)
+                else: siguiente = time.perf_counter()
+    finally:
+        signal.signal(signal.SIGINT, anterior)
+
+    if cpu.stop_reason in STOP_MESSAGES:
+        cpu.add_log("SISTEMA: " + STOP_MESSAGES[cpu.stop_reason].format(debugger.hit_addr))
+    elif cpu.stop_reason == "loop":
+        cpu.add_log("SISTEMA: Bucle infinito detectado")
+    elif interrumpido:
+        cpu.add_log(f"SISTEMA: Ejecución interrumpida en ${cpu.PC:02X}")
+
+
+def toggle_profiler(cpu):
+    """Activa el perfilador con el mapa de calor, o lo detiene y exporta su JSON."""
+    renderer = cpu.renderer
+    if cpu.profiler is None:
+        Profiler(cpu)
+        if renderer is not None: renderer.heat = "exec"
+        cpu.add_log("SISTEMA: Perfilador activado (mapa de calor)")
+        return
+    nombre = f"profile_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    try:
+        cpu.profiler.export_json(nombre)
+        cpu.add_log(f"SISTEMA: Perfil exportado a {nombre}")
+    except OSError as e:
+        cpu.add_log(f"SISTEMA: No se pudo exportar el perfil: {e}")
+    cpu.profiler.close()
+    if renderer is not None: renderer.heat = None
+
+
+def run_emulator(cpu, history_depth=HISTORY_DEPTH):
+    history = StepHistory(cpu, history_depth)
+    debugger = Debugger(cpu)
+    clock_hz = None
+    if cpu.renderer is not None:
+        cpu.renderer.invalidate()     # El menú ha limpiado la pantalla
     while cpu.running:
-        cpu.render()
-        cmd = input("\n[ENTER: Paso | Q: Menú] > ").upper()
-        if cmd == "Q": break
-        cpu.step()
-    cpu.render()
+        cpu.render(force=True)
+        cmd = input("\n[ENTER: Paso | B: Atrás | R: Ejecutar | P/L/W $dir: Break/Lectura/Escritura"
+                    " | V hz: Velocidad | H: Perfil | Q: Menú] > ").upper().split()
+        if not cmd:
+            history.step()
+            continue
+        orden, args = cmd[0], cmd[1:]
+        if orden == "Q": break
+        if orden == "B":
+            if not history.step_back():
+                cpu.add_log("SISTEMA: No hay más pasos en el historial")
+        elif orden == "R":
+            cpu.add_log("SISTEMA: Ejecución continua (Ctrl+C para volver a paso a paso)")
+            cpu.render(force=True)
+            free_run(cpu, debugger, clock_hz)
+            history.clear()           # Los pasos anteriores ya no se pueden deshacer
+        elif orden in ("P", "L", "W"):
+            addr = parse_address(args[0]) if args else None
+            if addr is None:
+                cpu.add_log("SISTEMA: Dirección no válida")
+                continue
+            toggle, nombre = {"P": (debugger.toggle_breakpoint, "Breakpoint"),
+                              "L": (debugger.toggle_watch_read, "Watch lectura"),
+                              "W": (debugger.toggle_watch_write, "Watch escritura")}[orden]
+            estado = "ON" if toggle(addr) else "OFF"
+            cpu.add_log(f"SISTEMA: {nombre} ${addr:02X} {estado}")
+        elif orden == "H":
+            toggle_profiler(cpu)
+        elif orden == "V":
+            valor = parse_value(args[0]) if args else None
+            if valor is None or valor < 0:
+                cpu.add_log("SISTEMA: Velocidad no válida")
+                continue
+            clock_hz = valor or None
+            cpu.add_log(f"SISTEMA: Velocidad {f'{clock_hz} Hz' if clock_hz else 'ilimitada'}")
+        else:
+            history.step()
+    debugger.close()
+    if cpu.profiler is not None:
+        toggle_profiler(cpu)
+    history.close()
+    cpu.render(force=True)
     
     # Al terminar, ofrecemos la exportación
     opcion = input("\n¿Desea exportar el log de esta ejecución? (S/N): ").upper()
@@ -54,10 +176,17 @@ def run_emulator(cpu):
     if not cpu.running: input("\nHALT alcanzado. ENTER para volver...")
 
 
+def clear_screen():
+    # Secuencia ANSI en lugar de lanzar 'cls'/'clear' en un proceso aparte
+    print(CLEAR_SCREEN, end="", flush=True)
+
+
 def main():
+    if os.name == "nt":
+        os.system("")     # Activa las secuencias ANSI en la consola de Windows
     cpu = CPU()
     while True:
-        os.system('cls' if os.name == 'nt' else 'clear')
+        clear_screen()
         print("      █▒▒▒▒▒▒▒▒▒ LOGICA-8: CONTROL PANEL ▒▒▒▒▒▒▒▒▒█")
         print("      1. Ver Ayuda")
         print("      2. Cargar Programa de Ejemplo")
@@ -70,7 +199,7 @@ def main():
         opcion = input(" Selecciona una opción > ")
         
         if opcion == "1":
-            os.system('cls' if os.name == 'nt' else 'clear')
+            clear_screen()
             print(HELP_TEXT)
             input("Presiona ENTER para volver...")
         
@@ -121,6 +250,7 @@ def main():
                 run_emulator(cpu)
 
         elif opcion == "5":
+            from system_tests import run_tests
             run_tests()
 
         elif opcion == "6":
@@ -1,8 +1,41 @@
+import mmap
+import os
+
+
+def _attach_shared(name):
+    """Abre un bloque de memoria compartida existente sin hacerse cargo de borrarlo."""
+    from multiprocessing import shared_memory
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)   # Python 3.13+
+    except TypeError:
+        # Antes de 3.13 abrir el bloque lo registra en el resource_tracker; en los procesos
+        # hijos de multiprocessing el tracker es el del creador, así que no se duplica
+        return shared_memory.SharedMemory(name=name)
 
 class Memory:
-    def __init__(self, size=256):
+    def __init__(self, size=256, backing_file=None, shared_name=None):
+        """
+        RAM de 'size' bytes. Por defecto vive en un bytearray; si se indica backing_file,
+        se proyecta sobre ese fichero con mmap para poder inspeccionarla desde fuera.
+        Con shared_name se usa el bloque de multiprocessing.shared_memory de ese nombre,
+        visible desde otros procesos (ver multicore.py); el bloque es de quien lo creó.
+        """
         self.size = size
-        self.data = [0x00] * size
+        self._file = None
+        self._mmap = None
+        self._shm = None
+        if shared_name is not None:
+            self._shm = _attach_shared(shared_name)
+            self.data = self._shm.buf[:size]
+        elif backing_file is None:
+            self.data = bytearray(size)
+        else:
+            mode = "r+b" if os.path.exists(backing_file) else "w+b"
+            self._file = open(backing_file, mode)
+            if os.fstat(self._file.fileno()).st_size < size:
+                self._file.truncate(size)
+            self._mmap = mmap.mmap(self._file.fileno(), size)
+            self.data = memoryview(self._mmap)
 
     def read(self, addr):
             # Validamos primero el tipo y luego el rango
@@ -28,4 +61,38 @@ class Memory:
                 raise TypeError(f"Error de Datos: El valor {value} debe ser un entero.")
                 
             # 4. Escritura física con máscara de seguridad de 8 bits
-            self.data[addr] = int(value) & 0xFF
\ No newline at end of file
+            self.data[addr] = int(value) & 0xFF
+
+    # --- OPERACIONES EN BLOQUE ---
+
+    def load_image(self, image, offset=0):
+        """Copia una imagen (bytes o lista de enteros) a partir de offset en una sola operación."""
+        if not isinstance(image, (bytes, bytearray, memoryview)):
+            image = bytes(b & 0xFF for b in image)
+        end = offset + len(image)
+        if offset < 0 or end > self.size:
+            raise ValueError(f"Imagen fuera de rango: ${offset:02X}-${end - 1:02X}")
+        self.data[offset:end] = image
+
+    def dump_image(self, start=0, end=None):
+        """Devuelve una copia (bytes) de la memoria entre start y end."""
+        return bytes(self.data[start:self.size if end is None else end])
+
+    def flush(self):
+        if self._mmap is not None:
+            self._mmap.flush()
+
+    def close(self):
+        if self._shm is not None:
+            contents = bytearray(self.data)
+            self.data.release()
+            self._shm.close()
+            self._shm = None
+            self.data = contents
+        if self._mmap is not None:
+            contents = bytearray(self.data)
+            self.data.release()
+            self._mmap.close()
+            self._file.close()
+            self._mmap = self._file = None
+            self.data = contents
@@ -1,16 +1,116 @@
+from tracer import TRACE_INSTR, TRACE_UOP
+
+# Micro-operaciones: funciones sin estado que reciben la CPU.
+# Cada instrucción es una secuencia estática de estas funciones (ver INSTRUCTIONS en cpu.py).
+# Los mensajes de traza solo se registran si el nivel del tracer lo pide.
 
 def fetch_operand(cpu):
-    cpu.operand = cpu.bus.read(cpu.PC)
+    cpu.operand = cpu.bus.read_trusted(cpu.PC)
     cpu.PC += 1
-    cpu.add_log(f"uOP: BUS READ  -> Op:{cpu.operand:02X} (PC incrementado)")
+    if cpu.tracer.level >= TRACE_UOP:
+        cpu.tracer.record("uOP: BUS READ  -> Op:{:02X} (PC incrementado)", cpu.operand)
 
 def load_A(cpu):
     cpu.A = cpu.operand
     update_flags(cpu, cpu.A)
-    cpu.add_log(f"uOP: REG LOAD  -> A = {cpu.A:02X}")
+    if cpu.tracer.level >= TRACE_UOP:
+        cpu.tracer.record("uOP: REG LOAD  -> A = {:02X}", cpu.A)
 
 def update_flags(cpu, value):
     cpu.zero = (value == 0)
-    z_stat = "ON" if cpu.zero else "OFF"
-    c_stat = "ON" if cpu.carry else "OFF"
-    cpu.add_log(f"uOP: FLAGS     -> Z:{z_stat} C:{c_stat}")
\ No newline at end of file
+    if cpu.tracer.level >= TRACE_UOP:
+        cpu.tracer.record("uOP: FLAGS     -> Z:{} C:{}",
+                          "ON" if cpu.zero else "OFF", "ON" if cpu.carry else "OFF")
+
+def flags_A(cpu):
+    update_flags(cpu, cpu.A)
+
+# --- EJECUCIÓN (un micro-op por instrucción) ---
+
+def alu_add(cpu):
+    old_a = cpu.A
+    cpu.A = (cpu.A + cpu.operand) % 256
+    cpu.carry = (old_a + cpu.operand) > 255
+    if cpu.tracer.level >= TRACE_INSTR:
+        cpu.tracer.record("EXEC: ADD #{:02X} a A:{:02X} -> RES:{:02X}", cpu.operand, old_a, cpu.A)
+
+def store_A(cpu):
+    cpu.bus.write_trusted(cpu.operand, cpu.A)
+    if cpu.tracer.level >= TRACE_INSTR:
+        cpu.tracer.record("STA: {:02X} -> ${:02X}", cpu.A, cpu.operand)
+
+def jump(cpu):
+    old_pc = cpu.PC
+    cpu.PC = cpu.operand
+    if cpu.tracer.level >= TRACE_INSTR:
+        cpu.tracer.record("EXEC: JUMP     -> Forzando PC: ${:02X} a ${:02X}", old_pc, cpu.PC)
+
+def alu_sub(cpu):
+    old_a = cpu.A
+    res = cpu.A - cpu.operand
+    cpu.A = res % 256
+    cpu.carry = res < 0
+    if cpu.tracer.level >= TRACE_INSTR:
+        cpu.tracer.record("EXEC: SUB      -> A:{:02X} - #{:02X} = {:02X}", old_a, cpu.operand, cpu.A)
+
+def branch_zero(cpu):
+    if cpu.zero:
+        old_pc = cpu.PC
+        cpu.PC = cpu.operand
+        if cpu.tracer.level >= TRACE_INSTR:
+            cpu.tracer.record("EXEC: BRANCH   -> Z es ON. Salto: ${:02X} a ${:02X}", old_pc, cpu.PC)
+    elif cpu.tracer.level >= TRACE_INSTR:
+        cpu.tracer.record("EXEC: BRANCH   -> Z es OFF. No hay salto.")
+
+def alu_and(cpu):
+    old_a = cpu.A
+    cpu.A &= cpu.operand
+    cpu.zero = (cpu.A == 0)
+    if cpu.tracer.level >= TRACE_INSTR:
+        cpu.tracer.record("AND: {:02X} & {:02X} = {:02X}", old_a, cpu.operand, cpu.A)
+
+def alu_or(cpu):
+    old_a = cpu.A
+    cpu.A |= cpu.operand
+    cpu.zero = (cpu.A == 0)
+    if cpu.tracer.level >= TRACE_INSTR:
+        cpu.tracer.record("OR: {:02X} | {:02X} = {:02X}", old_a, cpu.operand, cpu.A)
+
+def alu_xor(cpu):
+    old_a = cpu.A
+    cpu.A ^= cpu.operand
+    if cpu.tracer.level >= TRACE_INSTR:
+        cpu.tracer.record("EXEC: XOR      -> A:{:02X} ^ #{:02X} = {:02X}", old_a, cpu.operand, cpu.A)
+
+def alu_not(cpu):
+    old_a = cpu.A
+    cpu.A = (~cpu.A) & 0xFF
+    cpu.zero = (cpu.A == 0)
+    if cpu.tracer.level >= TRACE_INSTR:
+        cpu.tracer.record("NOT: ~{:02X} = {:02X}", old_a, cpu.A)
+
+def load_X(cpu):
+    cpu.X = cpu.operand
+    cpu.zero = (cpu.X == 0)
+    if cpu.tracer.level >= TRACE_INSTR:
+        cpu.tracer.record("LDX: {:02X}", cpu.X)
+
+def inc_X(cpu):
+    old_x = cpu.X
+    cpu.X = (cpu.X + 1) % 256
+    cpu.zero = (cpu.X == 0)
+    if cpu.tracer.level >= TRACE_INSTR:
+        cpu.tracer.record("INX: {:02X} -> {:02X}", old_x, cpu.X)
+
+def dec_X(cpu):
+    old_x = cpu.X
+    cpu.X = (cpu.X - 1) % 256
+    cpu.zero = (cpu.X == 0)
+    if cpu.tracer.level >= TRACE_INSTR:
+        cpu.tracer.record("DEX: {:02X} -> {:02X}", old_x, cpu.X)
+
+def halt(cpu):
+    cpu.running = False
+    cpu.bus.flush()
+    if cpu.tracer.level >= TRACE_INSTR:
+        cpu.tracer.record("HALT ejecutado")
@@ -0,0 +1,213 @@
+import argparse
+import json
+import multiprocessing
+import queue
+import sys
+from multiprocessing import shared_memory
+
+from bus import MemoryFault
+from cpu import CPU, INSTR_CYCLES, halt_reason
+from devices import TestAndSet
+from memory import Memory
+from tracer import TRACE_OFF
+
+# Varios núcleos LOGICA-8 sobre un mismo espacio de direcciones. La RAM es un bloque de
+# multiprocessing.shared_memory y cada núcleo es una CPU con su propio Bus (registros y
+# dispositivos privados) que ejecuta en su propio proceso. La dirección TAS_ADDR está
+# reservada para el cerrojo test-and-set: el byte leído como operando (p.ej. 'LDA' en
+# TAS_ADDR-1) devuelve el valor anterior y deja un 1; escribir 0 lo libera.
+
+MEMORY_SIZE = 256
+TAS_ADDR = 0xF0
+QUANTUM = 8                   # Ciclos por turno en el reparto round-robin
+DEFAULT_MAX_CYCLES = 1_000_000
+
+# Arbitraje del Bus entre procesos:
+#  free        - sin arbitraje: los núcleos ejecutan en paralelo y solo se coordinan
+#                con el cerrojo test-and-set (el entrelazado depende del sistema).
+#  round_robin - el Bus se cede por turnos fijos (0, 1, ..., n-1) de 'quantum' ciclos;
+#                el resultado es determinista e igual al de run_interleaved().
+ARB_FREE = "free"
+ARB_ROUND_ROBIN = "round_robin"
+ARBITRATIONS = (ARB_FREE, ARB_ROUND_ROBIN)
+
+
+def make_core(memory, entry, tas_addr=TAS_ADDR, lock=None):
+    """CPU sin interfaz sobre 'memory' (ya cargada) con PC en entry y el cerrojo mapeado."""
+    cpu = CPU(trace_level=TRACE_OFF, memory=memory, debug_sink=None)
+    if tas_addr is not None:
+        cpu.bus.map_device(TestAndSet(memory, lock), tas_addr)
+    cpu.load_program(b"", entry)   # Registros a cero; la imagen ya está en la memoria
+    return cpu
+
+
+def core_state(core_id, cpu):
+    state = {
+        "core": core_id, "A": cpu.A, "X": cpu.X, "PC": cpu.PC, "IR": cpu.IR,
+        "carry": cpu.carry, "zero": cpu.zero, "halt_reason": halt_reason(cpu),
+        "cycles": cpu.cycles, "instructions": cpu.instr_count,
+    }
+    if cpu.fault is not None:
+        state["fault"] = str(cpu.fault)
+    return state
+
+
+def _run_turn(cpu, quantum, max_cycles):
+    """Un turno de 'quantum' ciclos. Devuelve True si el núcleo ha terminado."""
+    budget = quantum if max_cycles is None else min(quantum, max_cycles - cpu.cycles)
+    try:
+        cycles = cpu.run(budget)[1] if budget > 0 else 0
+    except MemoryFault:
+        return True   # La CPU queda detenida con stop_reason = "fault"
+    # Sin ciclos ejecutados, la siguiente instrucción ya no cabe en max_cycles
+    return not cpu.running or cpu.stop_reason is not None or cycles == 0
+
+
+def _core_main(core_id, shm_name, size, entry, tas_addr, lock, max_cycles, quantum, turns, done, results):
+    """Cuerpo de cada proceso: ejecuta un núcleo y envía su estado final por 'results'."""
+    memory = Memory(size, shared_name=shm_name)
+    try:
+        cpu = make_core(memory, entry, tas_addr, lock)
+        if turns is None:
+            try:
+                cpu.run(max_cycles)
+            except MemoryFault:
+                pass
+        else:
+            # Paso de testigo: cada semáforo da el Bus a un núcleo; al acabar su turno lo
+            # cede al siguiente núcleo que no haya terminado
+            n = len(turns)
+            finished = False
+            while not finished:
+                turns[core_id].acquire()
+                finished = _run_turn(cpu, quantum, max_cycles)
+                if finished:
+                    done[core_id] = 1
+                for k in range(1, n + 1):
+                    following = (core_id + k) % n
+                    if not done[following]:
+                        turns[following].release()
+                        break
+        results.put((core_id, core_state(core_id, cpu), None))
+    except Exception as e:
+        results.put((core_id, None, f"{type(e).__name__}: {e}"))
+    finally:
+        memory.close()
+
+
+class MultiCore:
+    """
+    Espacio de direcciones compartido por varios núcleos. load_image() carga el programa
+    una vez; run() lanza un proceso por punto de entrada y run_interleaved() ejecuta los
+    mismos núcleos por turnos en este proceso (determinista, para pruebas). Ambos
+    devuelven la lista de estados finales; la memoria resultante queda en self.memory.
+    """
+
+    def __init__(self, size=MEMORY_SIZE, tas_addr=TAS_ADDR):
+        self.size = size
+        self.tas_addr = tas_addr
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.memory = Memory(size, shared_name=self.shm.name)
+
+    def load_image(self, image, offset=0):
+        self.memory.load_image(image, offset)
+
+    def run_interleaved(self, entries, max_cycles=DEFAULT_MAX_CYCLES, quantum=QUANTUM):
+        """Round-robin en un solo proceso: mismo orden de turnos que ARB_ROUND_ROBIN."""
+        quantum = max(quantum, max(INSTR_CYCLES.values()))
+        cpus = [make_core(self.memory, entry, self.tas_addr) for entry in entries]
+        live = list(range(len(cpus)))
+        while live:
+            live = [i for i in live if not _run_turn(cpus[i], quantum, max_cycles)]
+        return [core_state(i, cpu) for i, cpu in enumerate(cpus)]
+
+    def run(self, entries, max_cycles=DEFAULT_MAX_CYCLES, arbitration=ARB_FREE, quantum=QUANTUM,
+            timeout=None):
+        """
+        Un proceso por núcleo. Con ARB_FREE, max_cycles=None deja correr cada núcleo hasta
+        su HALT. timeout (segundos) limita la espera de cada resultado.
+        """
+        if arbitration not in ARBITRATIONS:
+            raise ValueError(f"Arbitraje desconocido '{arbitration}' (opciones: {', '.join(ARBITRATIONS)})")
+        quantum = max(quantum, max(INSTR_CYCLES.values()))
+        ctx = multiprocessing.get_context()
+        lock = ctx.Lock()
+        results = ctx.Queue()
+        turns = done = None
+        if arbitration == ARB_ROUND_ROBIN:
+            turns = [ctx.Semaphore(1 if i == 0 else 0) for i in range(len(entries))]
+            done = ctx.Array("b", len(entries), lock=False)
+        procs = [ctx.Process(target=_core_main, daemon=True,
+                             args=(i, self.shm.name, self.size, entry, self.tas_addr, lock,
+                                   max_cycles, quantum, turns, done, results))
+                 for i, entry in enumerate(entries)]
+        for proc in procs:
+            proc.start()
+        states = [None] * len(procs)
+        try:
+            for _ in procs:
+                core_id, state, error = results.get(timeout=timeout)
+                if error:
+                    raise RuntimeError(f"Núcleo {core_id}: {error}")
+                states[core_id] = state
+        except queue.Empty:
+            raise TimeoutError(f"Los núcleos no terminaron en {timeout} s")
+        finally:
+            for proc in procs:
+                if proc.is_alive() and None in states:
+                    proc.terminate()
+                proc.join()
+        return states
+
+    def close(self):
+        self.memory.close()
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LOGICA-8: varios núcleos sobre memoria compartida")
+    parser.add_argument("file", help="Programa .hex, .bin o .asm (cargado en $00)")
+    parser.add_argument("--entry", action="append", type=lambda s: int(s, 0),
+                        help="PC inicial de un núcleo (repetir por núcleo; por defecto dos en $00)")
+    parser.add_argument("--arbitration", choices=ARBITRATIONS, default=ARB_FREE)
+    parser.add_argument("--quantum", type=int, default=QUANTUM, help="Ciclos por turno (round_robin)")
+    parser.add_argument("--max-cycles", type=int, default=DEFAULT_MAX_CYCLES, help="Ciclos por núcleo")
+    parser.add_argument("--in-process", action="store_true",
+                        help="Entrelazado determinista en un solo proceso (para pruebas)")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    from logica8 import read_program
+    try:
+        bytecode = read_program(args.file)
+    except (OSError, ValueError) as e:
+        print(f"[SISTEMA] Error: {e}", file=sys.stderr)
+        return 1
+    entries = args.entry or [0x00, 0x00]
+    with MultiCore() as system:
+        system.load_image(bytecode)
+        if args.in_process:
+            states = system.run_interleaved(entries, args.max_cycles, args.quantum)
+        else:
+            states = system.run(entries, args.max_cycles, args.arbitration, args.quantum)
+        image = system.memory.dump_image()
+    if args.json:
+        print(json.dumps({"cores": states, "memory": image.hex()}))
+    else:
+        for s in states:
+            print(f"core {s['core']}: A=${s['A']:02X} X=${s['X']:02X} PC=${s['PC']:02X} "
+                  f"halt_reason={s['halt_reason']} cycles={s['cycles']} instructions={s['instructions']}")
+        for row in range(0, len(image), 16):
+            print(f"${row:02X}: " + image[row:row + 16].hex(" ").upper())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
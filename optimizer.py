@@ -0,0 +1,343 @@
+from assembler import ASM_TO_HEX, SINGLE_BYTE_INSTR, parse_value
+from cpu import INSTR_CYCLES
+
+# Optimizador de mirilla (peephole) para el ensamblador. Trabaja sobre una
+# representación intermedia con las etiquetas todavía simbólicas, de modo que al
+# quitar o fusionar instrucciones las etiquetas se recolocan solas al emitir.
+#
+# Instrucción: [mnemónico, argumento, etiquetas], donde el argumento es None (1 byte),
+# un entero (inmediato o dirección de STA) o el nombre de una etiqueta (JMP/BEQ).
+#
+# Se conserva el estado observable: A, X, carry, zero y las escrituras en memoria al
+# llegar a HALT o salirse del programa, y todo el estado en los bucles sin salida. PC
+# y los bytes del propio código cambian (el programa es más corto).
+
+BRANCH_INSTR = frozenset({"JMP", "BEQ"})
+MAX_PASSES = 32
+
+REGS = frozenset({"A", "X", "C", "Z"})
+# Todo lo observable: registros, flags y las 256 posiciones de memoria
+ALL = REGS | frozenset(range(256))
+
+# (usa, define) de cada instrucción. STA define la posición de memoria de su argumento.
+_EFFECTS = {
+    "LDA": (frozenset(), frozenset("AZ")),
+    "ADD": (frozenset("A"), frozenset("ACZ")),
+    "SUB": (frozenset("A"), frozenset("ACZ")),
+    "AND": (frozenset("A"), frozenset("AZ")),
+    "OR": (frozenset("A"), frozenset("AZ")),
+    "XOR": (frozenset("A"), frozenset("AZ")),
+    "NOT": (frozenset("A"), frozenset("AZ")),
+    "LDX": (frozenset(), frozenset("XZ")),
+    "INX": (frozenset("X"), frozenset("XZ")),
+    "DEX": (frozenset("X"), frozenset("XZ")),
+    "STA": (frozenset("A"), frozenset()),
+    "JMP": (frozenset(), frozenset()),
+    "BEQ": (frozenset("Z"), frozenset()),
+    "HALT": (ALL, frozenset()),
+}
+
+# Pares (primera, segunda) -> función(a, b) que da la instrucción equivalente, y si
+# el resultado solo es válido con el carry muerto (la suma plegada no da el mismo carry)
+_FOLDS = {
+    ("ADD", "ADD"): (lambda a, b: ("ADD", (a + b) & 0xFF), True),
+    ("SUB", "SUB"): (lambda a, b: ("SUB", (a + b) & 0xFF), True),
+    ("ADD", "SUB"): (lambda a, b: ("ADD", (a - b) & 0xFF), True),
+    ("SUB", "ADD"): (lambda a, b: ("ADD", (b - a) & 0xFF), True),
+    ("AND", "AND"): (lambda a, b: ("AND", a & b), False),
+    ("OR", "OR"): (lambda a, b: ("OR", a | b), False),
+    ("XOR", "XOR"): (lambda a, b: ("XOR", a ^ b), False),
+    ("LDA", "ADD"): (lambda a, b: ("LDA", (a + b) & 0xFF), True),
+    ("LDA", "SUB"): (lambda a, b: ("LDA", (a - b) & 0xFF), True),
+    ("LDA", "AND"): (lambda a, b: ("LDA", a & b), False),
+    ("LDA", "OR"): (lambda a, b: ("LDA", a | b), False),
+    ("LDA", "XOR"): (lambda a, b: ("LDA", a ^ b), False),
+    ("LDA", "NOT"): (lambda a, b: ("LDA", ~a & 0xFF), False),
+    ("LDX", "INX"): (lambda a, b: ("LDX", (a + 1) & 0xFF), False),
+    ("LDX", "DEX"): (lambda a, b: ("LDX", (a - 1) & 0xFF), False),
+}
+
+# Pares que se anulan entre sí (solo cambian zero)
+_CANCELS = {("NOT", "NOT"), ("INX", "DEX"), ("DEX", "INX")}
+
+# Instrucciones neutras para A: (mnemónico, argumento) -> flags que modifican de todos
+# modos (deben estar muertos para quitarlas)
+_IDENTITIES = {
+    ("ADD", 0): frozenset("CZ"), ("SUB", 0): frozenset("CZ"),
+    ("AND", 0xFF): frozenset("Z"), ("OR", 0): frozenset("Z"), ("XOR", 0): frozenset("Z"),
+}
+
+
+# --- REPRESENTACIÓN INTERMEDIA ---
+
+def build_program(listing, labels):
+    """
+    Reconstruye el programa a partir del listado de _assemble y sus etiquetas.
+    Devuelve (instrucciones, etiquetas finales) o None con el motivo si el programa
+    depende de su disposición en memoria y no se puede recolocar.
+    """
+    if not listing:
+        return None, "programa vacío"
+    by_addr = {}
+    for name, addr in labels.items():
+        by_addr.setdefault(addr, []).append(name)
+    size = listing[-1][0] + (1 if listing[-1][1] in SINGLE_BYTE_INSTR else 2)
+    program = []
+    for addr, mnemonico, arg, _ in listing:
+        if mnemonico in SINGLE_BYTE_INSTR:
+            value = None
+        elif arg in labels:
+            if mnemonico not in BRANCH_INSTR:
+                return None, f"la etiqueta '{arg}' se usa como dato ({mnemonico})"
+            value = arg
+        else:
+            value = parse_value(arg)
+            if mnemonico in BRANCH_INSTR:
+                return None, f"salto a dirección absoluta ({mnemonico} {arg})"
+            if mnemonico == "STA" and value < size:
+                return None, f"STA sobre el propio código (${value:02X})"
+        program.append([mnemonico, value, by_addr.pop(addr, [])])
+    tail = by_addr.pop(size, [])
+    return (program, tail), None
+
+
+def emit(program, tail):
+    """Devuelve (bytecode, listado) con las etiquetas resueltas a sus nuevas direcciones."""
+    addrs = {}
+    addr = 0
+    for mnemonico, _, names in program:
+        for name in names:
+            addrs[name] = addr
+        addr += 1 if mnemonico in SINGLE_BYTE_INSTR else 2
+    for name in tail:
+        addrs[name] = addr
+    bytecode = []
+    listing = []
+    for mnemonico, value, _ in program:
+        pos = len(bytecode)
+        if value is None:
+            bytecode.append(ASM_TO_HEX[mnemonico])
+            listing.append((pos, mnemonico, "", pos))
+        elif isinstance(value, str):
+            bytecode.extend((ASM_TO_HEX[mnemonico], addrs[value]))
+            listing.append((pos, mnemonico, value, pos))
+        else:
+            bytecode.extend((ASM_TO_HEX[mnemonico], value))
+            listing.append((pos, mnemonico, f"0x{value:02X}", pos))
+    return bytecode, listing
+
+
+def static_cost(program):
+    """(bytes, ciclos) recorriendo cada instrucción una vez: estimación estática."""
+    size = sum(1 if m in SINGLE_BYTE_INSTR else 2 for m, _, _ in program)
+    return size, sum(INSTR_CYCLES[ASM_TO_HEX[m]] for m, _, _ in program)
+
+
+# --- ANÁLISIS ---
+
+def _successors(program, targets):
+    """Sucesores de cada instrucción; len(program) representa salirse del programa."""
+    n = len(program)
+    succ = []
+    for i, (mnemonico, value, _) in enumerate(program):
+        if mnemonico == "HALT":
+            succ.append(())
+        elif mnemonico == "JMP":
+            succ.append((targets[value],))
+        elif mnemonico == "BEQ":
+            succ.append((targets[value], i + 1))
+        else:
+            succ.append((i + 1,))
+    succ.append(())
+    return succ
+
+
+def _targets(program, tail):
+    targets = {name: i for i, (_, _, names) in enumerate(program) for name in names}
+    targets.update((name, len(program)) for name in tail)
+    return targets
+
+
+def _reachable(succ, start=0):
+    seen = {start}
+    pending = [start]
+    while pending:
+        for s in succ[pending.pop()]:
+            if s not in seen:
+                seen.add(s)
+                pending.append(s)
+    return seen
+
+
+def _effects(instr):
+    uses, defs = _EFFECTS[instr[0]]
+    if instr[0] == "STA":
+        defs = frozenset((instr[1],))
+    return uses, defs
+
+
+def liveness(program, succ):
+    """
+    Lo que sigue vivo (puede observarse) tras cada instrucción, por análisis hacia atrás.
+    Salirse del programa observa todo; las instrucciones que no pueden llegar a un HALT
+    ni a la salida (bucles sin fin) lo observan todo también.
+    """
+    n = len(program)
+    preds = [[] for _ in range(n + 1)]
+    for i, ss in enumerate(succ):
+        for s in ss:
+            preds[s].append(i)
+    exits = [n] + [i for i, instr in enumerate(program) if instr[0] == "HALT"]
+    finishes = set(exits)
+    pending = list(exits)
+    while pending:
+        for p in preds[pending.pop()]:
+            if p not in finishes:
+                finishes.add(p)
+                pending.append(p)
+
+    effects = [_effects(instr) for instr in program]
+    live_in = [frozenset()] * n + [ALL]
+    live_out = [ALL] * n
+    changed = True
+    while changed:
+        changed = False
+        for i in range(n - 1, -1, -1):
+            out = ALL if i not in finishes else frozenset().union(*(live_in[s] for s in succ[i]))
+            uses, defs = effects[i]
+            new_in = uses | (out - defs)
+            live_out[i] = out
+            if new_in != live_in[i]:
+                live_in[i] = new_in
+                changed = True
+    return live_out
+
+
+# --- PASADAS ---
+
+def _remove(program, tail, i):
+    """Quita la instrucción i; sus etiquetas pasan a la siguiente (o al final)."""
+    names = program.pop(i)[2]
+    (program[i][2] if i < len(program) else tail).extend(names)
+
+
+def _remove_unreachable(program, tail, stats):
+    succ = _successors(program, _targets(program, tail))
+    reachable = _reachable(succ)
+    for i in range(len(program) - 1, -1, -1):
+        if i not in reachable:
+            _remove(program, tail, i)
+            stats["unreachable"] += 1
+
+
+def _thread_jumps(program, tail, stats):
+    """Encadena saltos a saltos, quita saltos a la instrucción siguiente y JMP a HALT."""
+    targets = _targets(program, tail)
+    n = len(program)
+    for i, instr in enumerate(program):
+        mnemonico, value, _ = instr
+        if mnemonico not in BRANCH_INSTR:
+            continue
+        seen = {i}
+        t = targets[value]
+        # JMP: se sigue cualquier JMP; BEQ tomado: zero=1, así que otro BEQ también salta
+        while t < n and t not in seen and program[t][0] in ("JMP", mnemonico):
+            seen.add(t)
+            value = program[t][1]
+            t = targets[value]
+        if value != instr[1]:
+            instr[1] = value
+            stats["threaded"] += 1
+        if mnemonico == "JMP" and t < n and program[t][0] == "HALT":
+            instr[0], instr[1] = "HALT", None
+            stats["threaded"] += 1
+
+    for i in range(len(program) - 1, -1, -1):
+        mnemonico, value, _ = program[i]
+        if mnemonico in BRANCH_INSTR and targets[value] == i + 1:
+            _remove(program, tail, i)
+            stats["threaded"] += 1
+            targets = _targets(program, tail)
+
+
+def _fold(program, tail, stats):
+    """Pliega pares de instrucciones, quita identidades e instrucciones muertas."""
+    live_out = liveness(program, _successors(program, _targets(program, tail)))
+    i = len(program) - 1
+    while i >= 0:
+        mnemonico, value, _ = program[i]
+        out = live_out[i]
+        nxt = program[i + 1] if i + 1 < len(program) else None
+        defs = _effects(program[i])[1]
+        if defs and not defs & out:
+            # Resultado que nadie observa (p.ej. LDA sobrescrito, STA repetido)
+            _remove(program, tail, i)
+            del live_out[i]
+            stats["dead"] += 1
+            i -= 1
+            continue
+        identity = _IDENTITIES.get((mnemonico, value))
+        if identity is not None and not identity & out:
+            _remove(program, tail, i)
+            del live_out[i]
+            stats["identity"] += 1
+            i -= 1
+            continue
+        if nxt is not None and not nxt[2]:
+            pair = (mnemonico, nxt[0])
+            nxt_out = live_out[i + 1]
+            if pair in _FOLDS:
+                fold, needs_dead_carry = _FOLDS[pair]
+                if not (needs_dead_carry and "C" in nxt_out):
+                    program[i][0], program[i][1] = fold(value, nxt[1])
+                    program.pop(i + 1)
+                    live_out[i:i + 2] = [nxt_out]
+                    stats["folded"] += 1
+                    continue
+            elif pair in _CANCELS and "Z" not in nxt_out:
+                program.pop(i + 1)
+                _remove(program, tail, i)
+                del live_out[i:i + 2]
+                stats["folded"] += 1
+                i -= 1
+                continue
+        i -= 1
+
+
+def optimize(program, tail):
+    """Aplica las pasadas hasta que no cambian nada. Devuelve las reescrituras por tipo."""
+    stats = {"unreachable": 0, "threaded": 0, "folded": 0, "identity": 0, "dead": 0}
+    for _ in range(MAX_PASSES):
+        before = sum(stats.values())
+        _remove_unreachable(program, tail, stats)
+        _thread_jumps(program, tail, stats)
+        _fold(program, tail, stats)
+        if sum(stats.values()) == before:
+            break
+    return stats
+
+
+def optimize_listing(bytecode, listing, labels):
+    """
+    Optimiza el resultado de _assemble. Devuelve (bytecode, listado, informe); si el
+    programa no se puede recolocar se devuelve igual y el informe dice por qué.
+    """
+    built, reason = build_program(listing, labels)
+    report = {"bytes_before": len(bytecode), "bytes_after": len(bytecode),
+              "cycles_before": 0, "cycles_after": 0, "rewrites": {}, "skipped": reason}
+    if built is None:
+        return bytecode, listing, report
+    program, tail = built
+    report["cycles_before"] = static_cost(program)[1]
+    report["rewrites"] = optimize(program, tail)
+    bytecode, listing = emit(program, tail)
+    report["bytes_after"], report["cycles_after"] = static_cost(program)
+    return bytecode, listing, report
+
+
+def format_report(report):
+    if report["skipped"]:
+        return f"[OPTIMIZADOR] Sin optimizar: {report['skipped']}"
+    cambios = ", ".join(f"{k}={v}" for k, v in report["rewrites"].items() if v) or "ninguno"
+    return (f"[OPTIMIZADOR] {report['bytes_before']} -> {report['bytes_after']} bytes, "
+            f"{report['cycles_before']} -> {report['cycles_after']} ciclos estimados ({cambios})")
@@ -0,0 +1,125 @@
+import json
+
+from cpu import INSTR_CYCLES
+from disassembler import DECODE_TABLE
+
+# Perfilador de ejecución: cuenta instrucciones por opcode y por dirección, ciclos y
+# accesos a memoria. Solo existe si se activa (CPU(profile=True) o Profiler(cpu)); sin
+# él, CPU.step() y CPU.run() no hacen ningún trabajo extra.
+
+HEAT_LEVELS = 5    # Niveles del mapa de calor (0 = sin actividad)
+
+
+class Profiler:
+    """
+    Se engancha a la CPU (cpu.profiler) y recibe cada instrucción en el FETCH de
+    step() o, en run(), ejecutando instrucción a instrucción con el intérprete. Los
+    ciclos de cada instrucción se atribuyen a su opcode y a su dirección; las lecturas
+    son los bytes de opcode y operando, y las escrituras llegan por un hook del Bus.
+    """
+
+    def __init__(self, cpu):
+        self.cpu = cpu
+        cpu.profiler = self
+        cpu.bus.add_write_hook(self._on_write)
+        self.reset()
+
+    def reset(self):
+        self.op_counts = [0] * 256
+        self.op_cycles = [0] * 256
+        self.pc_counts = [0] * 256
+        self.pc_cycles = [0] * 256
+        self.reads = [0] * 256
+        self.writes = [0] * 256
+        self.start_cycles = self.cpu.cycles
+        self.start_instr = self.cpu.instr_count
+
+    def close(self):
+        self.cpu.bus.remove_write_hook(self._on_write)
+        if self.cpu.profiler is self:
+            self.cpu.profiler = None
+
+    def _on_write(self, addr, length):
+        writes = self.writes
+        for a in range(addr, min(addr + length, 256)):
+            writes[a] += 1
+
+    def record(self, pc, op, cycles):
+        """Una instrucción ejecutada (o iniciada, en step()) en pc."""
+        self.op_counts[op] += 1
+        self.op_cycles[op] += cycles
+        self.pc_counts[pc] += 1
+        self.pc_cycles[pc] += cycles
+        self.reads[pc] += 1
+        entry = DECODE_TABLE[op]
+        if entry is not None and entry[1] == 2 and pc < 255:
+            self.reads[pc + 1] += 1
+
+    def run(self, max_cycles=None):
+        """Como CPU.run(), pero contando cada instrucción. Devuelve (instrucciones, ciclos)."""
+        cpu = self.cpu
+        data = cpu.memory.data
+        instr = cycles = 0
+        if cpu.micro_program and cpu.running:
+            # Instrucción a medias de step(): ya se contó en su FETCH
+            pending = cpu.pending_micro_ops
+            instr, cycles = cpu.run_interpreted(pending if max_cycles is None else min(pending, max_cycles))
+        while cpu.running:
+            pc = cpu.PC
+            op = data[pc] if pc < 256 else None
+            cost = INSTR_CYCLES.get(op, 1)
+            if max_cycles is not None and cycles + cost > max_cycles:
+                break
+            i, c = cpu.run_interpreted(cost)
+            if i:
+                self.record(pc, op, c)
+            instr += i
+            cycles += c
+            if cpu.stop_reason is not None:
+                break
+        return instr, cycles
+
+    # --- RESULTADOS ---
+
+    @property
+    def total_cycles(self):
+        return self.cpu.cycles - self.start_cycles
+
+    @property
+    def total_instr(self):
+        return self.cpu.instr_count - self.start_instr
+
+    def heat(self, kind="exec"):
+        """Contadores por dirección: 'exec' (instrucciones), 'reads' o 'writes'."""
+        return {"exec": self.pc_counts, "reads": self.reads, "writes": self.writes}[kind]
+
+    def heat_levels(self, kind="exec"):
+        """Nivel 0..HEAT_LEVELS-1 por dirección, en escala logarítmica respecto al máximo."""
+        counts = self.heat(kind)
+        top = max(counts)
+        if not top:
+            return [0] * 256
+        span = top.bit_length() - 1
+        if not span:
+            return [HEAT_LEVELS - 1 if n else 0 for n in counts]
+        return [1 + (n.bit_length() - 1) * (HEAT_LEVELS - 2) // span if n else 0 for n in counts]
+
+    def to_dict(self):
+        opcodes = {}
+        for op, count in enumerate(self.op_counts):
+            if count:
+                entry = DECODE_TABLE[op]
+                name = entry[0] if entry is not None else f"0x{op:02X}"
+                opcodes[name] = {"opcode": op, "count": count, "cycles": self.op_cycles[op]}
+        return {
+            "cycles": self.total_cycles,
+            "instructions": self.total_instr,
+            "opcodes": opcodes,
+            "pc": {f"{pc:02X}": {"count": n, "cycles": self.pc_cycles[pc]}
+                   for pc, n in enumerate(self.pc_counts) if n},
+            "memory": {"reads": self.reads, "writes": self.writes},
+        }
+
+    def export_json(self, filename="profile.json"):
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
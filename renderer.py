@@ -0,0 +1,135 @@
+import os
+import sys
+import time
+
+# Renderizado del panel en terminal por diferencias: se guarda el último fotograma y
+# solo se reescriben (con posicionamiento ANSI del cursor) las celdas, campos de la
+# cabecera y líneas del historial que han cambiado.
+
+DEFAULT_FPS = 30
+
+CLEAR_SCREEN = "\033[2J\033[H"
+CLEAR_LINE = "\033[K"
+CLEAR_BELOW = "\033[J"
+
+GRID_ROW = 5          # Fila de pantalla (1-based) de la fila $00 de la memoria
+GRID_COL = 5          # Columna de la primera celda
+LOG_COL = GRID_COL + 48
+FRAME_ROWS = GRID_ROW + 16     # Última fila del fotograma (borde inferior)
+
+CELL_STYLES = ("\033[90m", "\033[36m", "\033[42m\033[30m")   # Cero, distinto de cero, PC
+# Mapa de calor del perfilador: un fondo por nivel (el nivel 0 usa los estilos normales)
+HEAT_STYLES = (None, "\033[44m\033[97m", "\033[46m\033[30m", "\033[43m\033[30m", "\033[41m\033[97m")
+
+
+def _goto(row, col):
+    return f"\033[{row};{col}H"
+
+
+def header_fields(cpu):
+    """Cabecera como lista de (campo, texto); campo es None en las partes fijas."""
+    # Los flags se rellenan a 3 caracteres para que el ancho no cambie con su valor
+    c_f = "ON " if cpu.carry else "OFF"
+    z_f = "ON " if cpu.zero else "OFF"
+    return [
+        (None, " LOGICA-8 | A: "), ("A", f"{cpu.A:02X} ({cpu.A:03d})"),
+        (None, " | X: "), ("X", f"{cpu.X:02X} ({cpu.X:03d})"),
+        (None, " | PC:$"), ("PC", f"{cpu.PC:02X}"),
+        (None, " | CARRY:"), ("CARRY", c_f),
+        (None, " | ZERO:"), ("ZERO", z_f), (None, " "),
+    ]
+
+
+class TerminalRenderer:
+    """
+    Dibuja el estado de la CPU (cabecera, memoria 16x16 e historial) sin limpiar la
+    pantalla con un subproceso. El primer fotograma se dibuja completo; los siguientes
+    solo envían lo que cambió. Con fps, los redibujados se limitan a esa frecuencia:
+    draw() devuelve False sin hacer nada si aún no toca (salvo con force=True).
+    Si heat tiene un tipo de actividad ("exec", "reads" o "writes") y la CPU tiene
+    perfilador, las celdas se colorean según su mapa de calor.
+    """
+
+    def __init__(self, out=None, fps=DEFAULT_FPS):
+        self.out = out if out is not None else sys.stdout
+        self.min_interval = 1.0 / fps if fps else 0.0
+        self.last_draw = None
+        self.frames = 0
+        self.skipped = 0
+        self.heat = None
+        if os.name == "nt":
+            os.system("")     # Activa las secuencias ANSI en la consola de Windows
+        self.invalidate()
+
+    def invalidate(self):
+        """Olvida el último fotograma: el siguiente se dibuja completo."""
+        self.header = None
+        self.header_len = None
+        self.cells = [None] * 256
+        self.log_lines = [None] * 16
+
+    def draw(self, cpu, force=False):
+        now = time.perf_counter()
+        if not force and self.last_draw is not None and now - self.last_draw < self.min_interval:
+            self.skipped += 1
+            return False
+        self.last_draw = now
+        self.frames += 1
+
+        parts = []
+        fields = header_fields(cpu)
+        header_len = sum(len(text) for _, text in fields)
+        if header_len != self.header_len:
+            # Primer fotograma (o cambió el ancho de la cabecera): todo el marco
+            if self.header_len is None:
+                parts.append(CLEAR_SCREEN)
+                parts.append(_goto(4, 1) + "     0  1  2  3  4  5  6  7  8  9  A  B  C  D  E  F        HISTORIAL")
+                for i in range(16):
+                    parts.append(_goto(GRID_ROW + i, 1) + f"{i*16:02X}: ")
+                parts.append(_goto(FRAME_ROWS, 1) + "═"*105)
+            border = "═" * header_len
+            parts.append(_goto(1, 1) + f"╔{border}╗" + CLEAR_LINE)
+            parts.append(_goto(2, 1) + "║" + "".join(text for _, text in fields) + "║" + CLEAR_LINE)
+            parts.append(_goto(3, 1) + f"╚{border}╝" + CLEAR_LINE)
+            self.header_len = header_len
+        else:
+            col = 2
+            for (name, text), old in zip(fields, self.header):
+                if name is not None and text != old[1]:
+                    parts.append(_goto(2, col) + text)
+                col += len(text)
+        self.header = fields
+
+        # Celdas de memoria: (valor, estilo) por dirección
+        image = cpu.memory.dump_image()
+        cells = self.cells
+        pc = cpu.PC
+        levels = None
+        if self.heat and cpu.profiler is not None:
+            levels = cpu.profiler.heat_levels(self.heat)
+        for idx in range(256):
+            v = image[idx]
+            if idx == pc:
+                style = CELL_STYLES[2]
+            elif levels is not None and levels[idx]:
+                style = HEAT_STYLES[levels[idx]]
+            else:
+                style = CELL_STYLES[1 if v else 0]
+            cell = (v, style)
+            if cell != cells[idx]:
+                cells[idx] = cell
+                parts.append(f"{_goto(GRID_ROW + (idx >> 4), GRID_COL + 3*(idx & 15))}{style}{v:02X}\033[0m")
+
+        log = cpu.log
+        for i in range(16):
+            line = log[i] if i < len(log) else ""
+            if line != self.log_lines[i]:
+                self.log_lines[i] = line
+                text = f"   │ {line}" if line else ""
+                parts.append(_goto(GRID_ROW + i, LOG_COL) + text + CLEAR_LINE)
+
+        # El cursor queda bajo el marco para el prompt; se borra lo escrito debajo
+        parts.append(_goto(FRAME_ROWS + 1, 1) + CLEAR_BELOW)
+        self.out.write("".join(parts))
+        self.out.flush()
+        return True
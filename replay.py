@@ -0,0 +1,331 @@
+import gzip
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+
+from cpu import CPU, INSTR_CYCLES
+from devices import Device
+from tracer import TRACE_OFF
+
+# Grabación y reproducción deterministas de una ejecución. En lugar del log completo
+# se guardan la imagen inicial, un registro compacto de cambios (escrituras del Bus,
+# resultado de cada BEQ y los bytes leídos de dispositivos, la única fuente de
+# indeterminismo) y fotogramas clave periódicos. Para ir a un ciclo cualquiera se
+# restaura el fotograma clave anterior y se vuelve a ejecutar desde él, sirviendo las
+# lecturas de dispositivos desde el registro.
+
+KEYFRAME_INTERVAL = 4096      # Ciclos entre fotogramas clave
+REPLAY_MAGIC = b"L8REPLAY"
+
+# Registros de un fotograma clave: siempre en el límite entre instrucciones, así que
+# no hace falta el estado del micro-programa
+KEYFRAME_FIELDS = ("A", "X", "PC", "IR", "operand", "carry", "zero", "running", "cycles", "instr_count")
+
+_HEAD = struct.Struct("<IIIIIQ")     # fotogramas, escrituras, lecturas, BEQ, rangos, ciclo final
+_RANGE = struct.Struct("<BH")        # inicio y longitud de un rango de dispositivo
+_KEY = struct.Struct("<BBHBBBBBQQIII")   # registros, ciclos, instrucciones y posiciones en el registro
+
+_BEQ = 0x06
+
+
+class ReplayError(Exception):
+    pass
+
+
+class Recording:
+    """
+    Una ejecución grabada. Las escrituras llevan el ciclo en que terminó su
+    instrucción; las lecturas de dispositivos solo importan por su orden. Cada
+    fotograma clave es (registros, imagen, nº de escrituras, lecturas y BEQ previos).
+    """
+
+    def __init__(self, device_ranges=()):
+        self.device_ranges = list(device_ranges)   # (inicio, longitud)
+        self.keyframes = []
+        self.write_cycles = array("Q")
+        self.write_addrs = bytearray()
+        self.write_values = bytearray()
+        self.input_addrs = bytearray()
+        self.input_values = bytearray()
+        self.branches = bytearray()     # Un bit por BEQ ejecutado: 1 = salto tomado
+        self.n_branches = 0
+        self.end_cycle = 0
+
+    def add_branch(self, taken):
+        if self.n_branches & 7 == 0:
+            self.branches.append(0)
+        if taken:
+            self.branches[-1] |= 1 << (self.n_branches & 7)
+        self.n_branches += 1
+
+    def branch(self, n):
+        return bool(self.branches[n >> 3] >> (n & 7) & 1)
+
+    def keyframe_cycles(self):
+        return [kf[0][KEYFRAME_FIELDS.index("cycles")] for kf in self.keyframes]
+
+    def writes(self, start=0, end=None):
+        """Escrituras (ciclo, dirección, valor) con el ciclo en (start, end]."""
+        lo = bisect_right(self.write_cycles, start)
+        hi = len(self.write_cycles) if end is None else bisect_right(self.write_cycles, end)
+        return [(self.write_cycles[i], self.write_addrs[i], self.write_values[i]) for i in range(lo, hi)]
+
+    # --- FICHERO ---
+
+    def save(self, filename):
+        """Guarda la grabación en un fichero binario comprimido con gzip."""
+        cycles = array("Q", self.write_cycles)
+        if sys.byteorder == "big":
+            cycles.byteswap()
+        with gzip.open(filename, "wb") as f:
+            f.write(REPLAY_MAGIC)
+            f.write(_HEAD.pack(len(self.keyframes), len(self.write_cycles), len(self.input_addrs),
+                               self.n_branches, len(self.device_ranges), self.end_cycle))
+            for start, length in self.device_ranges:
+                f.write(_RANGE.pack(start, length))
+            for registers, image, n_writes, n_inputs, n_branches in self.keyframes:
+                f.write(_KEY.pack(*registers, n_writes, n_inputs, n_branches))
+                f.write(image)
+            f.write(cycles.tobytes())
+            f.write(self.write_addrs)
+            f.write(self.write_values)
+            f.write(self.input_addrs)
+            f.write(self.input_values)
+            f.write(self.branches)
+
+
+def load(filename):
+    """Lee una grabación guardada con Recording.save()."""
+    with gzip.open(filename, "rb") as f:
+        if f.read(len(REPLAY_MAGIC)) != REPLAY_MAGIC:
+            raise ValueError(f"{filename} no es una grabación de LOGICA-8")
+        n_keys, n_writes, n_inputs, n_branches, n_ranges, end_cycle = _HEAD.unpack(f.read(_HEAD.size))
+        recording = Recording(_RANGE.unpack(f.read(_RANGE.size)) for _ in range(n_ranges))
+        for _ in range(n_keys):
+            values = _KEY.unpack(f.read(_KEY.size))
+            registers = values[:5] + tuple(bool(v) for v in values[5:8]) + values[8:10]
+            recording.keyframes.append((registers, f.read(256)) + values[10:])
+        recording.write_cycles.frombytes(f.read(8 * n_writes))
+        if sys.byteorder == "big":
+            recording.write_cycles.byteswap()
+        recording.write_addrs = bytearray(f.read(n_writes))
+        recording.write_values = bytearray(f.read(n_writes))
+        recording.input_addrs = bytearray(f.read(n_inputs))
+        recording.input_values = bytearray(f.read(n_inputs))
+        recording.branches = bytearray(f.read((n_branches + 7) // 8))
+        recording.n_branches = n_branches
+        recording.end_cycle = end_cycle
+    return recording
+
+
+# --- GRABACIÓN ---
+
+def _device_ranges(bus):
+    """Rangos contiguos de direcciones servidas por un mismo dispositivo."""
+    ranges = []
+    if bus.device_map is not None:
+        previous = None
+        for addr, dev in enumerate(bus.device_map):
+            if dev is not None and dev is previous:
+                ranges[-1] = (ranges[-1][0], ranges[-1][1] + 1)
+            elif dev is not None:
+                ranges.append((addr, 1))
+            previous = dev
+    return ranges
+
+
+def _keyframe(cpu, recording):
+    registers = tuple(getattr(cpu, name) for name in KEYFRAME_FIELDS)
+    recording.keyframes.append((registers, cpu.memory.dump_image(), len(recording.write_cycles),
+                                len(recording.input_addrs), recording.n_branches))
+
+
+def record(cpu, max_cycles=None, interval=KEYFRAME_INTERVAL):
+    """
+    Ejecuta la CPU (como run(), instrucción a instrucción con el intérprete) grabando la
+    ejecución. Devuelve la Recording. Los dispositivos no deben cambiar mientras se graba.
+    """
+    bus = cpu.bus
+    recording = Recording(_device_ranges(bus))
+    if cpu.micro_program and cpu.running:
+        cpu.run_interpreted(cpu.pending_micro_ops)   # Empezar en el límite de una instrucción
+    _keyframe(cpu, recording)
+
+    pending = []
+
+    def hook(addr, length):
+        pending.extend(range(addr, addr + length))
+    bus.add_write_hook(hook)
+
+    def on_device_read(addr, value):
+        # Lo que devuelven los dispositivos es la entrada externa de la ejecución
+        recording.input_addrs.append(addr)
+        recording.input_values.append(value)
+    bus.add_read_hook(on_device_read)
+
+    data = cpu.memory.data
+    next_keyframe = cpu.cycles + interval
+    cpu.stop_reason = None
+    cycles = 0
+    try:
+        while cpu.running:
+            pc = cpu.PC
+            op = data[pc] if pc < 256 else None
+            cost = INSTR_CYCLES.get(op, 1)
+            if max_cycles is not None and cycles + cost > max_cycles:
+                break
+            if cpu.cycles >= next_keyframe:
+                _keyframe(cpu, recording)
+                next_keyframe = cpu.cycles + interval
+            i, c = cpu.run_interpreted(cost)
+            cycles += c
+            if pending:
+                # STA es la única instrucción que escribe: el valor es A
+                for addr in pending:
+                    recording.write_cycles.append(cpu.cycles)
+                    recording.write_addrs.append(addr)
+                    recording.write_values.append(cpu.A)
+                pending.clear()
+            if op == _BEQ and i:
+                recording.add_branch(cpu.zero)
+            if cpu.stop_reason is not None:
+                break
+    finally:
+        bus.remove_write_hook(hook)
+        bus.remove_read_hook(on_device_read)
+        if bus.devices:
+            bus.flush()
+        recording.end_cycle = cpu.cycles
+        if recording.keyframe_cycles()[-1] != cpu.cycles:
+            _keyframe(cpu, recording)
+    return recording
+
+
+# --- REPRODUCCIÓN ---
+
+class ReplayPort(Device):
+    """Sustituye a un dispositivo grabado: devuelve sus lecturas en orden e ignora las escrituras."""
+
+    def __init__(self, replayer, size):
+        super().__init__()
+        self.size = size
+        self.replayer = replayer
+
+    def read(self, offset):
+        replayer = self.replayer
+        recording = replayer.recording
+        n = replayer.input_pos
+        if n >= len(recording.input_addrs) or recording.input_addrs[n] != self.base + offset:
+            raise ReplayError(f"Lectura de dispositivo no grabada en ${self.base + offset:02X} "
+                              f"(ciclo {replayer.cpu.cycles})")
+        replayer.input_pos = n + 1
+        return recording.input_values[n]
+
+
+class Replayer:
+    """
+    Reproduce una Recording en una CPU propia. seek(ciclo) deja la CPU en el último
+    límite de instrucción no posterior a ese ciclo; memory_at(ciclo) reconstruye solo
+    la memoria aplicando las escrituras al fotograma clave, sin ejecutar nada.
+    """
+
+    def __init__(self, recording):
+        self.recording = recording
+        self.cpu = CPU(trace_level=TRACE_OFF)
+        self.input_pos = 0
+        for start, length in recording.device_ranges:
+            self.cpu.bus.map_device(ReplayPort(self, length), start)
+        self.key_cycles = recording.keyframe_cycles()
+        self.restore_keyframe(0)
+
+    def restore_keyframe(self, index):
+        registers, image, _, n_inputs, _ = self.recording.keyframes[index]
+        cpu = self.cpu
+        cpu.bus.load_image(image, 0)
+        for name, value in zip(KEYFRAME_FIELDS, registers):
+            setattr(cpu, name, value)
+        cpu.micro_program = ()
+        cpu.micro_pc = 0
+        cpu.stop_reason = None
+        self.input_pos = n_inputs
+
+    def seek(self, cycle):
+        """Lleva la CPU al ciclo (o al inicio de la instrucción en curso). Devuelve el ciclo alcanzado."""
+        cpu = self.cpu
+        cycle = max(0, min(cycle, self.recording.end_cycle))
+        index = bisect_right(self.key_cycles, cycle) - 1
+        # Hacia delante dentro del mismo tramo se sigue desde donde está la CPU
+        if not (self.key_cycles[index] <= cpu.cycles <= cycle):
+            self.restore_keyframe(index)
+        if cpu.running and cycle > cpu.cycles:
+            cpu.run_interpreted(cycle - cpu.cycles)
+        return cpu.cycles
+
+    def memory_at(self, cycle):
+        """Imagen de la RAM tras las instrucciones terminadas hasta 'cycle', sin ejecutar."""
+        recording = self.recording
+        index = max(0, bisect_right(self.key_cycles, cycle) - 1)
+        _, image, n_writes, _, _ = recording.keyframes[index]
+        image = bytearray(image)
+        devices = {a for start, length in recording.device_ranges for a in range(start, start + length)}
+        hi = bisect_right(recording.write_cycles, cycle)
+        for i in range(n_writes, hi):
+            addr = recording.write_addrs[i]
+            if addr not in devices:
+                image[addr] = recording.write_values[i]
+        return bytes(image)
+
+    def verify(self):
+        """
+        Vuelve a ejecutar toda la grabación comparando cada escritura, cada BEQ y cada
+        fotograma clave. Devuelve None si coincide o la descripción de la primera diferencia.
+        """
+        recording = self.recording
+        cpu = self.cpu
+        self.restore_keyframe(0)
+        writes = []
+
+        def hook(addr, length):
+            writes.extend(range(addr, addr + length))
+        cpu.bus.add_write_hook(hook)
+        data = cpu.memory.data
+        n_write = n_branch = 0
+        key = 1
+
+        def keyframe_mismatch():
+            nonlocal key
+            while key < len(self.key_cycles) and self.key_cycles[key] <= cpu.cycles:
+                registers, image = recording.keyframes[key][:2]
+                if (tuple(getattr(cpu, n) for n in KEYFRAME_FIELDS) != registers
+                        or cpu.memory.dump_image() != image):
+                    return f"fotograma clave {key} distinto en el ciclo {cpu.cycles}"
+                key += 1
+            return None
+
+        try:
+            while cpu.running and cpu.cycles < recording.end_cycle:
+                mismatch = keyframe_mismatch()
+                if mismatch:
+                    return mismatch
+                pc = cpu.PC
+                op = data[pc] if pc < 256 else None
+                i, _ = cpu.run_interpreted(INSTR_CYCLES.get(op, 1))
+                for addr in writes:
+                    expected = (recording.write_cycles[n_write], recording.write_addrs[n_write],
+                                recording.write_values[n_write]) if n_write < len(recording.write_cycles) else None
+                    if expected != (cpu.cycles, addr, cpu.A):
+                        return f"escritura distinta en el ciclo {cpu.cycles}: {expected} != {(cpu.cycles, addr, cpu.A)}"
+                    n_write += 1
+                writes.clear()
+                if op == _BEQ and i:
+                    if n_branch >= recording.n_branches or recording.branch(n_branch) != cpu.zero:
+                        return f"BEQ en ${pc:02X} distinto en el ciclo {cpu.cycles}"
+                    n_branch += 1
+        except ReplayError as e:
+            return str(e)
+        finally:
+            cpu.bus.remove_write_hook(hook)
+        if n_write != len(recording.write_cycles) or n_branch != recording.n_branches:
+            return "la ejecución termina antes que la grabación"
+        return keyframe_mismatch()
@@ -0,0 +1,264 @@
+import argparse
+import asyncio
+import itertools
+import json
+
+from assembler import compile_asm, parse_hex
+from cpu import CPU, INSTR_CYCLES, halt_reason
+from disassembler import disassemble
+from tracer import TRACE_OFF
+
+# Servidor de sesiones LOGICA-8 sobre TCP con un protocolo de líneas (válido con nc o
+# telnet). Cada conexión es una sesión con su propia CPU; las ejecuciones largas se
+# trocean en rodajas de ciclos y ceden el control al bucle de eventos entre rodajas,
+# así que un programa que no termina no bloquea a las demás sesiones.
+
+DEFAULT_PORT = 8088
+SLICE_CYCLES = 5000          # Ciclos por rodaja antes de ceder el turno (mínimo 4)
+DEFAULT_QUOTA = 10_000_000   # Ciclos totales permitidos por sesión (None = sin límite)
+MAX_SESSIONS = 256
+
+HELP = ("LOAD [@dir] bytes | ASM instr; instr; ... | STEP [n] | RUN [ciclos] | INSPECT | "
+        "MEM [dir] [n] | DISASM | RESET | QUIT")
+
+
+class ProtocolError(Exception):
+    pass
+
+
+class Session:
+    """Una CPU con su cuota de ciclos. used cuenta todo lo ejecutado con STEP y RUN."""
+
+    def __init__(self, session_id, quota=DEFAULT_QUOTA, detect_loops=True):
+        self.id = session_id
+        self.cpu = CPU(trace_level=TRACE_OFF, detect_loops=detect_loops)
+        self.quota = quota
+        self.used = 0
+        self.program = ([], 0)
+
+    @property
+    def quota_left(self):
+        return None if self.quota is None else self.quota - self.used
+
+    def state(self):
+        cpu = self.cpu
+        return {
+            "session": self.id, "A": cpu.A, "X": cpu.X, "PC": cpu.PC, "IR": cpu.IR,
+            "carry": cpu.carry, "zero": cpu.zero, "running": cpu.running,
+            "cycles": cpu.cycles, "instructions": cpu.instr_count, "quota_left": self.quota_left,
+        }
+
+
+class EmulatorServer:
+    """
+    Aloja muchas sesiones en un solo bucle asyncio. RUN ejecuta rodajas de slice_cycles
+    con CPU.run() y hace 'await asyncio.sleep(0)' entre ellas: el planificador de
+    asyncio atiende por turnos a todas las sesiones listas (round-robin cooperativo).
+    Con detect_loops, un RUN sobre un bucle infinito se detiene sin gastar la cuota.
+    """
+
+    def __init__(self, slice_cycles=SLICE_CYCLES, quota=DEFAULT_QUOTA, max_sessions=MAX_SESSIONS,
+                 detect_loops=True):
+        self.slice_cycles = max(slice_cycles, max(INSTR_CYCLES.values()))
+        self.quota = quota
+        self.max_sessions = max_sessions
+        self.detect_loops = detect_loops
+        self.sessions = {}
+        self._ids = itertools.count(1)
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        return await asyncio.start_server(self.handle_client, host, port)
+
+    async def handle_client(self, reader, writer):
+        if len(self.sessions) >= self.max_sessions:
+            writer.write(b"ERR servidor lleno\n")
+            await writer.drain()
+            writer.close()
+            return
+        session = Session(next(self._ids), self.quota, self.detect_loops)
+        self.sessions[session.id] = session
+        try:
+            writer.write(f"OK LOGICA-8 sesion {session.id}. {HELP}\n".encode())
+            await writer.drain()
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                line = line.decode("utf-8", "replace").strip()
+                if not line:
+                    continue
+                if line.upper() == "QUIT":
+                    writer.write(b"OK adios\n")
+                    await writer.drain()
+                    break
+                try:
+                    response = "OK " + await self.execute(session, line)
+                except ProtocolError as e:
+                    response = f"ERR {e}"
+                writer.write((response + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            del self.sessions[session.id]
+            writer.close()
+
+    # --- COMANDOS ---
+
+    async def execute(self, session, line):
+        """Ejecuta un comando y devuelve el texto de la respuesta (JSON salvo MEM/DISASM)."""
+        command, _, args = line.partition(" ")
+        command = command.upper()
+        handler = getattr(self, "cmd_" + command.lower(), None)
+        if handler is None:
+            raise ProtocolError(f"comando desconocido '{command}'. {HELP}")
+        result = handler(session, args.strip())
+        if asyncio.iscoroutine(result):
+            result = await result
+        return result if isinstance(result, str) else json.dumps(result)
+
+    def cmd_help(self, session, args):
+        return HELP
+
+    def cmd_load(self, session, args):
+        offset = 0
+        if args.startswith("@"):
+            head, _, args = args.partition(" ")
+            try:
+                offset = int(head[1:], 16)
+            except ValueError:
+                raise ProtocolError(f"dirección no válida '{head}'")
+        try:
+            bytecode = parse_hex(args)
+        except ValueError as e:
+            raise ProtocolError(str(e))
+        return self._load(session, bytecode, offset)
+
+    def cmd_asm(self, session, args):
+        bytecode, error = compile_asm(args.replace(";", "\n"), verbose=False)
+        if error:
+            raise ProtocolError(error.replace("\n", " | "))
+        return self._load(session, bytecode, 0)
+
+    def _load(self, session, bytecode, offset):
+        if not bytecode:
+            raise ProtocolError("programa vacío")
+        try:
+            session.cpu.load_program(bytecode, offset)
+        except ValueError as e:
+            raise ProtocolError(str(e))
+        session.program = (bytecode, offset)
+        return {"loaded": len(bytecode), "offset": offset}
+
+    def cmd_reset(self, session, args):
+        bytecode, offset = session.program
+        session.cpu.load_program(bytecode, offset)
+        return session.state()
+
+    def _count(self, args, default):
+        if not args:
+            return default
+        try:
+            value = int(args, 0)
+        except ValueError:
+            raise ProtocolError(f"número no válido '{args}'")
+        if value <= 0:
+            raise ProtocolError("el número debe ser positivo")
+        return value
+
+    def _check_quota(self, session):
+        if session.quota_left is not None and session.quota_left <= 0:
+            raise ProtocolError("cuota de ciclos agotada")
+
+    def cmd_step(self, session, args):
+        """STEP [n]: n instrucciones completas (mientras quepan en la cuota)."""
+        cpu = session.cpu
+        self._check_quota(session)
+        for _ in range(self._count(args, 1)):
+            if not cpu.running:
+                break
+            cost = INSTR_CYCLES.get(cpu.memory.data[cpu.PC], 1) if cpu.PC < 256 else 1
+            left = session.quota_left
+            if left is not None and left < cost:
+                break
+            session.used += self._guarded(cpu.run, cost)[1]
+        return session.state()
+
+    async def cmd_run(self, session, args):
+        """RUN [ciclos]: hasta HALT, bucle infinito, el límite o la cuota, por rodajas."""
+        cpu = session.cpu
+        limit = self._count(args, None)
+        self._check_quota(session)
+        total = 0
+        reason = None
+        while cpu.running:
+            want = self.slice_cycles if limit is None else min(self.slice_cycles, limit - total)
+            left = session.quota_left
+            budget = want if left is None else min(want, left)
+            cycles = self._guarded(cpu.run, budget)[1] if budget > 0 else 0
+            session.used += cycles
+            total += cycles
+            if cpu.stop_reason is not None:
+                reason = cpu.stop_reason
+                break
+            if cycles == 0:
+                # La siguiente instrucción no cabe en lo que queda del límite o la cuota
+                reason = "quota" if left is not None and left <= want else "limit"
+                break
+            await asyncio.sleep(0)
+        state = session.state()
+        state["stop"] = reason or halt_reason(cpu)
+        state["run_cycles"] = total
+        return state
+
+    def _guarded(self, run, budget):
+        try:
+            return run(budget)
+        except IndexError as e:
+            raise ProtocolError(f"fallo de ejecución: {e}")
+
+    def cmd_inspect(self, session, args):
+        return session.state()
+
+    def cmd_mem(self, session, args):
+        parts = args.split()
+        try:
+            start = int(parts[0], 16) if parts else 0
+            length = int(parts[1], 0) if len(parts) > 1 else 256 - start
+        except ValueError:
+            raise ProtocolError("uso: MEM [dir hex] [n]")
+        image = session.cpu.memory.dump_image(max(0, start), min(256, start + length))
+        return image.hex(" ").upper()
+
+    def cmd_disasm(self, session, args):
+        return " | ".join(disassemble(session.cpu.memory.dump_image(), pc=session.cpu.PC))
+
+
+async def serve(host="127.0.0.1", port=DEFAULT_PORT, **options):
+    server = await EmulatorServer(**options).start(host, port)
+    addrs = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+    print(f"[SISTEMA] Servidor LOGICA-8 escuchando en {addrs}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LOGICA-8: servidor de sesiones (protocolo de líneas)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--slice", type=int, default=SLICE_CYCLES, help="Ciclos por rodaja")
+    parser.add_argument("--quota", type=int, default=DEFAULT_QUOTA, help="Ciclos por sesión (0 = sin límite)")
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    parser.add_argument("--no-loop-detection", action="store_true",
+                        help="No detener los bucles infinitos (consumen la cuota)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, slice_cycles=args.slice,
+                          quota=args.quota or None, max_sessions=args.max_sessions,
+                          detect_loops=not args.no_loop_detection))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@
 from cpu import *
 from assembler import *
 
-def run_tests():
+def run_tests(interactive=True):
     print("\n[ INICIANDO TEST DE SISTEMA LOGICA-8 ]\n")
     cpu = CPU()
     tests_passed = 0
@@ -103,5 +103,620 @@ def run_tests():
     val = cpu.bus.read(0x10)
     assert_test("BUS/MEMORIA: Verificación de escritura y lectura física", val == 0xAA)
 
+    # --- TEST 11: Ejecución rápida (run) frente a step() ---
+    from sample_programs import PROGRAMS
+    _, bytecode, offset = PROGRAMS["7"]
+    lenta = CPU()
+    lenta.load_program(bytecode, offset)
+    while lenta.running: lenta.step()
+    esperado = (lenta.A, lenta.X, lenta.PC, lenta.carry, lenta.zero, list(lenta.memory.data), lenta.cycles)
+    rapida = CPU()
+    rapida.load_program(bytecode, offset)
+    instr, ciclos = rapida.run()
+    obtenido = (rapida.A, rapida.X, rapida.PC, rapida.carry, rapida.zero, list(rapida.memory.data), ciclos)
+    assert_test("RUN: Mismo estado y ciclos que step()", obtenido == esperado and instr == lenta.instr_count)
+
+    # --- TEST 12: Niveles de traza ---
+    # Con la traza desactivada no se registra nada; el historial en pantalla se limita a 15 líneas
+    silenciosa = CPU(trace_level=TRACE_OFF)
+    silenciosa.load_program(bytecode, offset)
+    while silenciosa.running: silenciosa.step()
+    detallada = CPU(trace_level=TRACE_UOP)
+    detallada.load_program(bytecode, offset)
+    while detallada.running: detallada.step()
+    traza_ok = (len(silenciosa.tracer.history) == 0 and len(detallada.log) == 15
+                and detallada.log[-1] == "HALT ejecutado" and silenciosa.A == detallada.A)
+    assert_test("TRAZA: Niveles OFF/uOP y buffer circular de pantalla", traza_ok)
+
+    # --- TEST 13: Volcado de traza en streaming ---
+    import json, os, tempfile
+    from tracer import Tracer, TextTraceSink, BinaryTraceSink, read_trace
+    with tempfile.TemporaryDirectory() as tmp:
+        rutas = [os.path.join(tmp, n) for n in ("t.log", "t.bin", "t.gz")]
+        streaming = CPU()
+        streaming.tracer = Tracer(TRACE_UOP, history_limit=0)
+        streaming.tracer.add_sink(TextTraceSink(rutas[0]))
+        streaming.tracer.add_sink(BinaryTraceSink(rutas[1], compress=False))
+        streaming.tracer.add_sink(BinaryTraceSink(rutas[2]))
+        streaming.load_program(bytecode, offset)
+        while streaming.running: streaming.step()
+        streaming.tracer.close()
+        lecturas = [list(read_trace(r)) for r in rutas]
+        # Un texto sin cabecera se lee entero, también su primera línea
+        sin_cabecera = os.path.join(tmp, "plano.log")
+        with open(sin_cabecera, "w", encoding="utf-8") as f:
+            f.write("\n".join(lecturas[0][:3]) + "\n")
+        # max_bytes cuenta bytes: con texto no ASCII se rota a tiempo
+        rotada = TextTraceSink(os.path.join(tmp, "rota.log"), max_bytes=2000, buffer_size=1)
+        for i in range(200):
+            rotada.write((0.0, "ñandú {}", (i,)))
+        rotada.close()
+        tamanos = [os.path.getsize(os.path.join(tmp, n)) for n in ("rota.log.1", "rota.log.2")]
+        sink_ok = (len(streaming.tracer.history) == 0 and len(lecturas[0]) > 0
+                   and all(t < 2000 + 64 for t in tamanos)
+                   and lecturas[0] == lecturas[1] == lecturas[2]
+                   and list(read_trace(sin_cabecera)) == lecturas[0][:3])
+    assert_test("TRAZA: Sinks texto/binario/gzip y lectura perezosa", sink_ok)
+
+    # --- TEST 14: Traductor de bloques (JIT) frente al intérprete ---
+    # Incluye código automodificable: el STA reescribe el operando del ADD del bucle
+    automodificable = [
+        0x0B, 0x03,  # 00: LDX #3
+        0x02, 0x01,  # 02: ADD #1   <- su operando se sobrescribe con A
+        0x03, 0x03,  # 04: STA $03
+        0x0D,        # 06: DEX
+        0x06, 0x0B,  # 07: BEQ $0B
+        0x04, 0x02,  # 09: JMP $02
+        0xFF         # 0B: HALT
+    ]
+    jit_ok = True
+    invalidaciones = 0
+    for prog, off in [(bytecode, offset), (automodificable, 0), (PROGRAMS["5"][1], 0)]:
+        interp, traducida = CPU(trace_level=TRACE_OFF), CPU(trace_level=TRACE_OFF, jit=True)
+        for c in (interp, traducida):
+            c.load_program(prog, off)
+            c.run(max_cycles=5000)
+        jit_ok = jit_ok and all(getattr(interp, r) == getattr(traducida, r)
+                                for r in ("A", "X", "PC", "carry", "zero", "cycles", "instr_count"))
+        jit_ok = jit_ok and list(interp.memory.data) == list(traducida.memory.data)
+        invalidaciones += traducida.jit.invalidations
+    # Tras unos step() (con o sin instrucción a medias), run() respeta max_cycles
+    for pasos in (2, 3):
+        interp = CPU(trace_level=TRACE_OFF, debug_sink=None)
+        traducida = CPU(trace_level=TRACE_OFF, jit=True, debug_sink=None)
+        for c in (interp, traducida):
+            c.load_program(PROGRAMS["5"][1], 0)
+            for _ in range(pasos): c.step()
+        jit_ok = (jit_ok and interp.run(max_cycles=100) == traducida.run(max_cycles=100)
+                  and interp.cycles == traducida.cycles <= pasos + 100
+                  and interp.registers() == traducida.registers())
+    assert_test("JIT: Bloques traducidos idénticos al intérprete (con automodificación)",
+                jit_ok and invalidaciones > 0)
+
+    # --- TEST 15: Memoria respaldada por fichero (mmap) e imágenes en bloque ---
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "ram.bin")
+        mapeada = CPU(trace_level=TRACE_OFF, memory_file=ruta)
+        mapeada.load_program(bytecode, offset)
+        mapeada.run()
+        mapeada.memory.flush()
+        with open(ruta, "rb") as f:
+            externa = f.read()
+        imagen_ok = (externa == mapeada.memory.dump_image() and externa[0x50] == 15
+                     and mapeada.memory.dump_image(0x00, len(bytecode)) == bytes(bytecode))
+        mapeada.memory.close()
+    assert_test("MEMORIA: Imagen en bloque y volcado visible en fichero mmap", imagen_ok)
+
+    # --- TEST 16: Dispositivos mapeados en el Bus ---
+    # El programa lee el contador de ciclos como operando de un LDA en $F7 y envía el
+    # valor al puerto de salida ($F0). step(), run() y el JIT deben coincidir.
+    from devices import CharOutputPort, CycleCounter
+    imagen = [0x00] * 0xFD
+    imagen[0x00:0x0A] = [0x0B, 3, 0x04, 0xF7, 0x0D, 0x06, 0x09, 0x04, 0xF7, 0xFF]
+    imagen[0xF7] = 0x01                                   # F7: LDA [contador]
+    imagen[0xF9:0xFD] = [0x03, 0xF0, 0x04, 0x04]          # F9: STA $F0 / JMP $04
+    salidas = []
+    for modo in ("step", "run", "jit"):
+        dev_cpu = CPU(trace_level=TRACE_OFF, jit=(modo == "jit"))
+        texto = []
+        dev_cpu.bus.map_device(CharOutputPort(texto.append), 0xF0)
+        dev_cpu.bus.map_device(CycleCounter(dev_cpu), 0xF8, 1)
+        dev_cpu.load_program(imagen)
+        if modo == "step":
+            while dev_cpu.running: dev_cpu.step()
+        else:
+            dev_cpu.run()
+        salidas.append(("".join(texto), len(texto), dev_cpu.A, dev_cpu.cycles))
+    # Un STA al contador lo pone a cero en el ciclo de la escritura, también en run() y el JIT
+    reinicio = [0x02, 1, 0x02, 1, 0x02, 1, 0x03, 0xF1, 0x02, 1, 0x02, 1, 0x04, 0xF0] + [0x00] * 0xE6
+    reinicio[0xF0], reinicio[0xF3] = 0x01, 0xFF           # F0: LDA [contador] / F3: HALT
+    reinicios = []
+    for modo in ("step", "run", "jit"):
+        dev_cpu = CPU(trace_level=TRACE_OFF, jit=(modo == "jit"), debug_sink=None)
+        dev_cpu.bus.map_device(CycleCounter(dev_cpu), 0xF1)
+        dev_cpu.load_program(reinicio)
+        if modo == "step":
+            while dev_cpu.running: dev_cpu.step()
+        else:
+            dev_cpu.run()
+        reinicios.append(dev_cpu.A)
+    dev_ok = (salidas[0] == salidas[1] == salidas[2] and salidas[0][0] == "\x08\x19*" and salidas[0][1] == 1
+              and reinicios == [13, 13, 13])
+    assert_test("BUS: Puerto de salida por lotes y contador de ciclos", dev_ok, str((salidas, reinicios)))
+
+    # --- TEST 17: Ejecución vectorizada (BatchCPU) ---
+    try:
+        from batch_cpu import BatchCPU
+    except ImportError:
+        print("  [SKIP] BATCH: NumPy no disponible")
+    else:
+        lote = BatchCPU(3)
+        lote.load_program(bytecode, offset)
+        lote.memory[1, 0x03] = 5                  # Instancia 1: LDX #5 en lugar de #3
+        lote.memory[2, 0x05] = 0                  # Instancia 2: ADD #0
+        finales = lote.run(max_cycles=1000)
+        lote_ok = list(finales["A"]) == [15, 25, 0] and all(lote.state(i)["status"] == "halted" for i in range(3))
+        unica = CPU(trace_level=TRACE_OFF)
+        unica.load_program(bytecode, offset)
+        unica.run()
+        lote_ok = lote_ok and int(finales["cycles"][0]) == unica.cycles and lote.state(0)["memory"] == unica.memory.dump_image()
+        assert_test("BATCH: Lockstep con NumPy igual que CPU.run()", lote_ok)
+
+    # --- TEST 18: Ejecución por lotes en varios procesos ---
+    from batch_runner import find_programs, run_corpus, write_results
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "a_mult.hex"), "w") as f:
+            f.write(" ".join(f"{b:02X}" for b in bytecode) + "  ; multiplicación\n")
+        with open(os.path.join(tmp, "b_bucle.hex"), "w") as f:
+            f.write("01 00 02 01 03 FF 04 02\n")
+        with open(os.path.join(tmp, "c_fuente.asm"), "w") as f:
+            f.write(source)
+        with open(os.path.join(tmp, "d_roto.asm"), "w") as f:
+            f.write("FOO 1\n")
+        salida = os.path.join(tmp, "res.jsonl")
+        total = write_results(run_corpus(find_programs(tmp), max_cycles=500, workers=2), salida)
+        with open(salida) as f:
+            filas = [json.loads(linea) for linea in f]
+    razones = [fila["halt_reason"] for fila in filas]
+    lotes_ok = (total == 4 and razones == ["halted", "timeout", "halted", "error"]
+                and filas[0]["cycles"] == lenta.cycles and filas[2]["A"] == 5)
+    assert_test("LOTES: Corpus .hex/.asm en ProcessPool con razón de parada", lotes_ok, str(razones))
+
+    # --- TEST 19: Instantáneas y pasos atrás ---
+    from history import StepHistory
+    reversible = CPU(trace_level=TRACE_OFF)
+    reversible.load_program(automodificable)
+    inicial = reversible.snapshot()
+    historial = StepHistory(reversible, depth=500)
+    for _ in range(17): historial.step()          # Termina a mitad de instrucción
+    intermedia = reversible.snapshot()
+    while reversible.running: historial.step()
+    final = reversible.snapshot()
+    pasos = len(historial)
+    for _ in range(pasos - 17): historial.step_back()
+    en_medio = reversible.snapshot() == intermedia
+    while historial.step_back(): pass
+    al_inicio = reversible.snapshot() == inicial
+    historial.close()
+    reversible.restore(final)
+    # Deshacer un STA a un puerto de salida no vuelve a emitir el carácter
+    from devices import CharOutputPort
+    emitidos = []
+    con_puerto = CPU(trace_level=TRACE_OFF, debug_sink=None)
+    con_puerto.bus.map_device(CharOutputPort(emitidos.append, batch_size=1), 0xF0)
+    con_puerto.load_program([0x01, 0x41, 0x03, 0xF0, 0xFF])
+    historial = StepHistory(con_puerto)
+    while con_puerto.running: historial.step()
+    while historial.step_back(): pass
+    atras_ok = (en_medio and al_inicio and reversible.snapshot() == final and final[1] != inicial[1]
+                and emitidos == ["A"] and con_puerto.PC == 0)
+    assert_test("HISTORIAL: Paso atrás deshace registros, micro-ops y memoria", atras_ok)
+
+    # --- TEST 20: Detección de bucles infinitos y avance rápido ---
+    bucles_ok = True
+    for usar_jit in (False, True):
+        infinita = CPU(trace_level=TRACE_OFF, jit=usar_jit, detect_loops=True)
+        infinita.load_program(PROGRAMS["5"][1], PROGRAMS["5"][2])
+        infinita.run()                          # Sin límite de ciclos: debe detenerse sola
+        contada = CPU(trace_level=TRACE_OFF, jit=usar_jit, detect_loops=True)
+        contada.load_program([0x01, 0x00, 0x0B, 200] + list(bytecode[4:]))   # Multiplicación 5 x 200
+        contada.run()
+        normal = CPU(trace_level=TRACE_OFF)
+        normal.load_program([0x01, 0x00, 0x0B, 200] + list(bytecode[4:]))
+        normal.run()
+        bucles_ok = (bucles_ok and infinita.stop_reason == "loop" and contada.loop_guard.fast_forwards > 0
+                     and contada.snapshot() == normal.snapshot())
+    # Con un dispositivo bajo el operando del ADD, cada vuelta debe leerlo (sin avance rápido)
+    from devices import RandomPort
+    aleatorios = []
+    for opciones in ({}, {"detect_loops": True}, {"detect_loops": True, "jit": True}):
+        con_puerto = CPU(trace_level=TRACE_OFF, **opciones)
+        con_puerto.bus.map_device(RandomPort(seed=1), 0x03)
+        con_puerto.load_program([0x0B, 0x0A, 0x02, 0x00, 0x0D, 0x06, 0x09, 0x04, 0x02, 0xFF])
+        con_puerto.run()
+        aleatorios.append(con_puerto.A)
+    bucles_ok = bucles_ok and aleatorios[0] == aleatorios[1] == aleatorios[2]
+    assert_test("BUCLES: Bucle infinito detectado y bucle contado en forma cerrada", bucles_ok)
+
+    # --- TEST 21: Ensamblador de una pasada con caché ---
+    from assembler import clear_cache, compile_file
+    adelante = "INICIO: LDX 3\nBUCLE: DEX\nBEQ FIN\nJMP BUCLE\nFIN: HALT\n"
+    clear_cache()
+    primera, _ = compile_asm(adelante, verbose=False)
+    repetida, _ = compile_asm(adelante.split("\n"), verbose=False)
+    _, errores = compile_asm("LDA 1\nFOO 2\nJMP NADA\nX: HALT\nX: HALT", verbose=False)
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "bucle.asm")
+        with open(ruta, "w") as f:
+            f.write(adelante)
+        clear_cache()
+        desde_disco, _ = compile_file(ruta, cache_dir=tmp)
+        clear_cache()
+        desde_cache, _ = compile_file(ruta, cache_dir=tmp)
+    asm_ok = (primera == repetida == desde_disco == desde_cache == [0x0B, 3, 0x0D, 0x06, 7, 0x04, 2, 0xFF]
+              and errores is not None and len(errores.split("\n")) == 3 and "(línea 2)" in errores)
+    assert_test("ENSAMBLADOR: Una pasada, errores por línea y caché", asm_ok, str(errores))
+
+    # --- TEST 22: Desensamblador con etiquetas ---
+    from disassembler import disassemble, to_source
+    listado = disassemble(bytecode, pc=4)
+    reensamblado, error = compile_asm(to_source(bytecode), verbose=False)
+    desasm_ok = ("L_04:" in listado and any(l.startswith(">") and "ADD 0x05" in l for l in listado)
+                 and any("BEQ L_0B" in l for l in listado) and reensamblado == list(bytecode)
+                 and disassemble([0x00, 0x01])[-1].endswith("DB 0x01"))
+    assert_test("DESENSAMBLADOR: Listado con etiquetas y reensamblado idéntico", desasm_ok, "\n".join(listado))
+
+    # --- TEST 23: Renderizado por diferencias ---
+    import io
+    from renderer import TerminalRenderer
+    pantalla = io.StringIO()
+    panel = CPU(trace_level=TRACE_OFF)
+    panel.load_program(bytecode)
+    panel.renderer = TerminalRenderer(out=pantalla, fps=1)
+    panel.render()
+    completo = pantalla.getvalue()
+    omitido = not panel.render()                        # Dentro del intervalo de 1 s
+    pantalla.seek(0); pantalla.truncate()
+    panel.step(); panel.step(); panel.step()            # LDA 0: solo cambian PC y flags
+    panel.render(force=True)
+    parcial = pantalla.getvalue()
+    render_ok = (omitido and completo.startswith("\033[2J") and "\033[2J" not in parcial
+                 and len(parcial) < len(completo) // 5 and "╔" not in parcial)
+    assert_test("RENDER: Solo se redibuja lo que cambia y se limitan los fotogramas", render_ok,
+                f"{len(parcial)} / {len(completo)}")
+
+    # --- TEST 24: Breakpoints y watchpoints en ejecución continua ---
+    from debugger import Debugger
+    depurada = CPU(trace_level=TRACE_OFF)
+    depurada.load_program(bytecode)                   # Multiplicación 5 x 3
+    depurador = Debugger(depurada)
+    depurador.toggle_breakpoint(0x06)                 # DEX
+    paradas = []
+    while depurada.running:
+        depurador.run()
+        paradas.append((depurada.stop_reason, depurada.X))
+    depurador.toggle_breakpoint(0x06)
+    depurador.toggle_watch_write(0x50)
+    depurador.toggle_watch_read(0x05)                 # Operando de ADD
+    depurada.load_program(bytecode)
+    depurador.run()
+    lectura = (depurada.stop_reason, depurador.hit_addr, depurada.PC)
+    depurador.toggle_watch_read(0x05)
+    depurador.run()
+    escritura = (depurada.stop_reason, depurador.hit_addr, depurada.A, depurada.PC)
+    depurador.close()
+    depurar_ok = (paradas == [("breakpoint", 3), ("breakpoint", 2), ("breakpoint", 1), (None, 0)]
+                  and lectura == ("watch_read", 0x05, 0x04) and escritura == ("watch_write", 0x50, 15, 0x0D)
+                  and not depurada.bus.write_hooks)
+    assert_test("DEPURADOR: Breakpoints y watchpoints de lectura/escritura", depurar_ok,
+                str((paradas, lectura, escritura)))
+
+    # --- TEST 25: Perfilador ---
+    perfilada = CPU(trace_level=TRACE_OFF, profile=True)
+    perfilada.load_program(bytecode)
+    for _ in range(10): perfilada.step()                # Parte con step() y el resto con run()
+    perfilada.run()
+    perfil = perfilada.profiler.to_dict()
+    perfilar_ok = (perfil["cycles"] == lenta.cycles and perfil["instructions"] == lenta.instr_count
+                   and perfil["opcodes"]["ADD"]["count"] == 3 and perfil["opcodes"]["DEX"]["count"] == 3
+                   and perfil["pc"]["04"]["cycles"] == 3 * INSTR_CYCLES[0x02]
+                   and perfil["memory"]["writes"][0x50] == 1 and perfil["memory"]["reads"][0x05] == 3
+                   and sum(o["cycles"] for o in perfil["opcodes"].values()) == lenta.cycles
+                   and perfilada.profiler.heat_levels()[0x04] == 4 and perfilada.profiler.heat_levels()[0x50] == 0)
+    perfilada.profiler.close()
+    assert_test("PERFILADOR: Conteos por opcode, dirección y accesos a memoria", perfilar_ok, str(perfil["opcodes"]))
+
+    # --- TEST 26: Benchmarks y comparación con baseline ---
+    from benchmark import bench_program, compare
+    medida = bench_program("7", repeat=1)
+    base = {"results": {"run": {"value": 100.0, "spread": 0.01}, "frame": {"value": 1.0, "spread": 0.0}}}
+    ahora = {"results": {"run": {"value": 80.0, "spread": 0.01},
+                         "frame": {"value": 0.95, "spread": 0.0, "higher_is_better": False}}}
+    filas = {fila[0]: fila[4] for fila in compare(ahora, base, threshold=0.10)}
+    bench_ok = medida["value"] > 0 and medida["unit"] == "instr/s" and filas == {"run": True, "frame": False}
+    assert_test("BENCHMARK: Medida repetida y detección de regresiones", bench_ok, str(filas))
+
+    # --- TEST 27: Conformidad con casos de datos y trazas doradas ---
+    from conformance import load_cases, run_cases
+    casos = load_cases([os.path.join(os.path.dirname(os.path.abspath(__file__)), "conformance")])
+    resultados = list(run_cases(casos, workers=2))
+    alterado = dict(casos[0], expect=dict(casos[0]["expect"], trace_sha256="0" * 64))
+    conformidad_ok = (len(casos) >= 10 and all(r["passed"] for r in resultados)
+                      and not next(run_cases([alterado], workers=1))["passed"])
+    assert_test("CONFORMIDAD: Casos de datos en paralelo con traza dorada", conformidad_ok,
+                str([r["failures"] for r in resultados if not r["passed"]]))
+
+    # --- TEST 28: Servidor de sesiones concurrentes ---
+    import asyncio
+    from server import EmulatorServer
+
+    async def sesiones():
+        servidor = await EmulatorServer(slice_cycles=1000, quota=300000, detect_loops=False).start("127.0.0.1", 0)
+        puerto = servidor.sockets[0].getsockname()[1]
+        terminadas = []
+
+        async def cliente(nombre, comandos):
+            reader, writer = await asyncio.open_connection("127.0.0.1", puerto)
+            await reader.readline()
+            respuestas = []
+            for comando in comandos:
+                writer.write((comando + "\n").encode())
+                await writer.drain()
+                respuestas.append((await reader.readline()).decode().strip())
+            terminadas.append(nombre)
+            writer.close()
+            return respuestas
+
+        async with servidor:
+            return await asyncio.gather(
+                cliente("bucle", ["LOAD 01 00 02 01 03 FF 04 02", "RUN", "STEP"]),
+                cliente("mult", ["ASM LDA 0; LDX 3; B: ADD 5; DEX; BEQ F; JMP B; F: STA 0x50; HALT",
+                                 "RUN", "MEM 50 1", "FOO"])), terminadas
+
+    (bucle, mult), terminadas = asyncio.run(sesiones())
+    fin_bucle = json.loads(bucle[1][3:])
+    fin_mult = json.loads(mult[1][3:])
+    servidor_ok = (fin_bucle["stop"] == "quota" and fin_bucle["quota_left"] < 4 and bucle[2].startswith("ERR")
+                   and fin_mult["stop"] == "halted" and fin_mult["A"] == 15 and mult[2] == "OK 0F"
+                   and mult[3].startswith("ERR") and terminadas == ["mult", "bucle"])
+    assert_test("SERVIDOR: Sesiones concurrentes por rodajas con cuota de ciclos", servidor_ok,
+                str((bucle, mult, terminadas)))
+
+    # --- TEST 29: Permisos de página (ROM, NX y vigilancia) ---
+    from bus import MemoryFault, PERM_NOEXEC, PERM_ROM, PERM_WATCH
+
+    def con_fallo(ejecutar, cpu):
+        try:
+            ejecutar(cpu)
+        except MemoryFault as fault:
+            return fault.kind, fault.pc, fault.addr, cpu.PC, cpu.running, cpu.stop_reason
+        return None
+
+    def paso_a_paso(cpu):
+        while cpu.running: cpu.step()
+
+    # LDA 7; STA $30; STA $05; HALT con la página 0 ($00-$0F) de solo lectura
+    programa_rom = [0x01, 7, 0x03, 0x30, 0x03, 0x05, 0xFF]
+    fallos_rom = []
+    for jit, ejecutar in ((False, paso_a_paso), (False, lambda c: c.run()), (True, lambda c: c.run())):
+        cpu_p = CPU(trace_level=TRACE_OFF, jit=jit)
+        cpu_p.load_program(programa_rom)
+        cpu_p.bus.set_page_perms(0, PERM_ROM)
+        fallos_rom.append((con_fallo(ejecutar, cpu_p), cpu_p.memory.data[0x30], cpu_p.memory.data[0x05]))
+    esperado_rom = (("write_rom", 4, 5, 4, False, "fault"), 7, 0x05)
+
+    # Salto a una página no ejecutable ($20): el FETCH falla en el intérprete y en el JIT
+    fallos_nx = []
+    for jit in (False, True):
+        cpu_p = CPU(trace_level=TRACE_OFF, jit=jit)
+        cpu_p.load_program([0x0B, 3, 0x0D, 0x06, 0x07, 0x04, 0x02, 0x04, 0x20])
+        cpu_p.bus.set_page_perms(2, PERM_NOEXEC)
+        fallos_nx.append(con_fallo(lambda c: c.run(), cpu_p))
+
+    # Página vigilada: se anotan los accesos sin detener la ejecución; al liberar los
+    # permisos se recupera el camino directo de la RAM
+    cpu_p = CPU(trace_level=TRACE_OFF, jit=True)
+    cpu_p.load_program([0x01, 9, 0x03, 0x40, 0x03, 0x41, 0xFF])
+    cpu_p.bus.set_page_perms(4, PERM_WATCH)
+    cpu_p.run()
+    vigilados = list(cpu_p.bus.watch_hits)
+    cpu_p.bus.clear_page_perms()
+    directo = "read_trusted" not in vars(cpu_p.bus) and cpu_p.bus.perm_map is None
+
+    # Parar por presupuesto justo antes de una página NX no es un fallo, y la vigilancia
+    # solo anota los opcodes que llegan a ejecutarse (igual en run() y en el JIT)
+    presupuesto = []
+    for usar_jit in (False, True):
+        limite = CPU(trace_level=TRACE_OFF, jit=usar_jit)
+        limite.load_program([0x04, 0x3E] + [0x00] * 0x3C + [0x01, 0x01, 0xFF])
+        limite.bus.set_page_perms(4, PERM_NOEXEC)
+        limite.run(6)
+        vigilada = CPU(trace_level=TRACE_OFF, jit=usar_jit)
+        vigilada.load_program([0x01, 0x01, 0x01, 0x02, 0xFF])
+        vigilada.bus.set_page_perms(0, PERM_WATCH)
+        for _ in range(4): vigilada.run(3)
+        presupuesto.append((limite.stop_reason, limite.PC, list(vigilada.bus.watch_hits)))
+
+    permisos_ok = (presupuesto[0] == presupuesto[1]
+                   and presupuesto[0] == (None, 0x40, [("read", a) for a in range(5)]) and all(f == esperado_rom for f in fallos_rom)
+                   and fallos_nx == [("exec_nx", 0x20, 0x20, 0x20, False, "fault")] * 2
+                   and vigilados == [("write", 0x40), ("write", 0x41)] and cpu_p.memory.data[0x41] == 9
+                   and directo)
+    assert_test("PERMISOS: Fallos ROM/NX con PC y dirección, y vigilancia de páginas", permisos_ok,
+                str((fallos_rom, fallos_nx, vigilados, directo, presupuesto)))
+
+    # --- TEST 30: Optimizador de mirilla ---
+    from optimizer import optimize_listing
+    from assembler import _assemble
+    fuente_opt = ("LDA 0\nLDA 1\nADD 1\nADD 1\nLDX 3\nINX\nDEX\n"
+                  "B: ADD 5\nDEX\nBEQ F\nJMP B2\nB2: JMP B\nNOT\nF: STA 0x50\nJMP H\nH: HALT")
+    finales = []
+    for optimizar in (False, True):
+        prog, _ = compile_asm(fuente_opt, verbose=False, cache=False, optimize=optimizar)
+        cpu_o = CPU(trace_level=TRACE_OFF)
+        cpu_o.load_program(prog)
+        cpu_o.run()
+        finales.append(((cpu_o.A, cpu_o.X, cpu_o.carry, cpu_o.zero, cpu_o.memory.data[0x50]), cpu_o.cycles, prog))
+    bc, _, listado, etiquetas = _assemble(fuente_opt.split("\n"))
+    _, _, informe = optimize_listing(bc, listado, etiquetas)
+    # El carry que llega a HALT es observable: solo se pliega la primera suma
+    con_carry, _ = compile_asm("LDA 10\nADD 250\nADD 10\nHALT", verbose=False, cache=False, optimize=True)
+    # Código automodificable: no se recoloca
+    bc, _, listado, etiquetas = _assemble(["STA 1", "HALT"])
+    _, _, automod = optimize_listing(bc, listado, etiquetas)
+    opt_ok = (finales[0][0] == finales[1][0] and finales[1][1] < finales[0][1]
+              and finales[1][2] == [0x01, 3, 0x0B, 3, 0x02, 5, 0x0D, 0x06, 0x0B, 0x04, 4, 0x03, 0x50, 0xFF]
+              and informe["bytes_after"] == 14 and informe["cycles_after"] < informe["cycles_before"]
+              and con_carry == [0x01, 4, 0x02, 10, 0xFF] and automod["skipped"])
+    assert_test("OPTIMIZADOR: Plegado, código muerto y saltos encadenados con el mismo estado final", opt_ok,
+                str((finales, informe, con_carry, automod)))
+
+    # --- TEST 31: Grafo de flujo y cotas estáticas de ciclos ---
+    from analysis import analyze, program_image
+    from batch_runner import run_program
+    from sample_programs import PROGRAMS
+    cotas = {}
+    for clave in ("4", "5", "7"):
+        _, prog, origen = PROGRAMS[clave]
+        cfg = analyze(program_image(prog, origen), origen)
+        real = CPU(trace_level=TRACE_OFF)
+        real.load_program(prog, origen)
+        real.run(10000)
+        cotas[clave] = (cfg.cycle_bounds(), [l.bound for l in cfg.loops], real.cycles)
+    automod_cfg = analyze(automodificable)
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta_mult = os.path.join(tmp, "mult.hex")
+        ruta_bucle = os.path.join(tmp, "bucle.hex")
+        with open(ruta_mult, "w") as f:
+            f.write(" ".join(f"{b:02X}" for b in PROGRAMS["7"][1]))
+        with open(ruta_bucle, "w") as f:
+            f.write("01 00 02 01 03 FF 04 02\n")
+        fila_mult = run_program(ruta_mult, offset=PROGRAMS["7"][2], static_budget=True)
+        fila_bucle = run_program(ruta_bucle, reject_unbounded=True)
+    (min4, max4), bucles4, real4 = cotas["4"]
+    (min7, max7), bucles7, real7 = cotas["7"]
+    analisis_ok = (bucles4 == [10] and bucles7 == [3] and min4 <= real4 <= max4 and min7 <= real7 <= max7
+                   and cotas["5"][0] == (None, None) and cotas["5"][1] == [None]
+                   and automod_cfg.self_modifying() and automod_cfg.cycle_bounds() == (None, None)
+                   and fila_mult["halt_reason"] == "halted" and fila_mult["cycle_bound"] == max7
+                   and fila_bucle["halt_reason"] == "rejected")
+    assert_test("ANÁLISIS: CFG con bucles contados y cotas de ciclos sin ejecutar", analisis_ok,
+                str((cotas, automod_cfg.self_modifying(), fila_mult, fila_bucle)))
+
+    # --- TEST 32: Grabación y reproducción deterministas ---
+    from devices import RandomPort
+    from replay import Replayer, load, record
+    # LDX 200; JMP $7F ... $7F: ADD <byte aleatorio de $80>; STA $60; DEX; BEQ $04; JMP $7F
+    aleatorio = bytearray(0x88)
+    aleatorio[0:5] = bytes([0x0B, 200, 0x04, 0x7F, 0xFF])
+    aleatorio[0x7F:0x88] = bytes([0x02, 0x00, 0x03, 0x60, 0x0D, 0x06, 0x04, 0x04, 0x7F])
+
+    def cpu_aleatoria():
+        nueva = CPU(trace_level=TRACE_OFF)
+        nueva.bus.map_device(RandomPort(seed=7), 0x80)
+        nueva.load_program(aleatorio)
+        return nueva
+
+    grabada = cpu_aleatoria()
+    grabacion = record(grabada, interval=300)
+    referencia = cpu_aleatoria()
+    referencia.run_interpreted(1234)
+    reproductor = Replayer(grabacion)
+    reproductor.seek(2500)
+    alcanzado = reproductor.seek(1234)
+    en_1234 = (reproductor.cpu.registers()[:8], reproductor.cpu.memory.dump_image())
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "ejecucion.l8r")
+        grabacion.save(ruta)
+        cargada = load(ruta)
+        tamano = os.path.getsize(ruta)
+    fiel = Replayer(cargada).verify()
+    cargada.input_values[10] ^= 0xFF
+    alterada = Replayer(cargada).verify()
+    reproductor.seek(grabacion.end_cycle)
+    replay_ok = (alcanzado == referencia.cycles
+                 and en_1234 == (referencia.registers()[:8], referencia.memory.dump_image())
+                 and reproductor.memory_at(1234) == referencia.memory.dump_image()
+                 and reproductor.cpu.memory.dump_image() == grabada.memory.dump_image()
+                 and len(grabacion.keyframes) > 2 and len(grabacion.input_values) == 200
+                 and fiel is None and alterada is not None and tamano < 2048
+                 and not grabada.bus.read_hooks and not grabada.bus.write_hooks)
+    assert_test("REPLAY: Grabación compacta con fotogramas clave y búsqueda por ciclo", replay_ok,
+                str((alcanzado, referencia.cycles, fiel, alterada, tamano)))
+
+    # --- TEST 33: Línea de órdenes sin interfaz e importación perezosa ---
+    import contextlib, io, json, os, subprocess, sys, tempfile
+    import logica8
+    with tempfile.TemporaryDirectory() as tmp:
+        fuente = os.path.join(tmp, "suma.asm")
+        with open(fuente, "w", encoding="utf-8") as f:
+            f.write("LDA 5\nADD 3\nSTA 0x40\nHALT\n")
+        salida = io.StringIO()
+        with contextlib.redirect_stdout(salida):
+            codigo = logica8.main(["run", fuente, "--json", "--memory"])
+            logica8.main(["asm", fuente, "-o", os.path.join(tmp, "suma.hex")])
+        estado = json.loads(salida.getvalue().splitlines()[0])
+        # Un operando fuera de la memoria se informa como fallo, sin excepción
+        with open(os.path.join(tmp, "corto.hex"), "w", encoding="utf-8") as f:
+            f.write("01\n")
+        salida = io.StringIO()
+        with contextlib.redirect_stdout(salida):
+            logica8.main(["run", os.path.join(tmp, "corto.hex"), "--offset", "0xFF", "--json"])
+        fallo = json.loads(salida.getvalue())
+        with open(os.path.join(tmp, "suma.hex"), encoding="utf-8") as f:
+            hex_ok = f.read().split() == ["01", "05", "02", "03", "03", "40", "FF"]
+        # disasm no debe cargar la CPU ni el panel de terminal
+        # y run no carga el panel ni el ejecutor por lotes
+        comprobacion = ("import sys, logica8; logica8.main(['disasm', sys.argv[1]]); "
+                        "assert not {'cpu', 'renderer', 'batch_runner'} & set(sys.modules); "
+                        "logica8.main(['run', sys.argv[1]]); "
+                        "assert not {'renderer', 'batch_runner'} & set(sys.modules)")
+        perezoso = subprocess.run([sys.executable, "-c", comprobacion, os.path.join(tmp, "suma.hex")],
+                                  cwd=os.path.dirname(os.path.abspath(__file__)),
+                                  capture_output=True, text=True)
+    lineas = []
+    cpu_sink = CPU(trace_level=TRACE_OFF, debug_sink=lineas.append)
+    cpu_sink.load_program([0x01, 1, 0xFF])
+    while cpu_sink.running: cpu_sink.step()
+    cli_ok = (codigo == 0 and estado["A"] == 8 and estado["halt_reason"] == "halted"
+              and fallo["halt_reason"] == "fault" and "error" in fallo
+              and bytes.fromhex(estado["memory"])[0x40] == 8 and hex_ok
+              and perezoso.returncode == 0 and "HALT" in perezoso.stdout
+              and len(lineas) == cpu_sink.cycles and lineas[0].startswith("STEP: PC=00"))
+    assert_test("CLI: run/asm/disasm sin interfaz y salida de depuración redirigible", cli_ok,
+                str((codigo, estado, hex_ok, perezoso.returncode, perezoso.stderr[-200:], len(lineas))))
+
+    # --- TEST 34: Varios núcleos sobre memoria compartida con cerrojo test-and-set ---
+    from multicore import ARB_FREE, ARB_ROUND_ROBIN, TAS_ADDR, MultiCore, make_core
+    # Cada núcleo suma 1 al contador ($11, operando de 'LDA') 50 veces, con el cerrojo
+    # tomado: LDA del cerrojo en TAS_ADDR-1, BEQ a la sección crítica si estaba libre
+    contador = bytearray(256)
+    contador[0x00:0x04] = bytes([0x0B, 50, 0x04, TAS_ADDR - 1])
+    contador[0x10:0x20] = bytes([0x01, 0x00, 0x02, 1, 0x03, 0x11, 0x01, 0, 0x03, TAS_ADDR,
+                                 0x0D, 0x06, 0x1F, 0x04, TAS_ADDR - 1, 0xFF])
+    contador[TAS_ADDR - 1:TAS_ADDR + 5] = bytes([0x01, 0x00, 0x06, 0x10, 0x04, TAS_ADDR - 1])
+    with MultiCore() as sistema:
+        nucleo = make_core(sistema.memory, 0x00)
+        tas = [nucleo.bus.read_trusted(TAS_ADDR), nucleo.bus.read_trusted(TAS_ADDR)]
+        nucleo.bus.write_trusted(TAS_ADDR, 0)
+        tas.append(nucleo.bus.read_trusted(TAS_ADDR))
+        resultados = []
+        for modo in ("interleaved", "interleaved", ARB_ROUND_ROBIN, ARB_FREE):
+            sistema.load_image(contador)
+            if modo == "interleaved":
+                estados = sistema.run_interleaved([0x00, 0x00], quantum=6)
+            else:
+                estados = sistema.run([0x00, 0x00], arbitration=modo, quantum=6, timeout=60)
+            resultados.append((estados, sistema.memory.dump_image()))
+    deterministas = resultados[0] == resultados[1] == resultados[2]
+    multicore_ok = (tas == [0, 1, 0] and deterministas
+                    and all(imagen[0x11] == 100 and imagen[TAS_ADDR] == 0 for _, imagen in resultados)
+                    and all(e["halt_reason"] == "halted" for estados, _ in resultados for e in estados))
+    assert_test("MULTICORE: Memoria compartida, test-and-set y entrelazado determinista", multicore_ok,
+                str((tas, deterministas, [(imagen[0x11], [e["halt_reason"] for e in estados])
+                                          for estados, imagen in resultados])))
+
     print(f"\nRESULTADO: {tests_passed}/{total_tests} tests superados.")
-    input("\nPresiona ENTER para volver...")
\ No newline at end of file
+    if interactive:
+        input("\nPresiona ENTER para volver...")
+    return tests_passed, total_tests
\ No newline at end of file
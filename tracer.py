@@ -0,0 +1,264 @@
+import gzip
+import os
+import struct
+import time
+from collections import deque
+
+# Niveles de traza
+TRACE_OFF = 0      # Sin registro
+TRACE_INSTR = 1    # Una línea por instrucción (FETCH + ejecución)
+TRACE_UOP = 2      # Además, cada micro-operación
+
+SCREEN_LINES = 15        # Líneas del historial en pantalla
+HISTORY_LIMIT = 50000    # Registros conservados en memoria para exportar
+
+
+class Tracer:
+    """
+    Registro de trazas por niveles. Cada registro es una tupla (timestamp, formato, args)
+    y el texto solo se genera al mostrarlo o exportarlo.
+    Quien emite debe comprobar antes el nivel (cpu.tracer.level >= TRACE_xxx) para que
+    con la traza desactivada no haya coste de formato ni de memoria.
+    """
+
+    def __init__(self, level=TRACE_UOP, history_limit=HISTORY_LIMIT):
+        self.level = level
+        self.screen = deque(maxlen=SCREEN_LINES)
+        self.history = deque(maxlen=history_limit)
+        self.recorded = 0    # Registros emitidos (el historial solo guarda los últimos)
+        self.sinks = []
+
+    def record(self, fmt, *args):
+        rec = (time.time(), fmt, args)
+        self.screen.append(rec)
+        self.history.append(rec)
+        self.recorded += 1
+        for sink in self.sinks:
+            sink.write(rec)
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+        return sink
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+        self.sinks = []
+
+    def clear_screen(self):
+        self.screen.clear()
+
+    @staticmethod
+    def message(rec):
+        _, fmt, args = rec
+        return fmt.format(*args) if args else fmt
+
+    @staticmethod
+    def format_line(rec):
+        timestamp = time.strftime("%H:%M:%S", time.localtime(rec[0]))
+        return f"[{timestamp}] {Tracer.message(rec)}"
+
+    def screen_lines(self):
+        return [self.message(rec) for rec in self.screen]
+
+    @property
+    def dropped(self):
+        """Registros que ya no están en el historial por su límite (history_limit)."""
+        return self.recorded - len(self.history)
+
+    def history_lines(self):
+        for rec in self.history:
+            yield self.format_line(rec)
+
+
+# --- VOLCADO EN STREAMING ---
+# Los sinks reciben cada registro en el momento en que se produce, de modo que una
+# ejecución larga no necesita guardar la traza completa en memoria
+# (usar Tracer(history_limit=0) para no retener nada).
+
+TEXT_HEADER = "--- LOGICA-8 EXECUTION TRACE ---\n"
+BINARY_MAGIC = b"L8TRACE1"
+
+_TAG_FORMAT = b"F"
+_TAG_RECORD = b"R"
+_REC = struct.Struct("<dHB")     # timestamp, id de formato, número de argumentos
+_FMT = struct.Struct("<HH")      # id de formato, longitud en bytes
+_INT = struct.Struct("<i")
+_STR = struct.Struct("<H")
+
+
+def write_text_header(f):
+    f.write(TEXT_HEADER)
+    f.write("Project: LOGICA-8\n")
+    f.write(f"Generated: {time.ctime()}\n")
+    f.write("-" * 40 + "\n\n")
+
+
+def _rotate_files(filename, backups):
+    # filename -> filename.1 -> filename.2 ... (se descarta el más antiguo)
+    if backups <= 0:
+        os.remove(filename)
+        return
+    for i in range(backups - 1, 0, -1):
+        src = f"{filename}.{i}"
+        if os.path.exists(src):
+            os.replace(src, f"{filename}.{i + 1}")
+    os.replace(filename, f"{filename}.1")
+
+
+class TextTraceSink:
+    """Traza en texto plano, compatible con el formato de CPU.export_log."""
+
+    def __init__(self, filename, max_bytes=None, backups=3, buffer_size=65536):
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.buffer_size = buffer_size
+        self._open()
+
+    def _open(self):
+        self.f = open(self.filename, "w", encoding="utf-8", buffering=self.buffer_size)
+        write_text_header(self.f)
+        self.size = self.f.tell()
+
+    def write(self, rec):
+        line = Tracer.format_line(rec) + "\n"
+        self.f.write(line)
+        self.size += len(line.encode("utf-8"))   # max_bytes es en bytes, no en caracteres
+        if self.max_bytes and self.size >= self.max_bytes:
+            self.f.close()
+            _rotate_files(self.filename, self.backups)
+            self._open()
+
+    def close(self):
+        self.f.close()
+
+
+class BinaryTraceSink:
+    """
+    Traza binaria compacta: cada formato se guarda una sola vez y cada registro ocupa
+    timestamp + id de formato + argumentos. Con compress=True el fichero es gzip.
+    max_bytes se compara con el tamaño real en disco (comprimido si procede).
+    """
+
+    def __init__(self, filename, compress=True, max_bytes=None, backups=3, buffer_size=65536):
+        self.filename = filename
+        self.compress = compress
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.buffer_size = buffer_size
+        self._open()
+
+    def _open(self):
+        self.raw = open(self.filename, "wb")
+        self.f = gzip.GzipFile(fileobj=self.raw, mode="wb") if self.compress else self.raw
+        self.buffer = bytearray(BINARY_MAGIC)
+        self.formats = {}
+
+    def write(self, rec):
+        ts, fmt, args = rec
+        buf = self.buffer
+        fid = self.formats.get(fmt)
+        if fid is None:
+            fid = self.formats[fmt] = len(self.formats)
+            encoded = fmt.encode("utf-8")
+            buf += _TAG_FORMAT + _FMT.pack(fid, len(encoded)) + encoded
+        buf += _TAG_RECORD + _REC.pack(ts, fid, len(args))
+        for arg in args:
+            if isinstance(arg, int):
+                buf += b"i" + _INT.pack(arg)
+            else:
+                encoded = str(arg).encode("utf-8")
+                buf += b"s" + _STR.pack(len(encoded)) + encoded
+        if len(buf) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.f.write(self.buffer)
+            self.buffer = bytearray()
+        if self.max_bytes:
+            # Vaciar el compresor para que el tamaño en disco sea real
+            self.f.flush()
+        if self.max_bytes and self.raw.tell() >= self.max_bytes:
+            self._close_files()
+            _rotate_files(self.filename, self.backups)
+            self._open()
+
+    def _close_files(self):
+        if self.f is not self.raw:
+            self.f.close()
+        self.raw.close()
+
+    def close(self):
+        if self.buffer:
+            self.f.write(self.buffer)
+            self.buffer = bytearray()
+        self._close_files()
+
+
+# --- LECTURA PEREZOSA ---
+
+def _read_exact(f, n):
+    data = f.read(n)
+    if len(data) < n:
+        raise ValueError("Traza binaria truncada")
+    return data
+
+
+def iter_binary_records(f):
+    """Genera (timestamp, formato, args) leyendo el fichero binario de forma incremental."""
+    formats = []
+    while True:
+        tag = f.read(1)
+        if not tag:
+            return
+        if tag == _TAG_FORMAT:
+            fid, length = _FMT.unpack(_read_exact(f, _FMT.size))
+            fmt = _read_exact(f, length).decode("utf-8")
+            if fid != len(formats):
+                raise ValueError(f"Traza binaria corrupta: formato {fid} fuera de orden")
+            formats.append(fmt)
+        elif tag == _TAG_RECORD:
+            ts, fid, nargs = _REC.unpack(_read_exact(f, _REC.size))
+            args = []
+            for _ in range(nargs):
+                kind = f.read(1)
+                if kind == b"i":
+                    args.append(_INT.unpack(_read_exact(f, _INT.size))[0])
+                else:
+                    length = _STR.unpack(_read_exact(f, _STR.size))[0]
+                    args.append(_read_exact(f, length).decode("utf-8"))
+            yield ts, formats[fid], tuple(args)
+        else:
+            raise ValueError(f"Traza binaria corrupta: etiqueta {tag!r}")
+
+
+def read_trace(filename):
+    """
+    Itera las líneas '[HH:MM:SS] mensaje' de un fichero de traza sin cargarlo entero.
+    Detecta automáticamente texto plano, binario y binario comprimido con gzip.
+    """
+    with open(filename, "rb") as probe:
+        head = probe.read(len(BINARY_MAGIC))
+
+    if head[:2] == b"\x1f\x8b" or head == BINARY_MAGIC:
+        opener = gzip.open if head[:2] == b"\x1f\x8b" else open
+        with opener(filename, "rb") as f:
+            if f.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+                raise ValueError(f"{filename} no es una traza LOGICA-8")
+            for rec in iter_binary_records(f):
+                yield Tracer.format_line(rec)
+        return
+
+    with open(filename, "r", encoding="utf-8") as f:
+        first = f.readline()
+        in_header = first == TEXT_HEADER
+        if first and not in_header:
+            yield first.rstrip("\n")
+        for line in f:
+            if in_header:
+                # La cabecera termina en la primera línea vacía
+                in_header = line.strip() != ""
+                continue
+            yield line.rstrip("\n")